@@ -0,0 +1,119 @@
+"""Async variants of the hot read endpoints.
+
+These handlers run directly on the event loop and await an ``AsyncSession``
+instead of occupying a threadpool worker while SQLite answers. They share
+their statements with the sync handlers in ``app.api.routes`` and are mounted
+ahead of them by ``create_app`` when ``ASYNC_DATABASE`` is enabled. The shared
+statements carry loader options for every relationship the response schema
+touches, since lazy loads are not available on an ``AsyncSession``.
+"""
+
+from typing import Dict, List, Optional
+
+from fastapi import APIRouter, Depends, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import app.models as models
+import app.schemas as schemas
+from app.api.conditional import IfNoneMatch, etag_matches, not_modified, set_etag
+from app.api.filters import TaskFilters
+from app.api.pagination import PageParams, set_next_cursor
+from app.api.routes import (
+    NOTIFICATION_PAGES,
+    PROJECT_PAGES,
+    TASK_SORTS,
+    DependencyMapResponse,
+    MapFormat,
+    MapLayout,
+    Page,
+    TaskFilter,
+    accessible_projects_statement,
+    accessible_tasks_statement,
+    dependency_map_etag,
+    dependency_map_versions_statement,
+    notifications_statement,
+    render_dependency_map,
+)
+from app.core.database import get_async_db
+from app.services import auth
+from app.services.dependency_maps import (
+    ProjectLayout,
+    dependency_maps,
+    layout_positions,
+    merge_dependency_maps,
+    project_map_statements,
+)
+
+router = APIRouter()
+
+
+@router.get("/projects", response_model=List[schemas.ProjectOut])
+async def list_projects_async(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(auth.get_licensed_user_async),
+    page: Page = PageParams(),
+    response: Response = None,
+):
+    """Return a page of the projects visible to the current user, newest first."""
+    result = await db.execute(PROJECT_PAGES.apply(accessible_projects_statement(current_user), page))
+    projects, next_cursor = PROJECT_PAGES.split(result.scalars().all(), page)
+    set_next_cursor(response, next_cursor)
+    return projects
+
+
+@router.get("/tasks", response_model=List[schemas.TaskOut])
+async def list_all_accessible_tasks_async(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(auth.get_licensed_user_async),
+    page: Page = PageParams(),
+    filters: TaskFilter = TaskFilters(),
+    response: Response = None,
+):
+    """Return a page of the tasks across projects the user is allowed to see."""
+    task_pages = TASK_SORTS[filters.sort]
+    result = await db.execute(task_pages.apply(filters.apply(accessible_tasks_statement(current_user)), page))
+    tasks, next_cursor = task_pages.split(result.scalars().all(), page)
+    set_next_cursor(response, next_cursor)
+    return tasks
+
+
+@router.get("/dependency-map", response_model=DependencyMapResponse, response_model_exclude_none=True)
+async def dependency_map_async(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(auth.get_licensed_user_async),
+    if_none_match: IfNoneMatch = None,
+    response: Response = None,
+    map_format: MapFormat = "full",
+    with_layout: MapLayout = False,
+):
+    """Return the dependency graph focused on tasks accessible to the user."""
+    versions = (await db.execute(dependency_map_versions_statement(current_user))).all()
+    etag = dependency_map_etag(current_user, versions, map_format, with_layout)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+
+    layouts: Optional[Dict[int, ProjectLayout]] = {} if with_layout else None
+    maps, stale = dependency_maps.lookup(versions, layouts)
+    if stale:
+        tasks_stmt, dependencies_stmt = project_map_statements(stale)
+        task_rows = (await db.execute(tasks_stmt)).all()
+        dependency_rows = (await db.execute(dependencies_stmt)).all()
+        maps.update(dependency_maps.load(stale, task_rows, dependency_rows, layouts))
+    positions = layout_positions(layouts[project_id] for project_id, _ in versions) if with_layout else None
+    merged = merge_dependency_maps(maps[project_id] for project_id, _ in versions)
+    return render_dependency_map(merged, map_format, positions)
+
+
+@router.get("/notifications", response_model=List[schemas.NotificationOut])
+async def list_notifications_async(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(auth.get_licensed_user_async),
+    page: Page = PageParams(),
+    response: Response = None,
+):
+    """List a page of the current user's notifications, newest first."""
+    result = await db.execute(NOTIFICATION_PAGES.apply(notifications_statement(current_user), page))
+    notifications, next_cursor = NOTIFICATION_PAGES.split(result.scalars().all(), page)
+    set_next_cursor(response, next_cursor)
+    return notifications
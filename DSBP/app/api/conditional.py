@@ -0,0 +1,51 @@
+"""Conditional GET support: strong ETags and ``304 Not Modified``.
+
+Handlers derive an ETag from cheap version data (``models.Project.version``)
+and compare it with ``If-None-Match`` before running their list queries, so
+revalidating an unchanged resource costs a version lookup and an empty
+response.
+"""
+
+import hashlib
+from typing import Annotated, Optional
+
+from fastapi import Header, Response, status
+
+# Browsers keep the response but revalidate it on every use, which the ETag
+# turns into a cheap round trip.
+CACHE_CONTROL = "private, no-cache"
+
+IfNoneMatch = Annotated[Optional[str], Header()]
+
+
+def make_etag(*parts) -> str:
+    """Strong ETag over the given version components."""
+    digest = hashlib.sha256(":".join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an ``If-None-Match`` header matches ``etag``.
+
+    ``If-None-Match`` uses the weak comparison, so a ``W/`` prefix added by an
+    intermediary still matches.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(candidate.strip().removeprefix("W/") == etag for candidate in if_none_match.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL},
+    )
+
+
+def set_etag(response: Optional[Response], etag: str) -> None:
+    """Attach ``etag`` to a full response (a no-op when called directly)."""
+    if response is not None:
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = CACHE_CONTROL
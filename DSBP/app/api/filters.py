@@ -0,0 +1,84 @@
+"""Filtering and sort order for task list endpoints.
+
+``GET /projects/{id}/tasks`` and ``GET /tasks`` accept the same query
+parameters, read by the ``task_filters`` dependency. Every filter becomes a
+WHERE clause, so the database returns only the matching page instead of the
+client downloading whole projects to filter them itself. The indexes on
+``tasks`` and ``task_assignees`` declared in ``app.models`` back them.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import List, Literal, Optional, Tuple
+
+from fastapi import Query
+from sqlalchemy import select
+
+import app.models as models
+from app.schemas import TaskStatus
+
+# ``created_at`` newest first unless asked otherwise; tasks without a due date
+# come last in either due-date order.
+TaskSort = Literal["-created_at", "created_at", "due_date", "-due_date"]
+
+
+def naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Convert an aware datetime to naive UTC, the form the task columns store.
+
+    Naive values are taken to be UTC already and returned unchanged.
+    """
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+@dataclass(frozen=True)
+class TaskFilters:
+    """Which tasks a list returns, and in which order."""
+
+    status: Tuple[str, ...] = ()
+    assignee_id: Optional[int] = None
+    due_before: Optional[datetime] = None
+    due_after: Optional[datetime] = None
+    created_after: Optional[datetime] = None
+    sort: TaskSort = "-created_at"
+
+    def apply(self, statement):
+        """Narrow a ``Select`` or ``Query`` over ``Task`` to the matching tasks."""
+        task = models.Task
+        if self.status:
+            statement = statement.where(task.status.in_(self.status))
+        if self.assignee_id is not None:
+            assigned = select(models.task_assignees.c.task_id).where(
+                models.task_assignees.c.user_id == self.assignee_id
+            )
+            statement = statement.where(task.id.in_(assigned))
+        if self.due_before is not None:
+            statement = statement.where(task.due_date < self.due_before)
+        if self.due_after is not None:
+            statement = statement.where(task.due_date >= self.due_after)
+        if self.created_after is not None:
+            statement = statement.where(task.created_at >= self.created_after)
+        return statement
+
+
+def task_filters(
+    status: Optional[List[TaskStatus]] = Query(None, description="Only tasks in these statuses"),
+    assignee_id: Optional[int] = Query(None, description="Only tasks assigned to this user"),
+    due_before: Optional[datetime] = Query(None, description="Only tasks due before this time"),
+    due_after: Optional[datetime] = Query(None, description="Only tasks due at or after this time"),
+    created_after: Optional[datetime] = Query(None, description="Only tasks created at or after this time"),
+    sort: TaskSort = Query("-created_at", description="Sort key; a leading '-' sorts descending"),
+) -> TaskFilters:
+    """Dependency reading the task filters from the query string.
+
+    Times with an offset (``2030-01-01T09:00:00+02:00``) are converted to UTC.
+    """
+    return TaskFilters(
+        status=tuple(status or ()),
+        assignee_id=assignee_id,
+        due_before=naive_utc(due_before),
+        due_after=naive_utc(due_after),
+        created_after=naive_utc(created_after),
+        sort=sort,
+    )
@@ -0,0 +1,135 @@
+"""Keyset (cursor) pagination for list endpoints.
+
+A page is selected with a WHERE clause on the sort key of the last row of the
+previous page instead of an OFFSET, so page N costs the same index seek as
+page 1. Cursors are opaque URL-safe tokens encoding that sort key; list
+endpoints return the cursor for the next page in the ``X-Next-Cursor``
+header, which is absent on the last page.
+"""
+
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Query, Response, status
+from sqlalchemy import DateTime, Float, and_, or_
+
+from app.core import config
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+@dataclass(frozen=True)
+class PageParams:
+    """Requested page size and the cursor to resume from."""
+
+    limit: int = config.PAGE_SIZE_DEFAULT
+    cursor: Optional[str] = None
+
+
+def page_params(
+    limit: int = Query(config.PAGE_SIZE_DEFAULT, ge=1, le=config.PAGE_SIZE_MAX),
+    cursor: Optional[str] = Query(None, description="Cursor returned with the previous page"),
+) -> PageParams:
+    """Dependency reading ``limit`` and ``cursor`` from the query string."""
+    return PageParams(limit=limit, cursor=cursor)
+
+
+def _invalid_cursor_exception() -> HTTPException:
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+class Keyset:
+    """Ordering over a unique sort key that pages can resume from.
+
+    The last column must make the key unique (normally the primary key) so
+    rows sharing a timestamp are neither skipped nor repeated across pages.
+    With ``nulls_last`` the other columns may be NULL; such rows sort after
+    all others in either direction.
+    """
+
+    def __init__(self, *columns, descending: bool = True, nulls_last: bool = False) -> None:
+        self.columns = columns
+        self.descending = descending
+        self.nulls_last = nulls_last
+
+    def encode(self, row) -> str:
+        values = [getattr(row, column.key) for column in self.columns]
+        payload = json.dumps(
+            [value.isoformat() if isinstance(value, datetime) else value for value in values],
+            separators=(",", ":"),
+        )
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    def decode(self, cursor: str) -> List[Any]:
+        try:
+            payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            values = json.loads(payload)
+            if not isinstance(values, list) or len(values) != len(self.columns):
+                raise ValueError(cursor)
+            decoded = []
+            for index, (column, value) in enumerate(zip(self.columns, values)):
+                if value is None and self.nulls_last and index < len(self.columns) - 1:
+                    decoded.append(value)
+                    continue
+                if isinstance(column.type, DateTime):
+                    value = datetime.fromisoformat(value)
+                elif isinstance(column.type, Float):
+                    if isinstance(value, bool) or not isinstance(value, (int, float)):
+                        raise ValueError(cursor)
+                elif not isinstance(value, (int, str)):
+                    raise ValueError(cursor)
+                decoded.append(value)
+            return decoded
+        except (ValueError, TypeError, binascii.Error, UnicodeDecodeError):
+            raise _invalid_cursor_exception() from None
+
+    def after(self, values: Sequence[Any]):
+        """Filter for rows strictly past ``values`` in this ordering.
+
+        Spelled out as ``a < x OR (a = x AND b < y)`` rather than a row-value
+        comparison so it works on every backend and still seeks the index.
+        """
+        clauses = []
+        for index, column in enumerate(self.columns):
+            equal = [
+                prefix.is_(None) if value is None else prefix == value
+                for prefix, value in zip(self.columns[:index], values)
+            ]
+            value = values[index]
+            if value is None:
+                continue  # nothing sorts past NULL but rows tied on it
+            beyond = column < value if self.descending else column > value
+            if self.nulls_last and index < len(self.columns) - 1:
+                beyond = or_(beyond, column.is_(None))
+            clauses.append(and_(*equal, beyond))
+        return or_(*clauses)
+
+    def apply(self, statement, page: PageParams):
+        """Order, filter and limit a ``Select`` or ``Query`` to one page.
+
+        One extra row is fetched so ``split`` can tell whether another page
+        follows without a COUNT query.
+        """
+        ordering = [column.desc() if self.descending else column.asc() for column in self.columns]
+        if self.nulls_last:
+            ordering = [order.nulls_last() for order in ordering[:-1]] + ordering[-1:]
+        statement = statement.order_by(None).order_by(*ordering)
+        if page.cursor:
+            statement = statement.where(self.after(self.decode(page.cursor)))
+        return statement.limit(page.limit + 1)
+
+    def split(self, rows: Sequence, page: PageParams) -> Tuple[List, Optional[str]]:
+        """Return the rows of the page and the cursor for the next one, if any."""
+        items = list(rows[: page.limit])
+        next_cursor = self.encode(items[-1]) if len(rows) > page.limit else None
+        return items, next_cursor
+
+
+def set_next_cursor(response: Optional[Response], next_cursor: Optional[str]) -> None:
+    """Advertise the next page on the response (a no-op when called directly)."""
+    if response is not None and next_cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
@@ -1,26 +1,48 @@
 """API routes for the DSBP backend."""
 
 import re
-from collections import defaultdict
+from collections import Counter, defaultdict
 from datetime import date, datetime, timedelta
-from typing import Dict, Iterable, List, Optional, Set
+from typing import Annotated, Dict, Iterable, List, Literal, Optional, Set, Tuple, Union
 
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Response, UploadFile, status
 from fastapi.responses import FileResponse
-from sqlalchemy import func, or_
-from sqlalchemy.orm import Session
+from sqlalchemy import Select, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 
 import app.models as models
 import app.schemas as schemas
+from app.api.conditional import IfNoneMatch, etag_matches, make_etag, not_modified, set_etag
+from app.api.filters import TaskFilters, task_filters
+from app.api.pagination import Keyset, PageParams, page_params, set_next_cursor
+from app.core import config
 from app.core.config import FRONTEND_PUBLIC_DIR
-from app.core.database import get_db
-from app.services import auth
+from app.core.database import get_db, get_read_db
+from app.services import activity_rollup, auth, dependency_graph, project_changes, search, status_counts
+from app.services.dependency_maps import (
+    ProjectLayout,
+    build_dependency_map,
+    compact_dependency_map,
+    dependency_map_layout,
+    dependency_maps,
+    layout_positions,
+    merge_dependency_maps,
+    project_map_statements,
+)
 
 router = APIRouter()
 
 # mention pattern for @username for find users
 MENTION_PATTERN = re.compile(r"@(?P<username>[A-Za-z0-9_\.\-]+)")
 
+# Matches Notification.message; PostgreSQL enforces VARCHAR lengths, SQLite does not.
+NOTIFICATION_MESSAGE_MAX_LENGTH = 255
+
+# Set on GET /search responses when some older matches were left unranked.
+SEARCH_TRUNCATED_HEADER = "X-Search-Truncated"
+
 
 def parse_mentions(content: str, db: Session) -> List[models.User]:
     """Extract all mentioned users from the supplied content string."""
@@ -52,7 +74,11 @@ def ensure_project_access(project_id: int, db: Session, user: models.User) -> mo
 
 
 def accessible_projects_filter(user: models.User):
-    """SQLAlchemy filter expression for all projects accessible to a user."""
+    """SQLAlchemy filter expression for all projects accessible to a user.
+
+    Shared-user membership is an EXISTS subquery, so filtering (or joining
+    tasks to projects) with it never multiplies rows and needs no DISTINCT.
+    """
     return or_(
         models.Project.owner_id == user.id,
         models.Project.visibility == "all",
@@ -60,6 +86,140 @@ def accessible_projects_filter(user: models.User):
     )
 
 
+# Loader options for each list serializer. Every relationship the response
+# schema reads is loaded up front so a list costs a fixed number of queries
+# regardless of its length (and so the statements also work on AsyncSession,
+# which cannot lazy-load).
+PROJECT_OUT_LOADERS = (selectinload(models.Project.shared_users),)
+TASK_OUT_LOADERS = (selectinload(models.Task.assignees),)
+NOTIFICATION_OUT_LOADERS = (
+    joinedload(models.Notification.comment).joinedload(models.Comment.task).joinedload(models.Task.project),
+)
+
+
+# Keyset orderings for the paginated list endpoints. Each ends in the primary
+# key so rows sharing a timestamp page deterministically.
+PROJECT_PAGES = Keyset(models.Project.created_at, models.Project.id)
+TASK_PAGES = Keyset(models.Task.created_at, models.Task.id)
+NOTIFICATION_PAGES = Keyset(models.Notification.created_at, models.Notification.id)
+ACTIVITY_PAGES = Keyset(models.TaskActivity.created_at, models.TaskActivity.id)
+COMMENT_THREAD_PAGES = Keyset(models.Comment.created_at, models.Comment.id, descending=False)
+USER_PAGES = Keyset(models.User.username, models.User.id, descending=False)
+# Task lists by their ``sort`` parameter; see ``app.api.filters``.
+TASK_SORTS = {
+    "-created_at": TASK_PAGES,
+    "created_at": Keyset(models.Task.created_at, models.Task.id, descending=False),
+    "due_date": Keyset(models.Task.due_date, models.Task.id, descending=False, nulls_last=True),
+    "-due_date": Keyset(models.Task.due_date, models.Task.id, nulls_last=True),
+}
+
+Page = Annotated[PageParams, Depends(page_params)]
+TaskFilter = Annotated[TaskFilters, Depends(task_filters)]
+
+# ``?format=compact`` on dependency map endpoints; see ``DependencyMapCompactOut``.
+MapFormat = Annotated[Literal["full", "compact"], Query(alias="format")]
+# ``?layout=true`` adds server-computed positions; see ``app.services.graph_layout``.
+MapLayout = Annotated[bool, Query(alias="layout")]
+DependencyMapResponse = Union[schemas.DependencyMapOut, schemas.DependencyMapCompactOut]
+
+
+def render_dependency_map(
+    dependency_map: schemas.DependencyMapOut,
+    map_format: str,
+    positions: Optional[List[schemas.TaskPositionOut]] = None,
+) -> DependencyMapResponse:
+    if positions is not None:
+        dependency_map = dependency_map.model_copy(update={"positions": positions})
+    if map_format == "compact":
+        return compact_dependency_map(dependency_map)
+    return dependency_map
+
+
+def accessible_projects_statement(user: models.User) -> Select:
+    """Projects visible to the user, newest first."""
+    return (
+        select(models.Project)
+        .where(accessible_projects_filter(user))
+        .order_by(models.Project.created_at.desc())
+        .options(*PROJECT_OUT_LOADERS)
+    )
+
+
+def accessible_tasks_statement(user: models.User) -> Select:
+    """Tasks across every project visible to the user, newest first."""
+    return (
+        select(models.Task)
+        .join(models.Project)
+        .where(accessible_projects_filter(user))
+        .order_by(models.Task.created_at.desc())
+        .options(*TASK_OUT_LOADERS)
+    )
+
+
+def notifications_statement(user: models.User) -> Select:
+    """Notifications addressed to the user in reverse chronological order."""
+    return (
+        select(models.Notification)
+        .where(models.Notification.recipient_id == user.id)
+        .order_by(models.Notification.created_at.desc())
+        .options(*NOTIFICATION_OUT_LOADERS)
+    )
+
+
+def dependency_map_versions_statement(user: models.User) -> Select:
+    """(project id, version) of every project feeding the user's dependency map."""
+    return (
+        select(models.Project.id, models.Project.version)
+        .where(accessible_projects_filter(user))
+        .order_by(models.Project.id)
+    )
+
+
+def task_list_etag(project: models.Project, page: PageParams, filters: TaskFilters) -> str:
+    """ETag of one page of a project's task list; each page and filter view has its own."""
+    return make_etag(
+        "tasks",
+        project.id,
+        project.version,
+        page.limit,
+        page.cursor,
+        ",".join(sorted(set(filters.status))),
+        filters.assignee_id,
+        filters.due_before,
+        filters.due_after,
+        filters.created_after,
+        filters.sort,
+    )
+
+
+def dependency_map_etag(user: models.User, versions, map_format: str = "full", with_layout: bool = False) -> str:
+    return make_etag(
+        "dependency-map",
+        map_format,
+        with_layout,
+        user.id,
+        *(f"{project_id}.{version}" for project_id, version in versions),
+    )
+
+
+def bump_project_version(db: Session, project_id: int) -> Optional[int]:
+    """Record that a project's tasks, dependencies, comments or sharing changed.
+
+    The increment runs in SQL inside the caller's transaction, so concurrent
+    writers cannot lose a bump. The new version is recorded so that in-memory
+    caches of the project can follow it once the transaction commits.
+    """
+    version = db.execute(
+        update(models.Project)
+        .where(models.Project.id == project_id)
+        .values(version=models.Project.version + 1, updated_at=datetime.utcnow())
+        .returning(models.Project.version)
+        .execution_options(synchronize_session=False)
+    ).scalar()
+    project_changes.record_version(db, project_id, version)
+    return version
+
+
 def ensure_task_access(task_id: int, db: Session, user: models.User) -> models.Task:
     """Fetch a task and verify the current user is allowed to interact with it."""
     task = db.query(models.Task).filter(models.Task.id == task_id).first()
@@ -70,6 +230,50 @@ def ensure_task_access(task_id: int, db: Session, user: models.User) -> models.T
     return task
 
 
+def load_comment_threads(
+    db: Session, task_id: int, page: PageParams = PageParams()
+) -> Tuple[List[models.Comment], Optional[str]]:
+    """Load one page of top-level comments together with all of their replies.
+
+    Replies of every depth are fetched with a single recursive query and
+    ``replies`` is populated from those rows instead of being lazy-loaded
+    level by level while ``CommentOut`` recurses through the thread. Returns
+    the threads and the cursor for the next page.
+    """
+    roots_query = COMMENT_THREAD_PAGES.apply(
+        db.query(models.Comment)
+        .options(selectinload(models.Comment.author))
+        .filter(models.Comment.task_id == task_id, models.Comment.parent_id.is_(None)),
+        page,
+    )
+    roots, next_cursor = COMMENT_THREAD_PAGES.split(roots_query.all(), page)
+    if not roots:
+        return roots, next_cursor
+
+    thread = (
+        select(models.Comment.id)
+        .where(models.Comment.parent_id.in_([root.id for root in roots]))
+        .cte("thread", recursive=True)
+    )
+    thread = thread.union_all(
+        select(models.Comment.id).join(thread, models.Comment.parent_id == thread.c.id)
+    )
+    descendants = (
+        db.query(models.Comment)
+        .options(selectinload(models.Comment.author))
+        .filter(models.Comment.id.in_(select(thread.c.id)))
+        .order_by(models.Comment.id)
+        .all()
+    )
+
+    replies: Dict[int, List[models.Comment]] = defaultdict(list)
+    for comment in descendants:
+        replies[comment.parent_id].append(comment)
+    for comment in [*roots, *descendants]:
+        set_committed_value(comment, "replies", replies.get(comment.id, []))
+    return roots, next_cursor
+
+
 def apply_project_visibility(
     project: models.Project, visibility: str, shared_usernames: Optional[Iterable[str]], db: Session
 ) -> None:
@@ -127,18 +331,28 @@ def log_task_activity(
 
 @router.post("/auth/register", response_model=schemas.UserOut, status_code=status.HTTP_201_CREATED)
 def register(user_in: schemas.UserCreate, db: Session = Depends(get_db)):
-    """Create a new user after confirming username and email uniqueness. Automatically generates a unique permanent license."""
+    """Create a new user after confirming username and email uniqueness. Automatically generates a unique permanent license.
+
+    The connection is returned to the pool while the password is hashed, so
+    the writer is only held for the checks and the inserts.
+    """
     if db.query(models.User).filter(models.User.username == user_in.username).first():
         raise HTTPException(status_code=400, detail="Username already registered")
     if db.query(models.User).filter(models.User.email == user_in.email).first():
         raise HTTPException(status_code=400, detail="Email already registered")
+    db.rollback()
     user = models.User(
         username=user_in.username,
         email=user_in.email,
         hashed_password=auth.get_password_hash(user_in.password),
     )
     db.add(user)
-    db.flush()  # Flush to get user.id
+    try:
+        db.flush()  # Flush to get user.id
+    except IntegrityError as exc:
+        # A concurrent registration took the name while the password was hashed.
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Username or email already registered") from exc
     
     # Automatically generate a unique permanent license for the user
     from app.services import license as license_service
@@ -179,14 +393,33 @@ def register(user_in: schemas.UserCreate, db: Session = Depends(get_db)):
 
 @router.post("/auth/login", response_model=schemas.Token)
 def login(credentials: schemas.UserLogin, db: Session = Depends(get_db)):
-    """Authenticate a user and return a freshly minted access token."""
+    """Authenticate a user and return a freshly minted access token.
+
+    The lookup's transaction ends before the password is checked, so no
+    connection is held while the hash runs.
+    """
     user = db.query(models.User).filter(models.User.username == credentials.username).first()
-    if not user or not auth.verify_password(credentials.password, user.hashed_password):
+    if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
-    access_token = auth.create_access_token(data={"sub": user.username}, expires_delta=timedelta(minutes=auth.ACCESS_TOKEN_EXPIRE_MINUTES))
+    hashed_password = user.hashed_password
+    db.rollback()
+    valid, new_hash = auth.verify_and_update_password(credentials.password, hashed_password)
+    if not valid:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+    if new_hash is not None:
+        # The configured work factor changed since this hash was made.
+        user.hashed_password = new_hash
+        db.commit()
+    access_token = auth.create_user_access_token(user, expires_delta=timedelta(minutes=auth.ACCESS_TOKEN_EXPIRE_MINUTES))
     return schemas.Token(access_token=access_token)
 
 
+@router.post("/auth/logout-all", status_code=status.HTTP_204_NO_CONTENT)
+def logout_everywhere(current_user: models.User = Depends(auth.get_current_user)):
+    """Revoke every access token issued to the current user, including this one."""
+    auth.revoke_user_tokens(current_user.id)
+
+
 # --- User endpoints -----------------------------------------------------------
 
 @router.get("/users/me", response_model=schemas.UserOut)
@@ -196,34 +429,39 @@ def read_current_user(current_user: models.User = Depends(auth.get_licensed_user
 
 
 @router.get("/users", response_model=List[schemas.UserOut])
-def list_users(db: Session = Depends(get_db), current_user: models.User = Depends(auth.get_licensed_user)):
-    """List all registered users, ordered alphabetically."""
-    return (
-        db.query(models.User)
-        .order_by(models.User.username.asc())
-        .all()
-    )
+def list_users(
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(auth.get_licensed_user),
+    page: Page = PageParams(),
+    response: Response = None,
+):
+    """List registered users, ordered alphabetically, one page at a time."""
+    rows = USER_PAGES.apply(db.query(models.User), page).all()
+    users, next_cursor = USER_PAGES.split(rows, page)
+    set_next_cursor(response, next_cursor)
+    return users
 
 
 # --- Project endpoints --------------------------------------------------------
 
 @router.get("/projects", response_model=List[schemas.ProjectOut])
-def list_projects(db: Session = Depends(get_db), current_user: models.User = Depends(auth.get_licensed_user)):
-    """Return the projects visible to the current user."""
-    projects = (
-        db.query(models.Project)
-        .filter(accessible_projects_filter(current_user))
-        .distinct()
-        .order_by(models.Project.created_at.desc())
-        .all()
-    )
+def list_projects(
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(auth.get_licensed_user),
+    page: Page = PageParams(),
+    response: Response = None,
+):
+    """Return a page of the projects visible to the current user, newest first."""
+    statement = PROJECT_PAGES.apply(accessible_projects_statement(current_user), page)
+    projects, next_cursor = PROJECT_PAGES.split(db.execute(statement).scalars().all(), page)
+    set_next_cursor(response, next_cursor)
     return projects
 
 
 @router.get("/projects/{project_id}/members", response_model=List[schemas.UserOut])
 def get_project_members(
     project_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(auth.get_licensed_user),
 ):
     """Get all members who can access a project for @mentions."""
@@ -253,28 +491,24 @@ def get_project_members(
 @router.get("/projects/{project_id}/dashboard", response_model=schemas.ProjectDashboardOut)
 def project_dashboard_summary(
     project_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(auth.get_licensed_user),
+    if_none_match: IfNoneMatch = None,
+    response: Response = None,
 ):
     """Provide aggregate task counts for the dashboard donut chart."""
     project = ensure_project_access(project_id, db, current_user)
+    etag = make_etag("dashboard", project.id, project.version)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
 
-    status_counts: Dict[str, int] = {}
-    results = (
-        db.query(models.Task.status, func.count(models.Task.id))
-        .filter(models.Task.project_id == project.id)
-        .group_by(models.Task.status)
-        .all()
-    )
-    for status, count in results:
-        status_counts[status or "unknown"] = count
-
-    total_tasks = sum(status_counts.values())
+    counts = status_counts.project_counts(db, project.id)
+    set_etag(response, etag)
     return schemas.ProjectDashboardOut(
         project_id=project.id,
-        total_tasks=total_tasks,
-        status_counts=status_counts,
-        updated_at=datetime.utcnow(),
+        total_tasks=sum(counts.values()),
+        status_counts=counts,
+        updated_at=project.updated_at or project.created_at,
     )
 
 
@@ -335,6 +569,7 @@ def update_project(
     if "visibility" in update_data or shared_usernames is not None:
         apply_project_visibility(project, project.visibility, shared_usernames, db)
 
+    bump_project_version(db, project.id)
     db.commit()
     db.refresh(project)
     return project
@@ -355,12 +590,27 @@ def delete_project(project_id: int, db: Session = Depends(get_db), current_user:
 @router.get("/projects/{project_id}/tasks", response_model=List[schemas.TaskOut])
 def list_tasks(
     project_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(auth.get_licensed_user),
+    page: Page = PageParams(),
+    filters: TaskFilter = TaskFilters(),
+    if_none_match: IfNoneMatch = None,
+    response: Response = None,
 ):
-    """List all tasks for a project, enforcing project access control."""
+    """List a page of a project's matching tasks, newest first by default, enforcing access control."""
     project = ensure_project_access(project_id, db, current_user)
-    return db.query(models.Task).filter(models.Task.project_id == project.id).all()
+    etag = task_list_etag(project, page, filters)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    task_pages = TASK_SORTS[filters.sort]
+    query = task_pages.apply(
+        filters.apply(db.query(models.Task).options(*TASK_OUT_LOADERS).filter(models.Task.project_id == project.id)),
+        page,
+    )
+    tasks, next_cursor = task_pages.split(query.all(), page)
+    set_next_cursor(response, next_cursor)
+    set_etag(response, etag)
+    return tasks
 
 
 @router.get("/projects/{project_id}/task-history", response_model=schemas.TaskHistoryResponse)
@@ -369,10 +619,15 @@ def task_history(
     date_filter: Optional[date] = None,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(auth.get_licensed_user),
+    page: Page = PageParams(),
 ):
-    """Return task creation/deletion history for the authenticated user."""
+    """Return task creation/deletion history for the authenticated user.
+
+    Activities are paginated newest first; ``daily_counts`` always covers the
+    whole date range, read from the daily roll-up for days that are over.
+    """
     project = ensure_project_access(project_id, db, current_user)
 
     if date_filter:
@@ -391,43 +646,35 @@ def task_history(
     start_dt = datetime.combine(start_date, datetime.min.time())
     end_dt = datetime.combine(end_date, datetime.max.time())
 
-    activities = (
-        db.query(models.TaskActivity)
-        .filter(
-            models.TaskActivity.project_id == project.id,
-            models.TaskActivity.user_id == current_user.id,
-            models.TaskActivity.created_at >= start_dt,
-            models.TaskActivity.created_at <= end_dt,
-        )
-        .order_by(models.TaskActivity.created_at.desc())
-        .all()
+    in_range = (
+        models.TaskActivity.project_id == project.id,
+        models.TaskActivity.user_id == current_user.id,
+        models.TaskActivity.created_at >= start_dt,
+        models.TaskActivity.created_at <= end_dt,
     )
-
-    daily_counts: Dict[str, int] = defaultdict(int)
-    for activity in activities:
-        key = activity.created_at.strftime("%Y-%m-%d")
-        daily_counts[key] += 1
+    query = ACTIVITY_PAGES.apply(db.query(models.TaskActivity).filter(*in_range), page)
+    activities, next_cursor = ACTIVITY_PAGES.split(query.all(), page)
 
     return schemas.TaskHistoryResponse(
         activities=activities,
-        daily_counts=dict(daily_counts),
+        daily_counts=activity_rollup.daily_counts(db, project.id, current_user.id, start_dt, end_dt),
+        next_cursor=next_cursor,
     )
 
 
 @router.get("/tasks", response_model=List[schemas.TaskOut])
 def list_all_accessible_tasks(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(auth.get_licensed_user),
+    page: Page = PageParams(),
+    filters: TaskFilter = TaskFilters(),
+    response: Response = None,
 ):
-    """Return every task across projects the user is allowed to see."""
-    tasks = (
-        db.query(models.Task)
-        .join(models.Project)
-        .filter(accessible_projects_filter(current_user))
-        .distinct()
-        .order_by(models.Task.created_at.desc())
-        .all()
-    )
+    """Return a page of the tasks across projects the user is allowed to see."""
+    task_pages = TASK_SORTS[filters.sort]
+    statement = task_pages.apply(filters.apply(accessible_tasks_statement(current_user)), page)
+    tasks, next_cursor = task_pages.split(db.execute(statement).scalars().all(), page)
+    set_next_cursor(response, next_cursor)
     return tasks
 
 
@@ -462,6 +709,8 @@ def create_task(
         action="created",
         status=task.status,
     )
+    status_counts.adjust(db, {(project.id, task.status): 1})
+    bump_project_version(db, project.id)
     db.commit()
     db.refresh(task)
     return task
@@ -498,7 +747,9 @@ def update_task(
             action="status_changed",
             status=task.status,
         )
+        status_counts.adjust(db, {(task.project_id, original_status): -1, (task.project_id, task.status): 1})
 
+    bump_project_version(db, task.project_id)
     db.commit()
     db.refresh(task)
     return task
@@ -520,137 +771,155 @@ def delete_task(
         action="deleted",
         status=task.status,
     )
+    status_counts.adjust(db, {(task.project_id, task.status): -1})
+    bump_project_version(db, task.project_id)
     db.delete(task)
     db.commit()
 
 
-def _dependency_summary(task: models.Task) -> schemas.TaskSummary:
-    """Build a display-friendly summary object for the provided task."""
-    project_name = task.project.name if task.project else "Unknown"
-    return schemas.TaskSummary(
-        id=task.id,
-        title=task.title,
-        project_id=task.project_id,
-        project_name=project_name,
-    )
-
+# Loaded with every task a batch touches: the assignees it returns or replaces,
+# and the rows a delete cascades to, so no operation lazy-loads on its own.
+TASK_BATCH_LOADERS = (
+    selectinload(models.Task.assignees),
+    selectinload(models.Task.comments).selectinload(models.Comment.notifications),
+    selectinload(models.Task.comments).selectinload(models.Comment.replies),
+    selectinload(models.Task.dependencies),
+    selectinload(models.Task.dependents),
+)
 
-def _build_dependency_map(tasks: List[models.Task], dependencies: List[models.TaskDependency]):
-    """Assemble nodes, edges, linear chains, and convergences for the graph view."""
-    summaries: Dict[int, schemas.TaskSummary] = {task.id: _dependency_summary(task) for task in tasks}
-    indegree: Dict[int, int] = {task.id: 0 for task in tasks}
-    outdegree: Dict[int, int] = {task.id: 0 for task in tasks}
-    adjacency: Dict[int, List[int]] = {task.id: [] for task in tasks}
-    reverse_adj: Dict[int, List[int]] = {task.id: [] for task in tasks}
-    edges: List[schemas.DependencyEdgeOut] = []
 
-    for dep in dependencies:
-        if dep.depends_on_task_id not in summaries or dep.dependent_task_id not in summaries:
-            continue
-        # Prevent adding duplicate edges if data is dirty, though DB constraint should handle this
-        if dep.dependent_task_id not in adjacency[dep.depends_on_task_id]:
-            adjacency[dep.depends_on_task_id].append(dep.dependent_task_id)
-            reverse_adj[dep.dependent_task_id].append(dep.depends_on_task_id)
-            outdegree[dep.depends_on_task_id] += 1
-            indegree[dep.dependent_task_id] += 1
-            
-        edges.append(
-            schemas.DependencyEdgeOut(
-                id=dep.id,
-                depends_on=summaries[dep.depends_on_task_id],
-                dependent=summaries[dep.dependent_task_id],
-            )
+@router.post("/tasks/batch", response_model=schemas.TaskBatchOut)
+def batch_tasks(
+    batch: schemas.TaskBatchRequest,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_licensed_user),
+):
+    """Apply many task creates, updates and deletes in one transaction.
+
+    Each operation is validated like its single-task endpoint; a rejected one
+    gets an ``error`` and the rest still apply. Tasks, projects and assignees
+    are each loaded with one query for the whole batch, activity rows are
+    inserted together, and the changes are committed once.
+    """
+    operations = batch.operations
+    task_ids = {operation.task_id for operation in operations if operation.op != "create"}
+    tasks: Dict[int, models.Task] = {}
+    if task_ids:
+        tasks = {
+            task.id: task
+            for task in db.execute(
+                select(models.Task).where(models.Task.id.in_(task_ids)).options(*TASK_BATCH_LOADERS)
+            ).scalars()
+        }
+    project_ids = {task.project_id for task in tasks.values()}
+    project_ids |= {operation.project_id for operation in operations if operation.op == "create"}
+    projects: Dict[int, Tuple[models.Project, bool]] = {
+        project.id: (project, accessible)
+        for project, accessible in db.execute(
+            select(models.Project, accessible_projects_filter(current_user)).where(models.Project.id.in_(project_ids))
         )
-
-    # --- START: FIXED CHAIN-FINDING LOGIC ---
-    
-    chains: List[schemas.DependencyChainOut] = []
-    visited_nodes: Set[int] = set()  # Tracks nodes *already part of a chain*
-
-    for task in tasks:
-        task_id = task.id
-        if task_id in visited_nodes:
-            continue  # This node is already part of a chain we found
-
-        # A "chain head" is a node that is NOT a "middle" link.
-        # A "middle" link is: indegree == 1 AND its predecessor also has outdegree == 1
-        is_middle_link = False
-        if indegree.get(task_id, 0) == 1:
-            predecessor_id = reverse_adj[task_id][0]
-            if outdegree.get(predecessor_id, 0) == 1:
-                is_middle_link = True
-
-        # We only start tracing from a "true" head, not a middle link.
-        # We also must have an outdegree of 1 to start a chain.
-        if not is_middle_link and outdegree.get(task_id, 0) == 1:
-            chain_ids = [task_id]
-            visited_nodes.add(task_id)
-            current = task_id
-
-            # Start tracing the chain
-            while outdegree.get(current, 0) == 1:
-                nxt = adjacency[current][0]
-                
-                # The chain continues *only if* the next node is also a linear link
-                if indegree.get(nxt, 0) == 1:
-                    if nxt in chain_ids:
-                         break # Cycle detected, though your create endpoint should prevent this
-                    chain_ids.append(nxt)
-                    visited_nodes.add(nxt)
-                    current = nxt
-                else:
-                    # Next node is a convergence (indegree > 1) or end (indegree = 0, impossible)
-                    # so the linear chain ends here.
-                    break 
-
-            if len(chain_ids) > 1:
-                chains.append(
-                    schemas.DependencyChainOut(tasks=[summaries[node_id] for node_id in chain_ids])
-                )
-    
-    # --- END: FIXED CHAIN-FINDING LOGIC ---
-
-    # Your convergence logic was already correct and requires no changes.
-    convergences: List[schemas.DependencyConvergenceOut] = []
-    for task in tasks:
-        task_id = task.id
-        sources = reverse_adj.get(task_id, [])
-        if len(sources) > 1:
-            convergences.append(
-                schemas.DependencyConvergenceOut(
-                    target=summaries[task_id],
-                    sources=[summaries[source_id] for source_id in sources],
-                )
+    }
+    assignee_ids = {
+        user_id for operation in operations if operation.op != "delete" for user_id in operation.assignee_ids or ()
+    }
+    users: Dict[int, models.User] = {}
+    if assignee_ids:
+        users = {user.id: user for user in db.query(models.User).filter(models.User.id.in_(assignee_ids))}
+
+    results: List[schemas.TaskBatchResult] = []
+    applied: List[Tuple[schemas.TaskBatchResult, models.Task]] = []
+    activities: List[dict] = []
+    deleted: List[models.Task] = []
+    touched: Set[int] = set()
+    count_changes: Counter = Counter()
+
+    def activity(task: models.Task, action: str) -> None:
+        # Filled in once the flush has given new tasks their ids.
+        activities.append({"task": task, "action": action, "status": task.status})
+
+    for index, operation in enumerate(operations):
+        result = schemas.TaskBatchResult(index=index, op=operation.op, task_id=getattr(operation, "task_id", None))
+        results.append(result)
+        if operation.op == "create":
+            project, accessible = projects.get(operation.project_id, (None, False))
+            if project is None:
+                result.error = "Project not found"
+                continue
+            if not accessible:
+                result.error = "Not allowed to access this project"
+                continue
+            task = models.Task(
+                title=operation.title,
+                description=operation.description,
+                status=operation.status,
+                project_id=project.id,
+                due_date=operation.due_date,
+                assignees=[users[user_id] for user_id in dict.fromkeys(operation.assignee_ids) if user_id in users],
             )
+            db.add(task)
+            activity(task, "created")
+            count_changes[task.project_id, task.status] += 1
+        else:
+            task = tasks.get(operation.task_id)
+            if task is None:
+                result.error = "Task not found"
+                continue
+            if not projects[task.project_id][1]:
+                result.error = "Not allowed to access this task"
+                continue
+            if operation.op == "delete":
+                activity(task, "deleted")
+                count_changes[task.project_id, task.status] -= 1
+                deleted.append(task)
+                # Later operations on the same task find it gone.
+                del tasks[task.id]
+            else:
+                original_status = task.status
+                update_data = operation.model_dump(exclude_unset=True, exclude={"op", "task_id"})
+                update_assignees = update_data.pop("assignee_ids", None)
+                for field, value in update_data.items():
+                    setattr(task, field, value)
+                if update_assignees is not None:
+                    task.assignees = [users[user_id] for user_id in dict.fromkeys(update_assignees) if user_id in users]
+                if "status" in update_data and task.status != original_status:
+                    activity(task, "status_changed")
+                    count_changes[task.project_id, original_status] -= 1
+                    count_changes[task.project_id, task.status] += 1
+        touched.add(task.project_id)
+        applied.append((result, task))
+
+    if not applied:
+        return schemas.TaskBatchOut(results=results)
 
-    return schemas.DependencyMapOut(
-        tasks=list(summaries.values()),
-        edges=edges,
-        chains=chains,
-        convergences=convergences,
-    )
-
-
-def _creates_dependency_cycle(
-    db: Session, depends_on_task_id: int, dependent_task_id: int
-) -> bool:
-    """Depth-first search to ensure new dependency edges do not form a cycle."""
-    stack = [dependent_task_id]
-    visited: Set[int] = set()
-    while stack:
-        current = stack.pop()
-        if current == depends_on_task_id:
-            return True
-        if current in visited:
-            continue
-        visited.add(current)
-        next_tasks = (
-            db.query(models.TaskDependency.dependent_task_id)
-            .filter(models.TaskDependency.depends_on_task_id == current)
-            .all()
+    db.flush()
+    if activities:
+        db.execute(
+            insert(models.TaskActivity),
+            [
+                {
+                    "user_id": current_user.id,
+                    "project_id": entry["task"].project_id,
+                    "task_id": entry["task"].id,
+                    "task_title": entry["task"].title,
+                    "status": entry["status"],
+                    "action": entry["action"],
+                }
+                for entry in activities
+            ],
         )
-        stack.extend(dep_id for (dep_id,) in next_tasks)
-    return False
+    # Serialised before the commit expires the tasks, which would reload each one.
+    deleted_ids = {id(task) for task in deleted}
+    for result, task in applied:
+        result.task_id = task.id
+        if id(task) not in deleted_ids:
+            result.task = schemas.TaskOut.model_validate(task)
+    for task in deleted:
+        db.delete(task)
+    status_counts.adjust(db, count_changes)
+    for project_id in sorted(touched):
+        bump_project_version(db, project_id)
+    db.commit()
+    return schemas.TaskBatchOut(results=results)
 
 
 # --- Dependency graph endpoints ----------------------------------------------
@@ -685,7 +954,7 @@ def create_task_dependency(
     if existing:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Dependency already exists")
 
-    if _creates_dependency_cycle(db, depends_on_task.id, dependent_task.id):
+    if dependency_graph.creates_cycle(db, dependent_task.project_id, depends_on_task.id, dependent_task.id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Dependency would create a cycle")
 
     dependency = models.TaskDependency(
@@ -693,11 +962,115 @@ def create_task_dependency(
         depends_on_task_id=depends_on_task.id,
     )
     db.add(dependency)
-    db.commit()
+    bump_project_version(db, dependent_task.project_id)
+    try:
+        db.commit()
+    except IntegrityError as exc:
+        # A concurrent request inserted the same edge after the check above.
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Dependency already exists") from exc
     db.refresh(dependency)
     return dependency
 
 
+@router.post("/task-dependencies/batch", response_model=schemas.TaskDependencyBatchOut)
+def create_task_dependencies(
+    batch: schemas.TaskDependencyBatchCreate,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_licensed_user),
+):
+    """Create many dependency edges in one transaction, reporting an error per rejected edge.
+
+    Edges are validated like ``POST /task-dependencies``, but access to every
+    referenced task is checked in one query, and acyclicity with a single
+    topological sort over the existing and new edges of the touched projects.
+    """
+    requested = batch.dependencies
+    task_ids = {edge.dependent_task_id for edge in requested} | {edge.depends_on_task_id for edge in requested}
+    tasks: Dict[int, Tuple[models.Task, bool]] = {
+        task.id: (task, accessible)
+        for task, accessible in db.execute(
+            select(models.Task, accessible_projects_filter(current_user))
+            .join(models.Project)
+            .where(models.Task.id.in_(task_ids))
+        )
+    }
+
+    def task_error(task_id: int) -> Optional[str]:
+        if task_id not in tasks:
+            return "Task not found"
+        if not tasks[task_id][1]:
+            return "Not allowed to access this task"
+        return None
+
+    results = [
+        schemas.TaskDependencyBatchResult(
+            index=index, dependent_task_id=edge.dependent_task_id, depends_on_task_id=edge.depends_on_task_id
+        )
+        for index, edge in enumerate(requested)
+    ]
+    for result in results:
+        result.error = task_error(result.dependent_task_id) or task_error(result.depends_on_task_id)
+        if result.error:
+            continue
+        if tasks[result.dependent_task_id][0].project_id != tasks[result.depends_on_task_id][0].project_id:
+            result.error = "Tasks must belong to the same project"
+        elif result.dependent_task_id == result.depends_on_task_id:
+            result.error = "Task cannot depend on itself"
+
+    candidates = [result for result in results if result.error is None]
+    project_ids = {tasks[result.dependent_task_id][0].project_id for result in candidates}
+    existing = {tuple(row) for row in db.execute(dependency_graph.projects_edges_statement(project_ids))}
+    additions: List[schemas.TaskDependencyBatchResult] = []
+    for result in candidates:
+        edge = (result.depends_on_task_id, result.dependent_task_id)
+        if edge in existing:
+            result.error = "Dependency already exists"
+        else:
+            existing.add(edge)
+            additions.append(result)
+
+    edges = [(result.depends_on_task_id, result.dependent_task_id) for result in additions]
+    existing.difference_update(edges)
+    for index in dependency_graph.cyclic_additions(existing, edges):
+        additions[index].error = "Dependency would create a cycle"
+    additions = [result for result in additions if result.error is None]
+    if not additions:
+        return schemas.TaskDependencyBatchOut(created=0, results=results)
+
+    # One multi-row INSERT; the ORM would insert row by row to match up the
+    # generated ids, so the rows come back with their edge instead.
+    try:
+        rows = db.execute(
+            insert(models.TaskDependency).returning(
+                models.TaskDependency.id,
+                models.TaskDependency.depends_on_task_id,
+                models.TaskDependency.dependent_task_id,
+            ),
+            [
+                {"dependent_task_id": result.dependent_task_id, "depends_on_task_id": result.depends_on_task_id}
+                for result in additions
+            ],
+        ).all()
+        by_project: Dict[int, List[project_changes.Operation]] = {}
+        for dependency_id, depends_on_task_id, dependent_task_id in rows:
+            project_id = tasks[dependent_task_id][0].project_id
+            operation = ("add_edge", dependency_id, depends_on_task_id, dependent_task_id)
+            by_project.setdefault(project_id, []).append(operation)
+        for project_id in sorted(by_project):
+            bump_project_version(db, project_id)
+            project_changes.record_operations(db, project_id, by_project[project_id])
+        db.commit()
+    except IntegrityError as exc:
+        # A concurrent request inserted one of the edges after the check above.
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Dependency already exists") from exc
+    ids = {(depends_on_id, dependent_id): dependency_id for dependency_id, depends_on_id, dependent_id in rows}
+    for result in additions:
+        result.id = ids[(result.depends_on_task_id, result.dependent_task_id)]
+    return schemas.TaskDependencyBatchOut(created=len(additions), results=results)
+
+
 @router.delete("/task-dependencies/{dependency_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_task_dependency(
     dependency_id: int,
@@ -709,37 +1082,114 @@ def delete_task_dependency(
     if not dependency:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Dependency not found")
 
-    ensure_task_access(dependency.dependent_task_id, db, current_user)
+    dependent_task = ensure_task_access(dependency.dependent_task_id, db, current_user)
     ensure_task_access(dependency.depends_on_task_id, db, current_user)
 
+    bump_project_version(db, dependent_task.project_id)
     db.delete(dependency)
     db.commit()
 
 
-@router.get("/dependency-map", response_model=schemas.DependencyMapOut)
+@router.get("/dependency-map", response_model=DependencyMapResponse, response_model_exclude_none=True)
 def dependency_map(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(auth.get_licensed_user),
+    if_none_match: IfNoneMatch = None,
+    response: Response = None,
+    map_format: MapFormat = "full",
+    with_layout: MapLayout = False,
 ):
     """Return the dependency graph focused on tasks accessible to the user."""
-    tasks = (
-        db.query(models.Task)
-        .join(models.Project)
-        .filter(accessible_projects_filter(current_user))
-        .distinct()
-        .all()
-    )
-    if not tasks:
-        return schemas.DependencyMapOut(tasks=[], edges=[], chains=[], convergences=[])
+    versions = db.execute(dependency_map_versions_statement(current_user)).all()
+    etag = dependency_map_etag(current_user, versions, map_format, with_layout)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+
+    layouts: Optional[Dict[int, ProjectLayout]] = {} if with_layout else None
+    maps, stale = dependency_maps.lookup(versions, layouts)
+    if stale:
+        tasks_stmt, dependencies_stmt = project_map_statements(stale)
+        maps.update(
+            dependency_maps.load(stale, db.execute(tasks_stmt).all(), db.execute(dependencies_stmt).all(), layouts)
+        )
+    positions = layout_positions(layouts[project_id] for project_id, _ in versions) if with_layout else None
+    merged = merge_dependency_maps(maps[project_id] for project_id, _ in versions)
+    return render_dependency_map(merged, map_format, positions)
 
-    dependencies = (
-        db.query(models.TaskDependency)
-        .join(models.Task, models.TaskDependency.dependent_task)
-        .join(models.Project)
-        .filter(accessible_projects_filter(current_user))
-        .all()
-    )
-    return _build_dependency_map(tasks, dependencies)
+
+@router.get("/tasks/{task_id}/dependency-graph", response_model=DependencyMapResponse, response_model_exclude_none=True)
+def task_dependency_graph(
+    task_id: int,
+    direction: Annotated[Literal["up", "down", "both"], Query()] = "both",
+    depth: Annotated[int, Query(ge=1, le=config.DEPENDENCY_GRAPH_MAX_DEPTH)] = config.DEPENDENCY_GRAPH_DEFAULT_DEPTH,
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(auth.get_licensed_user),
+    if_none_match: IfNoneMatch = None,
+    response: Response = None,
+    map_format: MapFormat = "full",
+    with_layout: MapLayout = False,
+):
+    """Return a task's blockers (up) and/or dependents (down) up to ``depth`` edges away."""
+    task = ensure_task_access(task_id, db, current_user)
+    etag = make_etag("task-graph", map_format, with_layout, task.id, direction, depth, task.project.version)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+
+    task_ids, edges = dependency_graph.neighbourhood(db, task.id, direction, depth)
+    summaries = [
+        schemas.TaskSummary(id=id_, title=title, project_id=project_id, project_name=project_name)
+        for id_, title, project_id, project_name in db.execute(
+            select(models.Task.id, models.Task.title, models.Task.project_id, models.Project.name)
+            .join(models.Project)
+            .where(models.Task.id.in_(task_ids))
+            .order_by(models.Task.id)
+        )
+    ]
+    dependency_map = build_dependency_map(summaries, [edges[edge_id] for edge_id in sorted(edges)])
+    positions = dependency_map_layout(dependency_map) if with_layout else None
+    return render_dependency_map(dependency_map, map_format, positions)
+
+
+# --- Search endpoints ---------------------------------------------------------
+
+@router.get("/search", response_model=List[schemas.SearchHitOut])
+def search_tasks(
+    q: Annotated[str, Query(min_length=1, max_length=200)],
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(auth.get_licensed_user),
+    page: Page = PageParams(),
+    response: Response = None,
+):
+    """Return a page of tasks and comments matching ``q``, best matches first.
+
+    Only the newest ``SEARCH_RANKED_MATCHES`` task and comment matches are
+    ranked; when there were more, every page carries ``X-Search-Truncated``.
+    """
+    dialect_name = db.get_bind().dialect.name
+    access = accessible_projects_filter(current_user)
+    found = search.search_statement(dialect_name, q, access)
+    if found is None:
+        return []
+    statement, hit_pages = found
+    hits, next_cursor = hit_pages.split(db.execute(hit_pages.apply(statement, page)).all(), page)
+    snippets = search.page_snippets(db, q, hits)
+    set_next_cursor(response, next_cursor)
+    if db.execute(search.truncated_statement(dialect_name, q, access)).scalar():
+        response.headers[SEARCH_TRUNCATED_HEADER] = "true"
+    return [
+        schemas.SearchHitOut(
+            kind=hit.kind,
+            id=hit.id,
+            task_id=hit.task_id,
+            task_title=hit.task_title,
+            project_id=hit.project_id,
+            project_name=hit.project_name,
+            snippet=snippets.get((hit.kind, hit.id), ""),
+        )
+        for hit in hits
+    ]
 
 
 # --- Comment and notification endpoints --------------------------------------
@@ -747,21 +1197,20 @@ def dependency_map(
 @router.get("/tasks/{task_id}/comments", response_model=List[schemas.CommentOut])
 def list_comments(
     task_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(auth.get_licensed_user),
+    page: Page = PageParams(),
+    response: Response = None,
 ):
-    """Return the top-level comments for a task the user can access."""
+    """Return a page of comment threads for a task the user can access, oldest first."""
     task = db.query(models.Task).filter(models.Task.id == task_id).first()
     if not task:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
     if not user_can_access_project(task.project, current_user):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not allowed to access comments for this task")
-    comments = (
-        db.query(models.Comment)
-        .filter(models.Comment.task_id == task_id, models.Comment.parent_id.is_(None))
-        .all()
-    )
-    return comments
+    threads, next_cursor = load_comment_threads(db, task_id, page)
+    set_next_cursor(response, next_cursor)
+    return threads
 
 
 @router.post("/comments", response_model=schemas.CommentOut, status_code=status.HTTP_201_CREATED)
@@ -788,6 +1237,7 @@ def create_comment(
         parent_id=parent.id if parent else None,
     )
     db.add(comment)
+    bump_project_version(db, task.project_id)
     db.commit()
     db.refresh(comment)
 
@@ -804,10 +1254,11 @@ def create_comment(
         if task:
             location_bits.append(f"task '{task.title}'")
         location = " in " + ", ".join(location_bits) if location_bits else ""
+        message = f"{current_user.username} mentioned you{location}"
         notification = models.Notification(
             recipient_id=user.id,
             comment_id=comment.id,
-            message=f"{current_user.username} mentioned you{location}",
+            message=message[:NOTIFICATION_MESSAGE_MAX_LENGTH],
         )
         db.add(notification)
     db.commit()
@@ -842,20 +1293,23 @@ def solve_comment(comment_id: int, db: Session = Depends(get_db), current_user:
     comment.solved = True
     for notification in comment.notifications:
         notification.read = True
+    bump_project_version(db, project.id)
     db.commit()
     db.refresh(comment)
     return comment
 
 
 @router.get("/notifications", response_model=List[schemas.NotificationOut])
-def list_notifications(db: Session = Depends(get_db), current_user: models.User = Depends(auth.get_licensed_user)):
-    """List notifications for the current user in reverse chronological order."""
-    notifications = (
-        db.query(models.Notification)
-        .filter(models.Notification.recipient_id == current_user.id)
-        .order_by(models.Notification.created_at.desc())
-        .all()
-    )
+def list_notifications(
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(auth.get_licensed_user),
+    page: Page = PageParams(),
+    response: Response = None,
+):
+    """List a page of the current user's notifications, newest first."""
+    statement = NOTIFICATION_PAGES.apply(notifications_statement(current_user), page)
+    notifications, next_cursor = NOTIFICATION_PAGES.split(db.execute(statement).scalars().all(), page)
+    set_next_cursor(response, next_cursor)
     return notifications
 
 
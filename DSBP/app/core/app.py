@@ -1,19 +1,51 @@
 """FastAPI application factory."""
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
 from app.api.routes import router
-from app.core import config
-from app.core.database import Base, engine
+from app.core import config, database, instrumentation, metrics
+from app.core.database import Base
+from app.services import activity_rollup
+from app.services.hashing import hashing_executor
+
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    if app.state.collect_metrics:
+        metrics.registry.start_snapshots()
+    yield
+    if app.state.collect_metrics:
+        metrics.registry.stop_snapshots()
+    hashing_executor.shutdown()
+    # Pooled aiosqlite connections each own a worker thread; close them so
+    # the process can exit.
+    await database.async_engine.dispose()
+
 
+def create_app(
+    async_db: bool = config.ASYNC_DATABASE_ENABLED,
+    instrument_sql: bool = config.SQL_INSTRUMENTATION_ENABLED,
+    collect_metrics: bool = config.METRICS_ENABLED,
+) -> FastAPI:
+    """Create and configure the FastAPI application instance.
 
-def create_app() -> FastAPI:
-    """Create and configure the FastAPI application instance."""
-    Base.metadata.create_all(bind=engine)
+    With ``async_db`` enabled the async read handlers are registered ahead of
+    the sync router so they take precedence for the paths they cover.
+    ``instrument_sql`` adds per-request SQL statement counters and
+    ``collect_metrics`` serves Prometheus metrics at ``/metrics``.
+    """
+    Base.metadata.create_all(bind=database.engine)
+    database.create_missing_columns(database.engine)
+    database.create_missing_indexes(database.engine)
+    with database.engine.begin() as connection:
+        activity_rollup.roll_up(connection)
 
-    app = FastAPI(title=config.APP_TITLE)
+    app = FastAPI(title=config.APP_TITLE, lifespan=_lifespan)
+    app.state.collect_metrics = collect_metrics
 
     app.add_middleware(
         CORSMiddleware,
@@ -21,8 +53,24 @@ def create_app() -> FastAPI:
         allow_credentials=config.CORS_ALLOW_CREDENTIALS,
         allow_methods=config.CORS_ALLOW_METHODS,
         allow_headers=config.CORS_ALLOW_HEADERS,
+        expose_headers=config.CORS_EXPOSE_HEADERS,
     )
 
+    if instrument_sql:
+        instrumentation.install_engine_hooks()
+        app.add_middleware(instrumentation.QueryInstrumentationMiddleware)
+        app.add_api_route("/debug/sql-report", instrumentation.sql_report, methods=["GET"], include_in_schema=False)
+
+    if collect_metrics:
+        metrics.watch_pool("primary", database.engine)
+        if database.read_engine is not database.engine:
+            metrics.watch_pool("read", database.read_engine)
+        if async_db:
+            metrics.watch_pool("async", database.async_engine)
+        # Added last so it wraps the other middleware and times the whole request.
+        app.add_middleware(metrics.MetricsMiddleware)
+        app.add_api_route("/metrics", metrics.metrics_endpoint, methods=["GET"], include_in_schema=False)
+
     if config.STATIC_FILES_DIR.exists():
         app.mount(
             config.STATIC_MOUNT_PATH,
@@ -30,6 +78,9 @@ def create_app() -> FastAPI:
             name="static",
         )
 
+    if async_db:
+        from app.api.async_routes import router as async_router
+
+        app.include_router(async_router)
     app.include_router(router)
     return app
-
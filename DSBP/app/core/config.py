@@ -1,8 +1,21 @@
 """Central place for application-level configuration constants."""
 
+import os
 from pathlib import Path
 
 
+def _env_bool(name: str, default: bool = False) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in {"1", "true", "yes", "on"}
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+
 ROOT_DIR = Path(__file__).resolve().parent.parent.parent
 APP_DIR = ROOT_DIR / "app"
 FRONTEND_ROOT = ROOT_DIR / "frontend"
@@ -14,4 +27,90 @@ CORS_ALLOW_ORIGINS = ["*"]
 CORS_ALLOW_METHODS = ["*"]
 CORS_ALLOW_HEADERS = ["*"]
 CORS_ALLOW_CREDENTIALS = True
+CORS_EXPOSE_HEADERS = ["X-Next-Cursor", "X-Search-Truncated"]
+
+# Database backend: a ``sqlite:///`` path or a ``postgresql://`` server URL.
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./data/dsbp.db")
+# Derived from DATABASE_URL (aiosqlite / asyncpg driver) when unset.
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or None
+
+# Connection pool and timeout tuning for the PostgreSQL profile.
+DB_POOL_SIZE = _env_int("DB_POOL_SIZE", 10)
+DB_MAX_OVERFLOW = _env_int("DB_MAX_OVERFLOW", 20)
+DB_POOL_TIMEOUT_SECONDS = _env_int("DB_POOL_TIMEOUT", 30)
+DB_POOL_RECYCLE_SECONDS = _env_int("DB_POOL_RECYCLE", 1800)
+DB_STATEMENT_TIMEOUT_MS = _env_int("DB_STATEMENT_TIMEOUT_MS", 15000)
+
+# SQLite production profile, applied to every connection on connect. Reads go
+# through a pool of read-only connections; writes share a single connection.
+SQLITE_BUSY_TIMEOUT_MS = _env_int("SQLITE_BUSY_TIMEOUT_MS", 5000)
+SQLITE_MMAP_SIZE = _env_int("SQLITE_MMAP_SIZE", 256 * 1024 * 1024)
+SQLITE_CACHE_SIZE_KIB = _env_int("SQLITE_CACHE_SIZE_KIB", 64 * 1024)
+SQLITE_READ_POOL_SIZE = _env_int("SQLITE_READ_POOL_SIZE", 8)
+
+# Count SQL statements per request; results are returned as X-DB-* response
+# headers and aggregated per route at /debug/sql-report.
+SQL_INSTRUMENTATION_ENABLED = _env_bool("SQL_INSTRUMENTATION")
+
+# Serve the hot read endpoints from async handlers backed by an AsyncSession.
+ASYNC_DATABASE_ENABLED = _env_bool("ASYNC_DATABASE")
+
+# Keyset pagination for list endpoints: the page size used when ``limit`` is
+# omitted and the largest page a client may request.
+PAGE_SIZE_DEFAULT = _env_int("PAGE_SIZE_DEFAULT", 100)
+PAGE_SIZE_MAX = _env_int("PAGE_SIZE_MAX", 500)
+
+# Prometheus metrics at /metrics. With several uvicorn workers, point
+# METRICS_MULTIPROC_DIR at a directory shared by the workers (emptied on
+# deploy): each worker writes a snapshot there and a scrape merges them.
+METRICS_ENABLED = _env_bool("METRICS", True)
+METRICS_MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR") or None
+METRICS_SNAPSHOT_INTERVAL_SECONDS = _env_int("METRICS_SNAPSHOT_INTERVAL_SECONDS", 5)
+
+# Authenticated principals cached per token subject; see app.services.principals.
+PRINCIPAL_CACHE_SIZE = _env_int("PRINCIPAL_CACHE_SIZE", 10000)
+PRINCIPAL_CACHE_TTL_SECONDS = _env_int("PRINCIPAL_CACHE_TTL_SECONDS", 60)
+
+# Password hashing (bcrypt_sha256) runs on a dedicated bounded pool; requests
+# beyond PASSWORD_HASH_MAX_PENDING get 503. Changing the cost rehashes each
+# password on the user's next login.
+PASSWORD_HASH_ROUNDS = _env_int("PASSWORD_HASH_ROUNDS", 12)
+PASSWORD_HASH_WORKERS = _env_int("PASSWORD_HASH_WORKERS", min(4, os.cpu_count() or 1))
+PASSWORD_HASH_MAX_PENDING = _env_int("PASSWORD_HASH_MAX_PENDING", 16)
+PASSWORD_HASH_USE_PROCESSES = _env_bool("PASSWORD_HASH_PROCESSES")
+
+# Access tokens carry the user id and license entitlement, so most requests
+# are authorised without a database lookup. Forced logouts and license
+# removals are tracked in memory per user; see app.services.revocation.
+ACCESS_TOKEN_EXPIRE_MINUTES = _env_int("ACCESS_TOKEN_EXPIRE_MINUTES", 60 * 24)
+TOKEN_EPOCH_MAX_ENTRIES = _env_int("TOKEN_EPOCH_MAX_ENTRIES", 10000)
+
+# Cycle checks for new dependency edges: "memory" walks per-project graphs
+# cached in each worker, "sql" runs one recursive query and keeps no state.
+# See app.services.dependency_graph.
+DEPENDENCY_CYCLE_CHECK = os.getenv("DEPENDENCY_CYCLE_CHECK", "memory").strip().lower()
+DEPENDENCY_GRAPH_CACHE_PROJECTS = _env_int("DEPENDENCY_GRAPH_CACHE_PROJECTS", 256)
+
+# GET /tasks/{id}/dependency-graph: levels walked when ``depth`` is omitted,
+# and the most a client may request.
+DEPENDENCY_GRAPH_DEFAULT_DEPTH = _env_int("DEPENDENCY_GRAPH_DEFAULT_DEPTH", 3)
+DEPENDENCY_GRAPH_MAX_DEPTH = _env_int("DEPENDENCY_GRAPH_MAX_DEPTH", 20)
+
+# Most edges accepted by one POST /task-dependencies/batch request.
+DEPENDENCY_BATCH_MAX_EDGES = _env_int("DEPENDENCY_BATCH_MAX_EDGES", 10000)
+
+# Most operations accepted by one POST /tasks/batch request.
+TASK_BATCH_MAX_OPERATIONS = _env_int("TASK_BATCH_MAX_OPERATIONS", 1000)
+
+# Matches of each kind (tasks, comments) ranked by GET /search, newest first.
+# Rarer terms have all their matches ranked; very common ones only the newest.
+SEARCH_RANKED_MATCHES = _env_int("SEARCH_RANKED_MATCHES", 2000)
+
+# Per-project dependency maps cached for GET /dependency-map; see
+# app.services.dependency_maps. Should cover the projects a busy user can see.
+DEPENDENCY_MAP_CACHE_PROJECTS = _env_int("DEPENDENCY_MAP_CACHE_PROJECTS", 1024)
 
+# A day is rolled up into task_activity_daily only once it has been over for
+# this long, so activities stamped before midnight but committed just after
+# are counted with their day.
+ACTIVITY_ROLLUP_GRACE_SECONDS = _env_int("ACTIVITY_ROLLUP_GRACE_SECONDS", 600)
@@ -1,19 +1,262 @@
-from sqlalchemy import create_engine
+import logging
+import time
+from typing import Optional
+
+from sqlalchemy import create_engine, delete, event, func, inspect, select
+from sqlalchemy.engine import Engine, URL, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlalchemy.schema import CreateColumn
+
+from app.core import config, metrics
+
+logger = logging.getLogger(__name__)
+
+POSTGRES_BACKENDS = {"postgresql", "postgres"}
+
+
+def normalize_database_url(raw_url: str) -> URL:
+    """Parse a database URL, accepting the ``postgres://`` alias used by some hosts."""
+    url = make_url(raw_url)
+    if url.drivername == "postgres":
+        url = url.set(drivername="postgresql")
+    return url
+
+
+def is_postgres(url: URL) -> bool:
+    return url.get_backend_name() in POSTGRES_BACKENDS
+
+
+def async_database_url(url: URL) -> URL:
+    """Map a sync database URL onto the matching asyncio driver."""
+    if is_postgres(url):
+        return url.set(drivername="postgresql+asyncpg")
+    return url.set(drivername="sqlite+aiosqlite")
+
+
+def sqlite_file_path(url: URL) -> Optional[str]:
+    """Return the database file behind a SQLite URL, or None for in-memory databases."""
+    if is_postgres(url) or url.query.get("uri"):
+        return None
+    if url.database in (None, "", ":memory:"):
+        return None
+    return url.database
+
+
+def read_only_url(url: URL) -> URL:
+    """Return a URL opening the same SQLite file through a ``mode=ro`` URI."""
+    return url.set(database=f"file:{sqlite_file_path(url)}", query={"mode": "ro", "uri": "true"})
+
+
+class _TimedCheckouts:
+    """Pool mixin recording how long each checkout waits for a connection.
+
+    The wait is observed under the pool's ``logging_name`` ("primary", "read"
+    or "async"). Sessions check a connection out on their first statement, so
+    only real demand is timed.
+    """
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            metrics.observe_checkout(self.logging_name, started)
+
+
+class TimedQueuePool(_TimedCheckouts, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_TimedCheckouts, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_options(url: URL, *, is_async: bool = False, read_only: bool = False) -> dict:
+    """Return ``create_engine`` keyword arguments for the backend behind ``url``.
+
+    PostgreSQL gets a sized, pre-pinged pool that recycles idle connections
+    and a server-side statement timeout. A SQLite file gets a single writer
+    connection, so concurrent writes queue in the pool instead of failing with
+    "database is locked", or a pool of connections for read-only URLs.
+    """
+    timed_pool = {
+        "poolclass": TimedAsyncAdaptedQueuePool if is_async else TimedQueuePool,
+        "pool_logging_name": "async" if is_async else "read" if read_only else "primary",
+    }
+    if not is_postgres(url):
+        options: dict = {} if is_async else {"connect_args": {"check_same_thread": False}}
+        if read_only:
+            # aiosqlite defaults to NullPool; pool it so the pragmas run once per connection.
+            options.update(timed_pool, pool_size=config.SQLITE_READ_POOL_SIZE)
+        elif sqlite_file_path(url) and not is_async:
+            options.update(timed_pool, pool_size=1, max_overflow=0, pool_timeout=config.DB_POOL_TIMEOUT_SECONDS)
+        return options
+
+    timeout_ms = config.DB_STATEMENT_TIMEOUT_MS
+    if is_async:
+        connect_args = {"server_settings": {"statement_timeout": str(timeout_ms)}}
+    else:
+        connect_args = {"options": f"-c statement_timeout={timeout_ms}"}
+    return {
+        **timed_pool,
+        "pool_size": config.DB_POOL_SIZE,
+        "max_overflow": config.DB_MAX_OVERFLOW,
+        "pool_timeout": config.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": config.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": True,
+        "connect_args": connect_args,
+    }
+
+
+def install_sqlite_pragmas(target: Engine, *, read_only: bool = False) -> None:
+    """Apply the SQLite production profile to every new connection of ``target``.
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./data/dsbp.db"
+    WAL lets readers proceed while the writer commits, and ``synchronous=NORMAL``
+    is durable under WAL except for the last transactions before a power loss.
+    Read-only connections cannot change the journal mode; they inherit WAL from
+    the database file once the writer has switched it.
+    """
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+    @event.listens_for(target, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute(f"PRAGMA busy_timeout = {config.SQLITE_BUSY_TIMEOUT_MS}")
+            if not read_only:
+                cursor.execute("PRAGMA journal_mode = WAL")
+                cursor.execute("PRAGMA synchronous = NORMAL")
+            cursor.execute(f"PRAGMA mmap_size = {config.SQLITE_MMAP_SIZE}")
+            cursor.execute(f"PRAGMA cache_size = -{config.SQLITE_CACHE_SIZE_KIB}")
+        finally:
+            cursor.close()
+
+
+def build_engine(url: URL, *, read_only: bool = False) -> Engine:
+    """Create a sync engine for ``url`` with its backend profile installed."""
+    if read_only:
+        url = read_only_url(url)
+    built = create_engine(url, **engine_options(url, read_only=read_only))
+    if not is_postgres(url):
+        install_sqlite_pragmas(built, read_only=read_only)
+    return built
+
+
+SQLALCHEMY_DATABASE_URL = normalize_database_url(config.DATABASE_URL)
+SQLALCHEMY_ASYNC_DATABASE_URL = (
+    normalize_database_url(config.ASYNC_DATABASE_URL)
+    if config.ASYNC_DATABASE_URL
+    else async_database_url(SQLALCHEMY_DATABASE_URL)
 )
+# SQLite files are read through a separate read-only pool; other backends
+# (and in-memory SQLite) serve reads from the primary engine.
+READ_ONLY_POOL_ENABLED = sqlite_file_path(SQLALCHEMY_DATABASE_URL) is not None
+
+engine = build_engine(SQLALCHEMY_DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+read_engine = build_engine(SQLALCHEMY_DATABASE_URL, read_only=True) if READ_ONLY_POOL_ENABLED else engine
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+# Async engine used by the async read handlers; it points at the same database
+# as ``read_engine`` but awaits I/O instead of holding a threadpool worker.
+_async_read_only = READ_ONLY_POOL_ENABLED and sqlite_file_path(SQLALCHEMY_ASYNC_DATABASE_URL) is not None
+_async_url = read_only_url(SQLALCHEMY_ASYNC_DATABASE_URL) if _async_read_only else SQLALCHEMY_ASYNC_DATABASE_URL
+async_engine = create_async_engine(
+    _async_url,
+    **engine_options(_async_url, is_async=True, read_only=_async_read_only),
+)
+if not is_postgres(_async_url):
+    install_sqlite_pragmas(async_engine.sync_engine, read_only=_async_read_only)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
 Base = declarative_base()
 
 
+def create_missing_columns(bind) -> None:
+    """Add columns declared on the models that an existing table lacks.
+
+    Like ``create_missing_indexes`` this only covers additive changes, so new
+    columns must be nullable or carry a ``server_default``.
+    """
+    with bind.begin() as connection:
+        inspector = inspect(connection)
+        existing_tables = set(inspector.get_table_names())
+        preparer = connection.dialect.identifier_preparer
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            present = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in present:
+                    continue
+                ddl = CreateColumn(column).compile(dialect=connection.dialect)
+                connection.exec_driver_sql(f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN {ddl}")
+
+
+def create_missing_indexes(bind) -> None:
+    """Create indexes declared on the models that an existing database lacks.
+
+    ``create_all`` only emits indexes together with a new table, so databases
+    created before an index was added would otherwise never get it. Rows that
+    would violate a new unique index are deleted first, see
+    ``delete_duplicate_rows``, and the number deleted per table is logged as
+    a warning.
+    """
+    with bind.begin() as connection:
+        inspector = inspect(connection)
+        existing_tables = set(inspector.get_table_names())
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            present = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name in present:
+                    continue
+                if index.unique:
+                    deleted = delete_duplicate_rows(connection, index)
+                    if deleted:
+                        logger.warning(
+                            "Deleted %d duplicate rows from %s before creating unique index %s",
+                            deleted,
+                            table.name,
+                            index.name,
+                        )
+                index.create(bind=connection)
+
+
+def delete_duplicate_rows(connection, index) -> int:
+    """Delete rows sharing the columns of ``index``, keeping the oldest of each.
+
+    Older databases had no unique constraint on some of these columns, so
+    they can hold duplicates that would make the ``CREATE UNIQUE INDEX`` fail.
+    The row with the lowest id is kept. Returns the number of rows deleted.
+    """
+    table = index.table
+    kept = select(func.min(table.c.id)).group_by(*index.columns)
+    return connection.execute(delete(table).where(table.c.id.not_in(kept))).rowcount
+
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+def get_read_db():
+    """Session on the read-only pool, for handlers that never write."""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
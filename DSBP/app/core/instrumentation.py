@@ -0,0 +1,174 @@
+"""Opt-in per-request SQL statement instrumentation.
+
+Engine cursor events record how many statements each request issues, how long
+they take in total, and which one was slowest. The numbers are returned as
+response headers and aggregated per route template, which makes N+1 loading
+patterns visible in production without attaching a profiler. Nothing is
+recorded outside a request scope, so the event hooks are inert for scripts
+and background work.
+"""
+
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+QUERY_COUNT_HEADER = "X-DB-Query-Count"
+QUERY_TIME_HEADER = "X-DB-Query-Time-Ms"
+SLOWEST_QUERY_HEADER = "X-DB-Slowest-Query-Ms"
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+@dataclass
+class QueryStats:
+    """Statement counters for a single request."""
+
+    count: int = 0
+    total_seconds: float = 0.0
+    slowest_seconds: float = 0.0
+    slowest_statement: Optional[str] = None
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.count += 1
+        self.total_seconds += elapsed
+        if elapsed >= self.slowest_seconds:
+            self.slowest_seconds = elapsed
+            self.slowest_statement = statement
+
+
+@dataclass
+class RouteQueryTotals:
+    """Aggregated statement counters for one route template."""
+
+    requests: int = 0
+    statements: int = 0
+    max_statements: int = 0
+    total_seconds: float = 0.0
+    slowest_seconds: float = 0.0
+    slowest_statement: Optional[str] = None
+
+    def add(self, stats: QueryStats) -> None:
+        self.requests += 1
+        self.statements += stats.count
+        self.max_statements = max(self.max_statements, stats.count)
+        self.total_seconds += stats.total_seconds
+        if stats.slowest_statement is not None and stats.slowest_seconds >= self.slowest_seconds:
+            self.slowest_seconds = stats.slowest_seconds
+            self.slowest_statement = stats.slowest_statement
+
+    def as_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "statements": self.statements,
+            "avg_statements": round(self.statements / self.requests, 2) if self.requests else 0.0,
+            "max_statements": self.max_statements,
+            "total_db_ms": round(self.total_seconds * 1000, 3),
+            "avg_db_ms": round(self.total_seconds * 1000 / self.requests, 3) if self.requests else 0.0,
+            "slowest_ms": round(self.slowest_seconds * 1000, 3),
+            "slowest_statement": self.slowest_statement,
+        }
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("dsbp_query_stats", default=None)
+
+
+class RouteQueryReport:
+    """Thread-safe per-route aggregate of request statement counters."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._routes: Dict[Tuple[str, str], RouteQueryTotals] = {}
+
+    def add(self, method: str, route: str, stats: QueryStats) -> None:
+        with self._lock:
+            self._routes.setdefault((method, route), RouteQueryTotals()).add(stats)
+
+    def snapshot(self) -> Dict[str, dict]:
+        with self._lock:
+            return {
+                f"{method} {route}": totals.as_dict()
+                for (method, route), totals in sorted(self._routes.items(), key=lambda item: item[0][1])
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
+
+
+report = RouteQueryReport()
+
+
+def current_stats() -> Optional[QueryStats]:
+    """Counters for the request being handled, or None outside a request."""
+    return _current_stats.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats.get() is not None:
+        conn.info.setdefault("dsbp_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    if stats is None:
+        return
+    starts = conn.info.get("dsbp_query_start")
+    if not starts:
+        return
+    stats.record(statement, time.perf_counter() - starts.pop())
+
+
+def install_engine_hooks() -> None:
+    """Listen to cursor events on every engine, including ones created later."""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def route_template(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+class QueryInstrumentationMiddleware:
+    """ASGI middleware that scopes ``QueryStats`` to each HTTP request."""
+
+    def __init__(self, app, query_report: RouteQueryReport = report) -> None:
+        self.app = app
+        self.report = query_report
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current_stats.set(stats)
+
+        async def send_with_stats(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.extend(
+                    [
+                        (QUERY_COUNT_HEADER.lower().encode(), str(stats.count).encode()),
+                        (QUERY_TIME_HEADER.lower().encode(), f"{stats.total_seconds * 1000:.3f}".encode()),
+                        (SLOWEST_QUERY_HEADER.lower().encode(), f"{stats.slowest_seconds * 1000:.3f}".encode()),
+                    ]
+                )
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            _current_stats.reset(token)
+            self.report.add(scope["method"], route_template(scope), stats)
+
+
+def sql_report() -> Dict[str, dict]:
+    """Aggregate statement counters per route since startup (or the last reset)."""
+    return report.snapshot()
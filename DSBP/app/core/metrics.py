@@ -0,0 +1,394 @@
+"""In-process metrics registry exposed at ``/metrics`` in Prometheus text format.
+
+Request latency is recorded per route template (never per raw path, so label
+cardinality stays bounded), together with in-flight requests, server errors
+and connection pool usage.
+
+Each uvicorn worker is its own process with its own registry. When
+``METRICS_MULTIPROC_DIR`` is set every worker periodically writes a JSON
+snapshot of its registry to that directory and a scrape, whichever worker
+serves it, merges all snapshots: counters and histograms are summed across
+every process that ever wrote one, gauges only across workers whose snapshot
+is still fresh. Empty the directory when the service is (re)deployed.
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from fastapi.responses import Response
+
+from app.core import config
+from app.core.instrumentation import route_template
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CHECKOUT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+LabelValues = Tuple[str, ...]
+
+
+class Metric:
+    """Base class for a named metric with a fixed set of label names."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[LabelValues, object] = {}
+
+    def _key(self, labels: Dict[str, object]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def snapshot(self) -> dict:
+        """JSON-serialisable state of the metric, as merged across workers."""
+        with self._lock:
+            values = [[list(key), self._copy(value)] for key, value in self._values.items()]
+        return {
+            "kind": self.kind,
+            "help": self.documentation,
+            "labelnames": list(self.labelnames),
+            "values": values,
+        }
+
+    @staticmethod
+    def _copy(value):
+        return value
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["buckets"][index] += 1
+                    break
+            state["sum"] += value
+            state["count"] += 1
+
+    def snapshot(self) -> dict:
+        data = super().snapshot()
+        data["buckets"] = list(self.buckets)
+        return data
+
+    @staticmethod
+    def _copy(value):
+        return {"buckets": list(value["buckets"]), "sum": value["sum"], "count": value["count"]}
+
+
+class MetricsRegistry:
+    """Collection of metrics plus the collectors that refresh sampled gauges."""
+
+    def __init__(self, multiprocess_dir: Optional[str] = None, pid: Optional[int] = None) -> None:
+        self.multiprocess_dir = Path(multiprocess_dir) if multiprocess_dir else None
+        self._pid = pid
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: Dict[str, Callable[[], None]] = {}
+        self._snapshot_thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._write_lock = threading.Lock()
+
+    @property
+    def pid(self) -> int:
+        """The pid naming this worker's snapshot, read on every write.
+
+        Servers that import the app before forking workers share this
+        registry, so a pid fixed at import would give every worker one file.
+        """
+        return self._pid if self._pid is not None else os.getpid()
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def set_collector(self, name: str, collector: Callable[[], None]) -> None:
+        """Run ``collector`` before every snapshot; a later call replaces it."""
+        self._collectors[name] = collector
+
+    def collect(self) -> Dict[str, dict]:
+        """Refresh sampled gauges and snapshot every metric of this process."""
+        for collector in list(self._collectors.values()):
+            collector()
+        return {name: metric.snapshot() for name, metric in self._metrics.items()}
+
+    # -- multi-worker aggregation ---------------------------------------------
+
+    def _snapshot_path(self, pid: int) -> Path:
+        return self.multiprocess_dir / f"metrics_{pid}.json"
+
+    def write_snapshot(self, live: bool = True) -> None:
+        """Atomically replace this worker's snapshot file."""
+        self.multiprocess_dir.mkdir(parents=True, exist_ok=True)
+        pid = self.pid
+        target = self._snapshot_path(pid)
+        temporary = target.with_suffix(".tmp")
+        with self._write_lock:
+            payload = {"pid": pid, "live": live, "written_at": time.time(), "metrics": self.collect()}
+            temporary.write_text(json.dumps(payload))
+            os.replace(temporary, target)
+
+    def _read_snapshots(self) -> Iterable[dict]:
+        for path in sorted(self.multiprocess_dir.glob("metrics_*.json")):
+            try:
+                yield json.loads(path.read_text())
+            except (OSError, ValueError):
+                # A worker is replacing its file or left a partial one behind.
+                continue
+
+    def gather(self) -> Dict[str, dict]:
+        """Metrics of this process, or of every worker in multi-process mode."""
+        if self.multiprocess_dir is None:
+            return self.collect()
+
+        self.write_snapshot()
+        stale_before = time.time() - 3 * config.METRICS_SNAPSHOT_INTERVAL_SECONDS
+        merged: Dict[str, dict] = {}
+        for snapshot in self._read_snapshots():
+            gauges_current = snapshot.get("live", False) and snapshot.get("written_at", 0) >= stale_before
+            for name, data in snapshot["metrics"].items():
+                if data["kind"] == "gauge" and not gauges_current:
+                    continue
+                _merge_metric(merged, name, data)
+        return merged
+
+    def render(self) -> str:
+        return render_exposition(self.gather())
+
+    def start_snapshots(self) -> None:
+        """Write this worker's snapshot every ``METRICS_SNAPSHOT_INTERVAL_SECONDS``."""
+        if self.multiprocess_dir is None or self._snapshot_thread is not None:
+            return
+        self._stop.clear()
+
+        def _loop() -> None:
+            while not self._stop.wait(config.METRICS_SNAPSHOT_INTERVAL_SECONDS):
+                self.write_snapshot()
+
+        self.write_snapshot()
+        self._snapshot_thread = threading.Thread(target=_loop, name="dsbp-metrics-snapshots", daemon=True)
+        self._snapshot_thread.start()
+
+    def stop_snapshots(self) -> None:
+        """Stop the snapshot thread and mark this worker's gauges as gone."""
+        if self._snapshot_thread is None:
+            return
+        self._stop.set()
+        self._snapshot_thread.join()
+        self._snapshot_thread = None
+        self.write_snapshot(live=False)
+
+
+def _merge_metric(merged: Dict[str, dict], name: str, data: dict) -> None:
+    target = merged.setdefault(name, {**data, "values": []})
+    index = {tuple(key): position for position, (key, _) in enumerate(target["values"])}
+    for key, value in data["values"]:
+        position = index.get(tuple(key))
+        if position is None:
+            index[tuple(key)] = len(target["values"])
+            target["values"].append([key, Histogram._copy(value) if data["kind"] == "histogram" else value])
+        elif data["kind"] == "histogram":
+            current = target["values"][position][1]
+            current["buckets"] = [a + b for a, b in zip(current["buckets"], value["buckets"])]
+            current["sum"] += value["sum"]
+            current["count"] += value["count"]
+        else:
+            target["values"][position][1] += value
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def render_exposition(metrics: Dict[str, dict]) -> str:
+    """Render gathered snapshots in the Prometheus text exposition format."""
+    lines: List[str] = []
+    for name, data in metrics.items():
+        names = data["labelnames"]
+        lines.append(f"# HELP {name} {_escape(data['help'])}")
+        lines.append(f"# TYPE {name} {data['kind']}")
+        for key, value in sorted(data["values"], key=lambda item: item[0]):
+            if data["kind"] != "histogram":
+                lines.append(f"{name}{_format_labels(names, key)} {_format_value(value)}")
+                continue
+            cumulative = 0
+            for bound, count in zip([*data["buckets"], math.inf], [*value["buckets"], None]):
+                cumulative = value["count"] if count is None else cumulative + count
+                labels = _format_labels([*names, "le"], [*key, _format_value(bound)])
+                lines.append(f"{name}_bucket{labels} {_format_value(cumulative)}")
+            lines.append(f"{name}_sum{_format_labels(names, key)} {_format_value(value['sum'])}")
+            lines.append(f"{name}_count{_format_labels(names, key)} {_format_value(value['count'])}")
+    return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry(config.METRICS_MULTIPROC_DIR)
+
+HTTP_REQUEST_DURATION = registry.histogram(
+    "dsbp_http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    ("method", "route"),
+)
+HTTP_REQUESTS_IN_PROGRESS = registry.gauge(
+    "dsbp_http_requests_in_progress",
+    "HTTP requests currently being served.",
+)
+HTTP_REQUEST_ERRORS = registry.counter(
+    "dsbp_http_request_errors_total",
+    "HTTP requests that failed with a 5xx status or an unhandled exception.",
+    ("method", "route", "status"),
+)
+DB_POOL_CHECKOUT_SECONDS = registry.histogram(
+    "dsbp_db_pool_checkout_seconds",
+    "Time spent waiting for a database connection from the pool.",
+    ("pool",),
+    buckets=CHECKOUT_BUCKETS,
+)
+DB_POOL_SIZE = registry.gauge(
+    "dsbp_db_pool_size",
+    "Configured number of persistent connections in the pool.",
+    ("pool",),
+)
+DB_POOL_CHECKED_OUT = registry.gauge(
+    "dsbp_db_pool_checked_out",
+    "Connections currently checked out of the pool.",
+    ("pool",),
+)
+
+
+def observe_checkout(pool: str, started: float) -> None:
+    """Record a pool checkout that began at ``started`` (``time.perf_counter``)."""
+    DB_POOL_CHECKOUT_SECONDS.observe(time.perf_counter() - started, pool=pool)
+
+
+def watch_pool(name: str, engine) -> None:
+    """Sample ``engine``'s pool size and checked-out connections on every scrape."""
+
+    def _collect() -> None:
+        pool = engine.pool
+        size = getattr(pool, "size", None)
+        checked_out = getattr(pool, "checkedout", None)
+        if callable(size):
+            DB_POOL_SIZE.set(size(), pool=name)
+        if callable(checked_out):
+            DB_POOL_CHECKED_OUT.set(checked_out(), pool=name)
+
+    registry.set_collector(f"pool:{name}", _collect)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, in-flight requests and errors."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_PROGRESS.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        except Exception:
+            status_code = 500
+            raise
+        finally:
+            HTTP_REQUESTS_IN_PROGRESS.dec()
+            method, route = scope["method"], route_template(scope)
+            HTTP_REQUEST_DURATION.observe(time.perf_counter() - started, method=method, route=route)
+            if status_code >= 500:
+                HTTP_REQUEST_ERRORS.inc(method=method, route=route, status=str(status_code))
+
+
+def metrics_endpoint():
+    """Prometheus scrape endpoint."""
+    return Response(registry.render(), media_type=CONTENT_TYPE)
@@ -2,8 +2,10 @@ from datetime import datetime
 from sqlalchemy import (
     Boolean,
     Column,
+    Date,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     String,
     Table,
@@ -26,6 +28,8 @@ task_assignees = Table(
     Base.metadata,
     Column("task_id", ForeignKey("tasks.id", ondelete="CASCADE"), primary_key=True),
     Column("user_id", ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+    # The primary key leads with task_id; this serves "tasks assigned to X".
+    Index("ix_task_assignees_user_id_task_id", "user_id", "task_id"),
 )
 
 
@@ -57,6 +61,7 @@ class User(Base):
         back_populates="assignees",
     )
     task_activities = relationship("TaskActivity", back_populates="user", cascade="all, delete-orphan")
+    activity_days = relationship("TaskActivityDaily", cascade="all, delete-orphan")
     license = relationship("UserLicense", back_populates="user", uselist=False, cascade="all, delete-orphan")
 
 
@@ -69,6 +74,10 @@ class Project(Base):
     owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     visibility = Column(String(20), default="all", nullable=False)
+    # Bumped by every mutation of the project's tasks, dependencies, comments
+    # or visibility; conditional GETs derive their ETags from it.
+    version = Column(Integer, default=1, server_default="1", nullable=False)
+    updated_at = Column(DateTime, nullable=True)
 
     owner = relationship("User", back_populates="projects")
     tasks = relationship("Task", back_populates="project", cascade="all, delete-orphan")
@@ -78,6 +87,8 @@ class Project(Base):
         back_populates="shared_projects",
     )
     task_activities = relationship("TaskActivity", back_populates="project", cascade="all, delete-orphan")
+    status_counts = relationship("ProjectStatusCount", cascade="all, delete-orphan")
+    activity_days = relationship("TaskActivityDaily", cascade="all, delete-orphan")
 
 
 class Task(Base):
@@ -91,6 +102,15 @@ class Task(Base):
     due_date = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        Index("ix_tasks_project_id_created_at", "project_id", "created_at"),
+        # Board filters: by status in creation order, and by due date.
+        Index("ix_tasks_project_id_status_created_at", "project_id", "status", "created_at"),
+        Index("ix_tasks_project_id_due_date", "project_id", "due_date"),
+        # GET /tasks lists the newest tasks across projects.
+        Index("ix_tasks_created_at", "created_at"),
+    )
+
     project = relationship("Project", back_populates="tasks")
     assignees = relationship(
         "User",
@@ -120,6 +140,13 @@ class TaskDependency(Base):
     depends_on_task_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    # The unique index doubles as the lookup index for a task's prerequisites;
+    # the second one serves the downstream walk used by cycle detection.
+    __table_args__ = (
+        Index("uq_task_dependencies_edge", "dependent_task_id", "depends_on_task_id", unique=True),
+        Index("ix_task_dependencies_depends_on", "depends_on_task_id", "dependent_task_id"),
+    )
+
     dependent_task = relationship(
         "Task",
         foreign_keys=[dependent_task_id],
@@ -143,6 +170,12 @@ class Comment(Base):
     author_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     parent_id = Column(Integer, ForeignKey("comments.id", ondelete="CASCADE"))
 
+    __table_args__ = (
+        Index("ix_comments_task_id_parent_id", "task_id", "parent_id"),
+        # Walks a thread's replies level by level.
+        Index("ix_comments_parent_id", "parent_id"),
+    )
+
     task = relationship("Task", back_populates="comments")
     author = relationship("User", back_populates="comments")
     parent = relationship("Comment", remote_side=[id], backref="replies")
@@ -159,6 +192,10 @@ class Notification(Base):
     read = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        Index("ix_notifications_recipient_id_created_at", "recipient_id", "created_at"),
+    )
+
     recipient = relationship("User", back_populates="notifications", foreign_keys=[recipient_id])
     comment = relationship("Comment", back_populates="notifications")
 
@@ -195,11 +232,50 @@ class TaskActivity(Base):
     project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
     task_id = Column(Integer, ForeignKey("tasks.id", ondelete="SET NULL"), nullable=True)
 
+    __table_args__ = (
+        Index("ix_task_activities_project_user_created", "project_id", "user_id", "created_at"),
+    )
+
     user = relationship("User", back_populates="task_activities")
     project = relationship("Project", back_populates="task_activities")
     task = relationship("Task")
 
 
+class TaskActivityDaily(Base):
+    """Number of a user's task activities in a project on one closed (past) day.
+
+    Written by ``app.services.activity_rollup`` once a day is over; activities
+    never change afterwards, so the counts stay exact.
+    """
+
+    __tablename__ = "task_activity_daily"
+
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    count = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        # The roll-up resumes after the latest day it has written.
+        Index("ix_task_activity_daily_day", "day"),
+    )
+
+
+class ProjectStatusCount(Base):
+    """Number of a project's tasks in one status, for the dashboard.
+
+    Maintained by the task write paths through ``app.services.status_counts``
+    in the same transaction as the change. Tasks without a status are counted
+    under ``"unknown"``.
+    """
+
+    __tablename__ = "project_status_counts"
+
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True)
+    status = Column(String(50), primary_key=True)
+    count = Column(Integer, default=0, server_default="0", nullable=False)
+
+
 class License(Base):
     __tablename__ = "licenses"
 
@@ -1,9 +1,11 @@
 from datetime import datetime
 from html import escape
-from typing import Dict, List, Literal, Optional
+from typing import Annotated, Dict, List, Literal, Optional, Tuple, Union
 
 from pydantic import BaseModel, ConfigDict, EmailStr, Field, field_serializer
 
+from app.core import config
+
 
 class UserCreate(BaseModel):
     username: str = Field(..., max_length=50)
@@ -37,11 +39,12 @@ class ProjectBase(BaseModel):
 
 
 class ProjectCreate(ProjectBase):
+    name: str = Field(..., max_length=100)
     shared_usernames: List[str] = Field(default_factory=list)
 
 
 class ProjectUpdate(BaseModel):
-    name: Optional[str] = None
+    name: Optional[str] = Field(None, max_length=100)
     description: Optional[str] = None
     visibility: Optional[Literal["all", "private", "selected"]] = None
     shared_usernames: Optional[List[str]] = None
@@ -56,10 +59,13 @@ class ProjectOut(ProjectBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+TaskStatus = Literal["new_task", "scheduled", "in_progress", "completed"]
+
+
 class TaskBase(BaseModel):
     title: str = Field(..., min_length=1, max_length=150)
     description: Optional[str] = ""
-    status: Literal["new_task", "scheduled", "in_progress", "completed"] = "new_task"
+    status: TaskStatus = "new_task"
 
 
 class TaskCreate(TaskBase):
@@ -71,7 +77,7 @@ class TaskCreate(TaskBase):
 class TaskUpdate(BaseModel):
     title: Optional[str] = Field(None, min_length=1, max_length=150)
     description: Optional[str] = None
-    status: Optional[Literal["new_task", "scheduled", "in_progress", "completed"]] = None
+    status: Optional[TaskStatus] = None
     due_date: Optional[datetime] = None
     assignee_ids: Optional[List[int]] = None
 
@@ -86,6 +92,39 @@ class TaskOut(TaskBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+class TaskBatchCreate(TaskCreate):
+    op: Literal["create"]
+
+
+class TaskBatchUpdate(TaskUpdate):
+    op: Literal["update"]
+    task_id: int
+
+
+class TaskBatchDelete(BaseModel):
+    op: Literal["delete"]
+    task_id: int
+
+
+TaskBatchOperation = Annotated[Union[TaskBatchCreate, TaskBatchUpdate, TaskBatchDelete], Field(discriminator="op")]
+
+
+class TaskBatchRequest(BaseModel):
+    operations: List[TaskBatchOperation] = Field(..., min_length=1, max_length=config.TASK_BATCH_MAX_OPERATIONS)
+
+
+class TaskBatchResult(BaseModel):
+    index: int
+    op: Literal["create", "update", "delete"]
+    task_id: Optional[int] = None
+    task: Optional[TaskOut] = None
+    error: Optional[str] = None
+
+
+class TaskBatchOut(BaseModel):
+    results: List[TaskBatchResult]
+
+
 class TaskSummary(BaseModel):
     id: int
     title: str
@@ -111,6 +150,21 @@ class TaskDependencyOut(TaskDependencyBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+class TaskDependencyBatchCreate(BaseModel):
+    dependencies: List[TaskDependencyCreate] = Field(..., min_length=1, max_length=config.DEPENDENCY_BATCH_MAX_EDGES)
+
+
+class TaskDependencyBatchResult(TaskDependencyBase):
+    index: int
+    id: Optional[int] = None
+    error: Optional[str] = None
+
+
+class TaskDependencyBatchOut(BaseModel):
+    created: int
+    results: List[TaskDependencyBatchResult]
+
+
 class DependencyEdgeOut(BaseModel):
     id: int
     dependent: TaskSummary
@@ -126,11 +180,56 @@ class DependencyConvergenceOut(BaseModel):
     sources: List[TaskSummary]
 
 
+class TaskPositionOut(BaseModel):
+    task_id: int
+    layer: int  # column, left to right
+    order: int  # row within the column
+
+
 class DependencyMapOut(BaseModel):
     tasks: List[TaskSummary]
     edges: List[DependencyEdgeOut]
     chains: List[DependencyChainOut]
     convergences: List[DependencyConvergenceOut]
+    positions: Optional[List[TaskPositionOut]] = None
+
+
+class DependencyMapProjectOut(BaseModel):
+    id: int
+    name: str
+
+
+class DependencyMapTaskOut(BaseModel):
+    id: int
+    title: str
+    project: int  # index into ``projects``
+
+
+class DependencyMapCompactOut(BaseModel):
+    """``DependencyMapOut`` with each task and project listed once and referenced by index."""
+
+    format: Literal["compact"] = "compact"
+    projects: List[DependencyMapProjectOut]
+    tasks: List[DependencyMapTaskOut]
+    edges: List[Tuple[int, int, int]]  # (edge id, depends_on index, dependent index)
+    chains: List[List[int]]
+    convergences: List[Tuple[int, List[int]]]  # (target index, source indexes)
+    positions: Optional[List[Tuple[int, int]]] = None  # (layer, order) of each task
+
+
+class SearchHitOut(BaseModel):
+    kind: Literal["task", "comment"]
+    id: int
+    task_id: int
+    task_title: str
+    project_id: int
+    project_name: str
+    snippet: str
+
+    @field_serializer("snippet")
+    def highlight_snippet(self, value: str) -> str:
+        """Escape the snippet, then wrap the matched terms in ``<mark>``."""
+        return escape(value or "").replace("\x02", "<mark>").replace("\x03", "</mark>")
 
 
 class CommentCreate(BaseModel):
@@ -210,6 +309,7 @@ class ProjectDashboardOut(BaseModel):
 class TaskHistoryResponse(BaseModel):
     activities: List[TaskActivityOut]
     daily_counts: Dict[str, int]
+    next_cursor: Optional[str] = None
 
 
 class LicenseActivate(BaseModel):
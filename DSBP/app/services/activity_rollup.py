@@ -0,0 +1,101 @@
+"""Daily task activity counts: a roll-up of closed days plus the live tail.
+
+``GET /projects/{id}/task-history`` reports how many activities a user had in
+a project on each day of a range. Counting the raw ``task_activities`` rows
+costs time in proportion to the range, so days that are over are counted
+once into ``task_activity_daily`` by ``roll_up``. It runs when the app starts
+and can be scheduled with ``rollup_task_activity.py``.
+
+``roll_up`` writes whole days at once, resuming at the latest day in the
+table, so every day up to a (project, user) pair's latest roll-up row is
+complete for that pair. A day is only rolled up once it has been over for
+``ACTIVITY_ROLLUP_GRACE_SECONDS``, and the latest rolled day is counted
+again on the next run, so an activity stamped just before midnight whose
+transaction committed late still reaches its day's count. ``daily_counts`` reads those days from the roll-up
+and counts only the activities after them with a ``GROUP BY`` in SQL: today,
+plus any day the roll-up has not reached yet.
+
+Every app worker runs ``roll_up`` on startup, so two of them can write the
+same days at once; the counts are upserted, so either write wins.
+"""
+
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+import app.models as models
+from app.core import config
+
+
+def roll_up(db, through: Optional[date] = None) -> int:
+    """Count the activities of every closed day up to ``through``.
+
+    ``through`` defaults to the last day that ended at least
+    ``ACTIVITY_ROLLUP_GRACE_SECONDS`` ago (UTC); it must not be a day that is
+    still open. The latest day already rolled up is counted again and its
+    rows updated if they changed. ``db`` may be a session or a connection;
+    the caller commits. Returns the number of roll-up rows written or changed.
+    """
+    if through is None:
+        closed = datetime.utcnow() - timedelta(seconds=config.ACTIVITY_ROLLUP_GRACE_SECONDS)
+        through = closed.date() - timedelta(days=1)
+    activity = models.TaskActivity
+    day = func.date(activity.created_at)
+    counts = (
+        select(activity.project_id, activity.user_id, day, func.count(activity.id))
+        .where(activity.created_at < datetime.combine(through + timedelta(days=1), time.min))
+        .group_by(activity.project_id, activity.user_id, day)
+    )
+    latest = db.execute(select(func.max(models.TaskActivityDaily.day))).scalar()
+    if latest is not None:
+        if latest > through:
+            return 0
+        counts = counts.where(activity.created_at >= datetime.combine(latest, time.min))
+    daily = models.TaskActivityDaily
+    bind = db.get_bind() if isinstance(db, Session) else db
+    dialect = postgresql if bind.dialect.name == "postgresql" else sqlite
+    statement = dialect.insert(daily).from_select([daily.project_id, daily.user_id, daily.day, daily.count], counts)
+    statement = statement.on_conflict_do_update(
+        index_elements=[daily.project_id, daily.user_id, daily.day],
+        set_={"count": statement.excluded["count"]},
+        where=daily.count != statement.excluded["count"],
+    )
+    return db.execute(statement).rowcount
+
+
+def daily_counts(db, project_id: int, user_id: int, start: datetime, end: datetime) -> Dict[str, int]:
+    """Activities per day (``"YYYY-MM-DD"``) of the user in the project between ``start`` and ``end``."""
+    daily = models.TaskActivityDaily
+    rolled = db.execute(
+        select(func.max(daily.day)).where(daily.project_id == project_id, daily.user_id == user_id)
+    ).scalar()
+    counts: Dict[str, int] = {}
+    if rolled is not None:
+        rows = db.execute(
+            select(daily.day, daily.count).where(
+                daily.project_id == project_id,
+                daily.user_id == user_id,
+                daily.day >= start.date(),
+                daily.day <= end.date(),
+            )
+        )
+        counts.update((str(day), count) for day, count in rows)
+        start = max(start, datetime.combine(rolled + timedelta(days=1), time.min))
+    if start <= end:
+        activity = models.TaskActivity
+        day = func.date(activity.created_at)
+        rows = db.execute(
+            select(day, func.count(activity.id))
+            .where(
+                activity.project_id == project_id,
+                activity.user_id == user_id,
+                activity.created_at >= start,
+                activity.created_at <= end,
+            )
+            .group_by(day)
+        )
+        counts.update((str(key), count) for key, count in rows)
+    return counts
@@ -1,68 +1,220 @@
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached, selectinload
 
 import app.models as models
-from app.core.database import get_db
+from app.core import config
+from app.core.database import get_async_db, get_read_db
+from app.services.hashing import hashing_executor
+from app.services.principals import Principal, principal_cache
+from app.services.revocation import token_epochs
 
 SECRET_KEY = "CHANGE_ME_SECRET"
 ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24
+ACCESS_TOKEN_EXPIRE_MINUTES = config.ACCESS_TOKEN_EXPIRE_MINUTES
 
-pwd_context = CryptContext(schemes=["bcrypt_sha256"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return hashing_executor.verify_and_update(plain_password, hashed_password)[0]
+
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password; also return a new hash if the stored one uses another cost."""
+    return hashing_executor.verify_and_update(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return hashing_executor.hash(password)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "iat": token_epochs.now()})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
-def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)) -> models.User:
-    credentials_exception = HTTPException(
+def create_user_access_token(user: models.User, expires_delta: Optional[timedelta] = None) -> str:
+    """Mint a token carrying the user id and the user's license entitlement."""
+    from app.services import license as license_service
+
+    return create_access_token(
+        data={"sub": user.username, "uid": user.id, "lic": license_service.check_user_has_license(user)},
+        expires_delta=expires_delta,
+    )
+
+
+@dataclass(frozen=True)
+class AccessClaims:
+    """Verified claims of a bearer token.
+
+    Tokens minted before ``uid``/``lic`` were added only carry ``sub``; they
+    keep working through the database lookup.
+    """
+
+    username: str
+    user_id: Optional[int] = None
+    licensed: bool = False
+    issued_at: Optional[float] = None
+
+    @property
+    def trusts_license(self) -> bool:
+        """Whether the signed license claim can stand in for a database check."""
+        return (
+            self.user_id is not None
+            and self.licensed
+            and token_epochs.trusts_license(self.user_id, self.issued_at)
+        )
+
+    def matches(self, user_id: int) -> bool:
+        return self.user_id is None or self.user_id == user_id
+
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+def _claims_from_token(token: str) -> AccessClaims:
+    """Decode the bearer token and return its claims, or raise 401."""
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
     except JWTError as exc:
-        raise credentials_exception from exc
+        raise _credentials_exception() from exc
+    username = payload.get("sub")
+    user_id = payload.get("uid")
+    if not isinstance(username, str) or (user_id is not None and not isinstance(user_id, int)):
+        raise _credentials_exception()
+    claims = AccessClaims(
+        username=username,
+        user_id=user_id,
+        licensed=payload.get("lic") is True,
+        issued_at=payload.get("iat"),
+    )
+    if claims.user_id is not None and token_epochs.is_revoked(claims.user_id, claims.issued_at):
+        raise _credentials_exception()
+    return claims
+
 
-    user = db.query(models.User).filter(models.User.username == username).first()
-    if user is None:
-        raise credentials_exception
+def get_access_claims(token: str = Depends(oauth2_scheme)) -> AccessClaims:
+    return _claims_from_token(token)
+
+
+def revoke_user_tokens(user_id: int) -> None:
+    """Force a logout: reject every token issued to the user so far."""
+    token_epochs.revoke_user(user_id)
+    principal_cache.invalidate_user(user_id)
+
+
+def _license_required_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail="Valid license required. Please activate a license key to use this system."
+    )
+
+
+def _remember(principal: Principal) -> None:
+    # Only licensed principals are cached: a license activated through another
+    # worker must take effect immediately, while a revoked one may linger for
+    # the cache TTL.
+    if principal.has_license:
+        principal_cache.put(principal.username, principal)
+
+
+def _cached_principal(claims: AccessClaims) -> Optional[Principal]:
+    principal = principal_cache.get(claims.username)
+    if principal is not None and claims.matches(principal.id):
+        return principal
+    return None
+
+
+def _claimed_user(db: Session, claims: AccessClaims) -> models.User:
+    """Build the ``User`` named by the token without querying; other columns lazy-load."""
+    user = models.User(id=claims.user_id, username=claims.username)
+    make_transient_to_detached(user)
+    return db.merge(user, load=False)
+
+
+def get_current_user(
+    db: Session = Depends(get_read_db),
+    claims: AccessClaims = Depends(get_access_claims),
+) -> models.User:
+    principal = _cached_principal(claims)
+    if principal is not None:
+        return principal.attach(db)
+    if claims.trusts_license:
+        return _claimed_user(db, claims)
+
+    user = (
+        db.query(models.User)
+        .options(selectinload(models.User.license))
+        .filter(models.User.username == claims.username)
+        .first()
+    )
+    if user is None or not claims.matches(user.id):
+        raise _credentials_exception()
+    _remember(Principal.from_user(user))
     return user
 
 
 def get_licensed_user(
     current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    claims: AccessClaims = Depends(get_access_claims),
 ) -> models.User:
     """Ensure user has both valid authentication and a valid license"""
     from app.services import license as license_service
-    
-    if not license_service.check_user_has_license(current_user):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Valid license required. Please activate a license key to use this system."
-        )
-    return current_user
\ No newline at end of file
+
+    if claims.trusts_license:
+        return current_user
+    principal = principal_cache.get(current_user.username)
+    if principal is not None and principal.id == current_user.id:
+        has_license = principal.has_license
+    else:
+        has_license = license_service.check_user_has_license(current_user)
+    if not has_license:
+        raise _license_required_exception()
+    return current_user
+
+
+async def get_licensed_user_async(
+    db: AsyncSession = Depends(get_async_db),
+    token: str = Depends(oauth2_scheme),
+) -> models.User:
+    """Async counterpart of ``get_licensed_user`` for handlers running on the event loop.
+
+    The license relationship is loaded eagerly because lazy loads are not
+    available on an ``AsyncSession``.
+    """
+    from app.services import license as license_service
+
+    claims = _claims_from_token(token)
+    principal = _cached_principal(claims)
+    if principal is not None:
+        return await db.run_sync(principal.attach)
+    if claims.trusts_license:
+        return await db.run_sync(_claimed_user, claims)
+
+    result = await db.execute(
+        select(models.User)
+        .options(selectinload(models.User.license))
+        .where(models.User.username == claims.username)
+    )
+    user = result.scalars().first()
+    if user is None or not claims.matches(user.id):
+        raise _credentials_exception()
+    if not license_service.check_user_has_license(user):
+        raise _license_required_exception()
+    _remember(Principal.from_user(user))
+    return user
@@ -0,0 +1,273 @@
+"""Cycle checks over each project's task dependency graph.
+
+Cycle detection used to walk the graph with one ``SELECT`` per visited task.
+Two strategies replace it, chosen with ``DEPENDENCY_CYCLE_CHECK``:
+
+* ``memory`` (default): an in-memory index keeps every cached project's
+  edges in adjacency sets, so a check costs one version lookup (plus one edge
+  query when the cache is cold) whatever the depth of the graph.
+* ``sql``: a single ``WITH RECURSIVE`` query walks the graph in the database.
+  It keeps no state in the process, which suits deployments with many
+  workers that would each hold their own copy of the index.
+
+Each cached graph is tagged with the ``Project.version`` it was loaded at.
+Changes committed in this process are applied incrementally through
+``app.services.project_changes``, and the tag moves with them, as long as
+the cached graph was current when the transaction started. Writes from other
+workers leave the tag behind the database, and the graph is reloaded on its
+next use.
+"""
+
+import threading
+from collections import OrderedDict, defaultdict, deque
+from itertools import chain
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import Integer, exists, literal, select
+from sqlalchemy.orm import Session
+
+import app.models as models
+from app.core import config
+from app.services import project_changes
+from app.services.project_changes import Changes
+
+
+class ProjectGraph:
+    """Adjacency sets of one project's dependency edges."""
+
+    def __init__(self, version: Optional[int], edges: Iterable[Tuple[int, int]] = ()) -> None:
+        self.version = version
+        # depends_on task -> tasks that depend on it, and the reverse.
+        self.downstream: Dict[int, Set[int]] = defaultdict(set)
+        self.upstream: Dict[int, Set[int]] = defaultdict(set)
+        for depends_on_task_id, dependent_task_id in edges:
+            self.add_edge(depends_on_task_id, dependent_task_id)
+
+    def add_edge(self, depends_on_task_id: int, dependent_task_id: int) -> None:
+        self.downstream[depends_on_task_id].add(dependent_task_id)
+        self.upstream[dependent_task_id].add(depends_on_task_id)
+
+    def remove_edge(self, depends_on_task_id: int, dependent_task_id: int) -> None:
+        self.downstream.get(depends_on_task_id, set()).discard(dependent_task_id)
+        self.upstream.get(dependent_task_id, set()).discard(depends_on_task_id)
+
+    def remove_task(self, task_id: int) -> None:
+        for dependent_task_id in self.downstream.pop(task_id, set()):
+            self.upstream.get(dependent_task_id, set()).discard(task_id)
+        for depends_on_task_id in self.upstream.pop(task_id, set()):
+            self.downstream.get(depends_on_task_id, set()).discard(task_id)
+
+    def reaches(self, start_task_id: int, target_task_id: int) -> bool:
+        """Whether ``target`` is downstream of (or is) ``start``."""
+        stack = [start_task_id]
+        visited: Set[int] = set()
+        while stack:
+            current = stack.pop()
+            if current == target_task_id:
+                return True
+            if current in visited:
+                continue
+            visited.add(current)
+            stack.extend(self.downstream.get(current, ()))
+        return False
+
+
+class DependencyGraphIndex:
+    """Thread-safe LRU of ``ProjectGraph`` objects keyed by project id."""
+
+    def __init__(self, max_projects: int = config.DEPENDENCY_GRAPH_CACHE_PROJECTS) -> None:
+        self.max_projects = max_projects
+        self._lock = threading.Lock()
+        self._graphs: "OrderedDict[int, ProjectGraph]" = OrderedDict()
+
+    def creates_cycle(self, db: Session, project_id: int, depends_on_task_id: int, dependent_task_id: int) -> bool:
+        """Whether adding ``depends_on -> dependent`` would close a cycle."""
+        # Read the version before the edges: a graph tagged with an older
+        # version than its edges is merely reloaded early, never trusted stale.
+        version = db.scalar(select(models.Project.version).where(models.Project.id == project_id))
+        with self._lock:
+            graph = self._graphs.get(project_id)
+            if graph is not None and version is not None and graph.version == version:
+                self._graphs.move_to_end(project_id)
+                return graph.reaches(dependent_task_id, depends_on_task_id)
+
+        graph = ProjectGraph(version, db.execute(project_edges_statement(project_id)).all())
+        with self._lock:
+            self._store(project_id, graph)
+            return graph.reaches(dependent_task_id, depends_on_task_id)
+
+    def apply(self, changes: Changes) -> None:
+        """Patch cached graphs with the changes of a committed transaction."""
+        with self._lock:
+            if None in changes:
+                self._graphs.clear()
+                return
+            for project_id, changed in changes.items():
+                graph = self._graphs.get(project_id)
+                if graph is None:
+                    continue
+                if not changed.follows(graph.version):
+                    # Another transaction got in between; reload on next use.
+                    del self._graphs[project_id]
+                    continue
+                for operation in changed.operations:
+                    if operation[0] == "add_edge":
+                        graph.add_edge(operation[2], operation[3])
+                    elif operation[0] == "remove_edge":
+                        graph.remove_edge(operation[2], operation[3])
+                    elif operation[0] == "remove_task":
+                        graph.remove_task(operation[1])
+                graph.version = changed.last_version
+
+    def get(self, project_id: int) -> Optional[ProjectGraph]:
+        with self._lock:
+            return self._graphs.get(project_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._graphs.clear()
+
+    def __len__(self) -> int:
+        return len(self._graphs)
+
+    def _store(self, project_id: int, graph: ProjectGraph) -> None:
+        if self.max_projects <= 0:
+            return
+        self._graphs[project_id] = graph
+        self._graphs.move_to_end(project_id)
+        while len(self._graphs) > self.max_projects:
+            self._graphs.popitem(last=False)
+
+
+def project_edges_statement(project_id: int):
+    """``(depends_on_task_id, dependent_task_id)`` for every edge in the project."""
+    return projects_edges_statement([project_id])
+
+
+def projects_edges_statement(project_ids: Iterable[int]):
+    """``(depends_on_task_id, dependent_task_id)`` for every edge in the projects."""
+    return (
+        select(models.TaskDependency.depends_on_task_id, models.TaskDependency.dependent_task_id)
+        .join(models.Task, models.Task.id == models.TaskDependency.dependent_task_id)
+        .where(models.Task.project_id.in_(list(project_ids)))
+    )
+
+
+def reachable_statement(project_id: int, start_task_id: int, target_task_id: int):
+    """One query answering whether ``target`` is downstream of (or is) ``start``.
+
+    ``UNION`` rather than ``UNION ALL`` discards tasks already reached, so the
+    walk terminates even on a graph that somehow contains a cycle.
+    """
+    edge = models.TaskDependency
+    reachable = select(literal(start_task_id, Integer).label("task_id")).cte("reachable", recursive=True)
+    reachable = reachable.union(
+        select(edge.dependent_task_id)
+        .join(reachable, edge.depends_on_task_id == reachable.c.task_id)
+        .join(models.Task, models.Task.id == edge.dependent_task_id)
+        .where(models.Task.project_id == project_id)
+    )
+    return select(exists().where(reachable.c.task_id == target_task_id))
+
+
+def neighbourhood(
+    db: Session, task_id: int, direction: str, depth: int
+) -> Tuple[Set[int], Dict[int, Tuple[int, int, int]]]:
+    """Tasks within ``depth`` edges of ``task_id``, and the edges walked to reach them.
+
+    ``direction`` is ``"up"`` (what the task waits on), ``"down"`` (what waits
+    on it) or ``"both"``. The walk is a breadth-first search issuing one query
+    per level and direction, so its cost follows the size of the
+    neighbourhood rather than of the project.
+    """
+    edge = models.TaskDependency
+    tasks: Set[int] = {task_id}
+    edges: Dict[int, Tuple[int, int, int]] = {}
+    walks = {"up": (False,), "down": (True,), "both": (False, True)}[direction]
+    for downstream in walks:
+        near_column = edge.depends_on_task_id if downstream else edge.dependent_task_id
+        seen = {task_id}
+        frontier = {task_id}
+        for _ in range(depth):
+            if not frontier:
+                break
+            rows = db.execute(
+                select(edge.id, edge.depends_on_task_id, edge.dependent_task_id).where(near_column.in_(frontier))
+            ).all()
+            frontier = set()
+            for dependency_id, depends_on_id, dependent_id in rows:
+                edges[dependency_id] = (dependency_id, depends_on_id, dependent_id)
+                neighbour = dependent_id if downstream else depends_on_id
+                if neighbour not in seen:
+                    seen.add(neighbour)
+                    frontier.add(neighbour)
+        tasks |= seen
+    return tasks, edges
+
+
+def cyclic_additions(existing: Iterable[Tuple[int, int]], additions: Sequence[Tuple[int, int]]) -> Set[int]:
+    """Indexes of ``additions`` that would close a cycle, taken in order.
+
+    One topological sort (Kahn's algorithm) of the existing edges plus all the
+    additions settles the common case: if every task gets sorted, the union is
+    acyclic and nothing is rejected. Otherwise only additions between tasks
+    left unsorted can lie on a cycle. Those are re-checked one at a time, in
+    request order, against the graph of everything else, so an edge is
+    rejected exactly when creating the edges one by one would have rejected it.
+    """
+    existing = list(existing)
+    indegree: Dict[int, int] = defaultdict(int)
+    downstream: Dict[int, List[int]] = defaultdict(list)
+    for depends_on_task_id, dependent_task_id in chain(existing, additions):
+        downstream[depends_on_task_id].append(dependent_task_id)
+        indegree[dependent_task_id] += 1
+        indegree.setdefault(depends_on_task_id, 0)
+
+    ready = deque(task_id for task_id, count in indegree.items() if count == 0)
+    while ready:
+        task_id = ready.popleft()
+        for dependent_task_id in downstream.get(task_id, ()):
+            indegree[dependent_task_id] -= 1
+            if indegree[dependent_task_id] == 0:
+                ready.append(dependent_task_id)
+    unsorted = {task_id for task_id, count in indegree.items() if count > 0}
+    if not unsorted:
+        return set()
+
+    suspects = [
+        index
+        for index, (depends_on_task_id, dependent_task_id) in enumerate(additions)
+        if depends_on_task_id in unsorted and dependent_task_id in unsorted
+    ]
+    suspect_set = set(suspects)
+    graph = ProjectGraph(
+        None,
+        chain(existing, (edge for index, edge in enumerate(additions) if index not in suspect_set)),
+    )
+    rejected: Set[int] = set()
+    for index in suspects:
+        depends_on_task_id, dependent_task_id = additions[index]
+        if graph.reaches(dependent_task_id, depends_on_task_id):
+            rejected.add(index)
+        else:
+            graph.add_edge(depends_on_task_id, dependent_task_id)
+    return rejected
+
+
+def creates_cycle(
+    db: Session,
+    project_id: int,
+    depends_on_task_id: int,
+    dependent_task_id: int,
+    strategy: Optional[str] = None,
+) -> bool:
+    """Whether adding ``depends_on -> dependent`` would close a cycle."""
+    if (strategy or config.DEPENDENCY_CYCLE_CHECK) == "sql":
+        return bool(db.scalar(reachable_statement(project_id, dependent_task_id, depends_on_task_id)))
+    return dependency_graphs.creates_cycle(db, project_id, depends_on_task_id, dependent_task_id)
+
+
+dependency_graphs = DependencyGraphIndex()
+
+
+project_changes.on_commit(dependency_graphs.apply)
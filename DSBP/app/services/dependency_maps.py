@@ -0,0 +1,405 @@
+"""Per-project cache of the dependency map.
+
+``GET /dependency-map`` used to load every accessible task and edge and
+rebuild the nodes, edges, chains and convergences on each call. Dependencies
+never cross projects, so a user's map is the merge of the maps of the
+projects they can access. Each project's map is cached with the
+``Project.version`` it reflects. Committed changes patch it in place (see
+``app.services.project_changes``), and a request only loads the projects
+whose version moved on since they were cached.
+
+Every list in a map is ordered by task, edge or chain-head id, so merging the
+per-project pieces gives the same response as building the whole map at once.
+"""
+
+import heapq
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import select
+
+import app.models as models
+import app.schemas as schemas
+from app.core import config
+from app.services import graph_layout, project_changes
+from app.services.project_changes import Changes
+
+# (dependency id, depends_on task id, dependent task id)
+Edge = Tuple[int, int, int]
+
+
+class CompactGraph:
+    """Dependency edges between ``node_count`` tasks, stored CSR-style in flat arrays.
+
+    Tasks are numbered ``0 .. node_count - 1``. The successors of node ``i``
+    are ``targets[offsets[i]:offsets[i + 1]]`` and its predecessors
+    ``sources[in_offsets[i]:in_offsets[i + 1]]``, both in the order their
+    edges were first seen. Repeated edges are stored once. Six integer arrays
+    replace the per-task dicts of Python lists the map used to be built from.
+    """
+
+    def __init__(self, node_count: int, pairs: Iterable[Tuple[int, int]]) -> None:
+        self.node_count = node_count
+        seen = set()
+        heads = array("l")
+        tails = array("l")
+        for head, tail in pairs:
+            key = head * node_count + tail
+            if key not in seen:
+                seen.add(key)
+                heads.append(head)
+                tails.append(tail)
+        self.outdegree = array("l", [0]) * node_count
+        self.indegree = array("l", [0]) * node_count
+        for head in heads:
+            self.outdegree[head] += 1
+        for tail in tails:
+            self.indegree[tail] += 1
+        self.offsets, self.targets = self._bucket(self.outdegree, heads, tails)
+        self.in_offsets, self.sources = self._bucket(self.indegree, tails, heads)
+
+    @staticmethod
+    def _bucket(degrees: array, keys: array, values: array) -> Tuple[array, array]:
+        # Counting sort of ``values`` by ``keys``; stable, so first-seen order is kept.
+        offsets = array("l", [0]) * (len(degrees) + 1)
+        for node, degree in enumerate(degrees):
+            offsets[node + 1] = offsets[node] + degree
+        cursor = offsets[:-1]
+        bucketed = array("l", [0]) * len(values)
+        for key, value in zip(keys, values):
+            bucketed[cursor[key]] = value
+            cursor[key] += 1
+        return offsets, bucketed
+
+    def successors(self, node: int) -> array:
+        return self.targets[self.offsets[node]:self.offsets[node + 1]]
+
+    def predecessors(self, node: int) -> array:
+        return self.sources[self.in_offsets[node]:self.in_offsets[node + 1]]
+
+    def chains(self) -> List[List[int]]:
+        """Maximal runs of single-successor, single-predecessor links, by head node.
+
+        Every node is visited at most twice (as a candidate head and as a link),
+        so detection is linear in the size of the graph.
+        """
+        outdegree, indegree, offsets, targets = self.outdegree, self.indegree, self.offsets, self.targets
+        in_offsets, sources = self.in_offsets, self.sources
+        in_chain = bytearray(self.node_count)
+        chains: List[List[int]] = []
+        for node in range(self.node_count):
+            if in_chain[node] or outdegree[node] != 1:
+                continue
+            # A node whose only predecessor has no other successor is the middle
+            # of someone else's chain, not a head.
+            if indegree[node] == 1 and outdegree[sources[in_offsets[node]]] == 1:
+                continue
+            chain = [node]
+            in_chain[node] = 1
+            current = node
+            while outdegree[current] == 1:
+                following = targets[offsets[current]]
+                if indegree[following] != 1 or in_chain[following]:
+                    break
+                chain.append(following)
+                in_chain[following] = 1
+                current = following
+            if len(chain) > 1:
+                chains.append(chain)
+        return chains
+
+    def convergences(self) -> List[int]:
+        """Nodes with more than one predecessor, in node order."""
+        indegree = self.indegree
+        return [node for node in range(self.node_count) if indegree[node] > 1]
+
+
+def build_dependency_map(summaries: Sequence[schemas.TaskSummary], dependencies: Iterable[Edge]) -> schemas.DependencyMapOut:
+    """Assemble nodes, edges, linear chains, and convergences for the graph view."""
+    nodes: List[schemas.TaskSummary] = list({summary.id: summary for summary in summaries}.values())
+    index: Dict[int, int] = {summary.id: position for position, summary in enumerate(nodes)}
+    pairs: List[Tuple[int, int]] = []
+    edges: List[schemas.DependencyEdgeOut] = []
+    for dependency_id, depends_on_id, dependent_id in dependencies:
+        head = index.get(depends_on_id)
+        tail = index.get(dependent_id)
+        if head is None or tail is None:
+            continue
+        pairs.append((head, tail))
+        edges.append(schemas.DependencyEdgeOut(id=dependency_id, depends_on=nodes[head], dependent=nodes[tail]))
+
+    graph = CompactGraph(len(nodes), pairs)
+    return schemas.DependencyMapOut(
+        tasks=nodes,
+        edges=edges,
+        chains=[schemas.DependencyChainOut(tasks=[nodes[node] for node in chain]) for chain in graph.chains()],
+        convergences=[
+            schemas.DependencyConvergenceOut(
+                target=nodes[node],
+                sources=[nodes[source] for source in graph.predecessors(node)],
+            )
+            for node in graph.convergences()
+        ],
+    )
+
+
+def merge_dependency_maps(maps: Iterable[schemas.DependencyMapOut]) -> schemas.DependencyMapOut:
+    """Merge per-project maps whose lists are each ordered by id."""
+    maps = list(maps)
+    return schemas.DependencyMapOut(
+        tasks=list(heapq.merge(*(piece.tasks for piece in maps), key=lambda task: task.id)),
+        edges=list(heapq.merge(*(piece.edges for piece in maps), key=lambda edge: edge.id)),
+        chains=list(heapq.merge(*(piece.chains for piece in maps), key=lambda chain: chain.tasks[0].id)),
+        convergences=list(
+            heapq.merge(*(piece.convergences for piece in maps), key=lambda convergence: convergence.target.id)
+        ),
+    )
+
+
+class ProjectLayout:
+    """Layer and row of each of a project's tasks, ordered by task id."""
+
+    def __init__(self, task_ids: Sequence[int], layers: Sequence[int], orders: Sequence[int]) -> None:
+        self.task_ids = task_ids
+        self.layers = layers
+        self.orders = orders
+        self.width = max(orders, default=-1) + 1
+
+
+def layout_positions(layouts: Iterable[ProjectLayout]) -> List[schemas.TaskPositionOut]:
+    """Stack per-project layouts, each below the previous one, into task id order."""
+    pieces = []
+    offset = 0
+    for layout in layouts:
+        pieces.append(
+            [
+                schemas.TaskPositionOut(task_id=task_id, layer=layer, order=offset + order)
+                for task_id, layer, order in zip(layout.task_ids, layout.layers, layout.orders)
+            ]
+        )
+        offset += layout.width
+    return list(heapq.merge(*pieces, key=lambda position: position.task_id))
+
+
+def dependency_map_layout(dependency_map: schemas.DependencyMapOut) -> List[schemas.TaskPositionOut]:
+    """Lay out a map built outside the cache, such as a task's neighbourhood."""
+    maps: Dict[int, ProjectMap] = {}
+    for task in dependency_map.tasks:
+        project_map = maps.setdefault(task.project_id, ProjectMap(task.project_id, None, task.project_name))
+        project_map.titles[task.id] = task.title
+    for edge in dependency_map.edges:
+        maps[edge.dependent.project_id].edges[edge.id] = (edge.depends_on.id, edge.dependent.id)
+    return layout_positions(maps[project_id].layout() for project_id in sorted(maps))
+
+
+def compact_dependency_map(dependency_map: schemas.DependencyMapOut) -> schemas.DependencyMapCompactOut:
+    """Normalise a map so each task and project appears once, referenced by index."""
+    projects: Dict[int, int] = {}
+    project_rows: List[schemas.DependencyMapProjectOut] = []
+    index: Dict[int, int] = {}
+    tasks: List[schemas.DependencyMapTaskOut] = []
+    for task in dependency_map.tasks:
+        if task.project_id not in projects:
+            projects[task.project_id] = len(project_rows)
+            project_rows.append(schemas.DependencyMapProjectOut(id=task.project_id, name=task.project_name))
+        index[task.id] = len(tasks)
+        tasks.append(schemas.DependencyMapTaskOut(id=task.id, title=task.title, project=projects[task.project_id]))
+    positions = None
+    if dependency_map.positions is not None:
+        positions = [None] * len(tasks)
+        for position in dependency_map.positions:
+            positions[index[position.task_id]] = (position.layer, position.order)
+    return schemas.DependencyMapCompactOut(
+        positions=positions,
+        projects=project_rows,
+        tasks=tasks,
+        edges=[(edge.id, index[edge.depends_on.id], index[edge.dependent.id]) for edge in dependency_map.edges],
+        chains=[[index[task.id] for task in chain.tasks] for chain in dependency_map.chains],
+        convergences=[
+            (index[convergence.target.id], [index[source.id] for source in convergence.sources])
+            for convergence in dependency_map.convergences
+        ],
+    )
+
+
+class ProjectMap:
+    """Tasks and edges of one project, and the map built from them."""
+
+    def __init__(self, project_id: int, version: Optional[int], name: str) -> None:
+        self.project_id = project_id
+        self.version = version
+        self.name = name
+        self.titles: Dict[int, str] = {}
+        self.edges: Dict[int, Tuple[int, int]] = {}
+        self._rendered: Optional[schemas.DependencyMapOut] = None
+        self._layout: Optional[ProjectLayout] = None
+
+    def apply(self, operation: project_changes.Operation) -> None:
+        kind = operation[0]
+        if kind == "save_task":
+            self.titles[operation[1]] = operation[2]
+        elif kind == "remove_task":
+            task_id = operation[1]
+            self.titles.pop(task_id, None)
+            self.edges = {
+                edge_id: edge for edge_id, edge in self.edges.items() if task_id not in edge
+            }
+        elif kind == "add_edge":
+            self.edges[operation[1]] = (operation[2], operation[3])
+        elif kind == "remove_edge":
+            self.edges.pop(operation[1], None)
+        elif kind == "rename_project":
+            self.name = operation[1]
+        self._rendered = None
+        if kind != "rename_project":
+            self._layout = None
+
+    def render(self) -> schemas.DependencyMapOut:
+        if self._rendered is None:
+            summaries = [
+                schemas.TaskSummary(id=task_id, title=self.titles[task_id], project_id=self.project_id, project_name=self.name)
+                for task_id in sorted(self.titles)
+            ]
+            edges = [(edge_id, *self.edges[edge_id]) for edge_id in sorted(self.edges)]
+            self._rendered = build_dependency_map(summaries, edges)
+        return self._rendered
+
+    def layout(self) -> ProjectLayout:
+        if self._layout is None:
+            task_ids = sorted(self.titles)
+            index = {task_id: position for position, task_id in enumerate(task_ids)}
+            graph = CompactGraph(
+                len(task_ids),
+                (
+                    (index[depends_on_id], index[dependent_id])
+                    for depends_on_id, dependent_id in self.edges.values()
+                    if depends_on_id in index and dependent_id in index
+                ),
+            )
+            self._layout = ProjectLayout(task_ids, *graph_layout.layered_layout(graph))
+        return self._layout
+
+
+def project_map_statements(project_ids: Iterable[int]):
+    """Return the (tasks, dependencies) statements that load the given projects' maps.
+
+    Tasks are outer-joined so that projects without tasks still yield their name.
+    """
+    project_ids = list(project_ids)
+    tasks = (
+        select(models.Project.id, models.Project.name, models.Task.id, models.Task.title)
+        .outerjoin(models.Task, models.Task.project_id == models.Project.id)
+        .where(models.Project.id.in_(project_ids))
+    )
+    dependencies = (
+        select(
+            models.Task.project_id,
+            models.TaskDependency.id,
+            models.TaskDependency.depends_on_task_id,
+            models.TaskDependency.dependent_task_id,
+        )
+        .join(models.Task, models.Task.id == models.TaskDependency.dependent_task_id)
+        .where(models.Task.project_id.in_(project_ids))
+    )
+    return tasks, dependencies
+
+
+class DependencyMapCache:
+    """Thread-safe LRU of ``ProjectMap`` objects keyed by project id."""
+
+    def __init__(self, max_projects: int = config.DEPENDENCY_MAP_CACHE_PROJECTS) -> None:
+        self.max_projects = max_projects
+        self._lock = threading.Lock()
+        self._maps: "OrderedDict[int, ProjectMap]" = OrderedDict()
+
+    def lookup(
+        self, versions: Iterable[Tuple[int, int]], layouts: Optional[Dict[int, ProjectLayout]] = None
+    ) -> Tuple[Dict[int, schemas.DependencyMapOut], Dict[int, int]]:
+        """Split ``(project id, version)`` pairs into cached maps and stale projects.
+
+        When ``layouts`` is given, it receives the layout of each map found.
+        """
+        found: Dict[int, schemas.DependencyMapOut] = {}
+        stale: Dict[int, int] = {}
+        with self._lock:
+            for project_id, version in versions:
+                project_map = self._maps.get(project_id)
+                if project_map is not None and version is not None and project_map.version == version:
+                    self._maps.move_to_end(project_id)
+                    found[project_id] = project_map.render()
+                    if layouts is not None:
+                        layouts[project_id] = project_map.layout()
+                else:
+                    stale[project_id] = version
+        return found, stale
+
+    def load(
+        self,
+        versions: Dict[int, int],
+        task_rows,
+        dependency_rows,
+        layouts: Optional[Dict[int, ProjectLayout]] = None,
+    ) -> Dict[int, schemas.DependencyMapOut]:
+        """Build and cache maps from the rows of ``project_map_statements``.
+
+        ``versions`` must have been read before the rows, so that a map is
+        never tagged with a newer version than its contents. When ``layouts``
+        is given, it receives the layout of each map loaded.
+        """
+        maps: Dict[int, ProjectMap] = {}
+        for project_id, name, task_id, title in task_rows:
+            project_map = maps.setdefault(project_id, ProjectMap(project_id, versions.get(project_id), name))
+            if task_id is not None:
+                project_map.titles[task_id] = title
+        for project_id, dependency_id, depends_on_id, dependent_id in dependency_rows:
+            if project_id in maps:
+                maps[project_id].edges[dependency_id] = (depends_on_id, dependent_id)
+
+        with self._lock:
+            for project_id, project_map in maps.items():
+                self._store(project_id, project_map)
+                if layouts is not None:
+                    layouts[project_id] = project_map.layout()
+            return {project_id: project_map.render() for project_id, project_map in maps.items()}
+
+    def apply(self, changes: Changes) -> None:
+        """Patch cached maps with the changes of a committed transaction."""
+        with self._lock:
+            if None in changes:
+                self._maps.clear()
+                return
+            for project_id, changed in changes.items():
+                project_map = self._maps.get(project_id)
+                if project_map is None:
+                    continue
+                if not changed.follows(project_map.version):
+                    del self._maps[project_id]
+                    continue
+                for operation in changed.operations:
+                    project_map.apply(operation)
+                project_map.version = changed.last_version
+
+    def get(self, project_id: int) -> Optional[ProjectMap]:
+        with self._lock:
+            return self._maps.get(project_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._maps.clear()
+
+    def __len__(self) -> int:
+        return len(self._maps)
+
+    def _store(self, project_id: int, project_map: ProjectMap) -> None:
+        if self.max_projects <= 0:
+            return
+        self._maps[project_id] = project_map
+        self._maps.move_to_end(project_id)
+        while len(self._maps) > self.max_projects:
+            self._maps.popitem(last=False)
+
+
+dependency_maps = DependencyMapCache()
+project_changes.on_commit(dependency_maps.apply)
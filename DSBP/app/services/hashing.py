@@ -0,0 +1,109 @@
+"""Bounded executor for password hashing.
+
+bcrypt is deliberately slow, so hashing and verifying run on a small
+dedicated pool instead of the request threads. A login storm then occupies
+at most ``PASSWORD_HASH_WORKERS`` CPU slots, and at most
+``PASSWORD_HASH_MAX_PENDING`` requests wait for one. Anything beyond that is
+rejected with ``503`` straight away rather than queueing behind the burst
+and starving the cheap read endpoints of the shared threadpool.
+"""
+
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+from app.core import config, metrics
+
+PASSWORD_HASHES_REJECTED = metrics.registry.counter(
+    "dsbp_password_hash_rejected_total",
+    "Password hashing requests rejected because the hashing queue was full.",
+)
+PASSWORD_HASHES_PENDING = metrics.registry.gauge(
+    "dsbp_password_hash_pending",
+    "Password hashing requests running or waiting for a hashing worker.",
+)
+
+
+@lru_cache(maxsize=None)
+def crypt_context(rounds: int) -> CryptContext:
+    """Context hashing with ``rounds`` whose hashes of any other cost need updating."""
+    return CryptContext(
+        schemes=["bcrypt_sha256"],
+        deprecated="auto",
+        bcrypt_sha256__default_rounds=rounds,
+        bcrypt_sha256__min_rounds=rounds,
+        bcrypt_sha256__max_rounds=rounds,
+    )
+
+
+# Module-level so they can be pickled into a process pool.
+def _hash(password: str, rounds: int) -> str:
+    return crypt_context(rounds).hash(password)
+
+
+def _verify_and_update(password: str, hashed_password: str, rounds: int) -> Tuple[bool, Optional[str]]:
+    return crypt_context(rounds).verify_and_update(password, hashed_password)
+
+
+def _busy_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many authentication requests, please retry shortly",
+        headers={"Retry-After": "1"},
+    )
+
+
+class HashingExecutor:
+    """Fixed-size worker pool with a hard cap on queued plus running jobs."""
+
+    def __init__(
+        self,
+        workers: int = config.PASSWORD_HASH_WORKERS,
+        max_pending: int = config.PASSWORD_HASH_MAX_PENDING,
+        use_processes: bool = config.PASSWORD_HASH_USE_PROCESSES,
+        rounds: int = config.PASSWORD_HASH_ROUNDS,
+    ) -> None:
+        self.workers = workers
+        self.rounds = rounds
+        self.use_processes = use_processes
+        self._slots = threading.BoundedSemaphore(max(max_pending, workers))
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+
+    def _pool(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                pool_class = ProcessPoolExecutor if self.use_processes else ThreadPoolExecutor
+                self._executor = pool_class(max_workers=self.workers)
+            return self._executor
+
+    def run(self, fn, *args):
+        """Run ``fn(*args, rounds)`` on the pool and wait for it, or raise 503."""
+        if not self._slots.acquire(blocking=False):
+            PASSWORD_HASHES_REJECTED.inc()
+            raise _busy_exception()
+        PASSWORD_HASHES_PENDING.inc()
+        try:
+            return self._pool().submit(fn, *args, self.rounds).result()
+        finally:
+            PASSWORD_HASHES_PENDING.dec()
+            self._slots.release()
+
+    def hash(self, password: str) -> str:
+        return self.run(_hash, password)
+
+    def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        return self.run(_verify_and_update, password, hashed_password)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+
+hashing_executor = HashingExecutor()
@@ -0,0 +1,157 @@
+"""Cache of authenticated principals keyed by token subject.
+
+Authenticating a request used to cost a ``User`` lookup plus a lazy load of
+``user.license``. A cache hit rebuilds the ``User`` from the cached
+principal without touching the database. Entries are invalidated whenever a
+``User`` or ``UserLicense`` row is flushed or committed through the ORM.
+Changes made by other worker processes, or with bulk SQL, are picked up when
+the entry's TTL expires.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import chain
+from typing import Callable, Dict, Optional, Set
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+import app.models as models
+from app.core import config
+
+
+@dataclass(frozen=True)
+class Principal:
+    """The parts of a ``User`` that authentication and most handlers need."""
+
+    id: int
+    username: str
+    email: str
+    created_at: Optional[datetime]
+    has_license: bool
+
+    @classmethod
+    def from_user(cls, user: models.User) -> "Principal":
+        return cls(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            created_at=user.created_at,
+            has_license=user.license is not None,
+        )
+
+    def attach(self, db: Session) -> models.User:
+        """Return a ``User`` bound to ``db`` without issuing a query.
+
+        Attributes that are not cached (password hash, relationships) are
+        left unloaded and lazy-load on first access as usual.
+        """
+        user = models.User(id=self.id, username=self.username, email=self.email, created_at=self.created_at)
+        make_transient_to_detached(user)
+        return db.merge(user, load=False)
+
+
+class PrincipalCache:
+    """Thread-safe LRU cache whose entries also expire after a TTL."""
+
+    def __init__(
+        self,
+        max_entries: int = config.PRINCIPAL_CACHE_SIZE,
+        ttl_seconds: float = config.PRINCIPAL_CACHE_TTL_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._subjects_by_user_id: Dict[int, str] = {}
+
+    def get(self, subject: str) -> Optional[Principal]:
+        with self._lock:
+            entry = self._entries.get(subject)
+            if entry is None:
+                return None
+            principal, expires_at = entry
+            if expires_at <= self._clock():
+                self._remove(subject)
+                return None
+            self._entries.move_to_end(subject)
+            return principal
+
+    def put(self, subject: str, principal: Principal) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._remove(subject)
+            self._entries[subject] = (principal, self._clock() + self.ttl_seconds)
+            self._subjects_by_user_id[principal.id] = subject
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+
+    def invalidate(self, subject: str) -> None:
+        with self._lock:
+            self._remove(subject)
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            subject = self._subjects_by_user_id.get(user_id)
+            if subject is not None:
+                self._remove(subject)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._subjects_by_user_id.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, subject: str) -> None:
+        entry = self._entries.pop(subject, None)
+        if entry is not None and self._subjects_by_user_id.get(entry[0].id) == subject:
+            del self._subjects_by_user_id[entry[0].id]
+
+
+principal_cache = PrincipalCache()
+
+_PENDING_KEY = "dsbp_principal_invalidations"
+
+
+def _invalidate(subjects: Set[str], user_ids: Set[int]) -> None:
+    for subject in subjects:
+        principal_cache.invalidate(subject)
+    for user_id in user_ids:
+        principal_cache.invalidate_user(user_id)
+
+
+@event.listens_for(Session, "after_flush")
+def _invalidate_flushed_principals(session: Session, flush_context) -> None:
+    subjects, user_ids = session.info.setdefault(_PENDING_KEY, (set(), set()))
+    for instance in chain(session.new, session.dirty, session.deleted):
+        if isinstance(instance, models.User):
+            if instance.username is not None:
+                subjects.add(instance.username)
+            if instance.id is not None:
+                user_ids.add(instance.id)
+        elif isinstance(instance, models.UserLicense) and instance.user_id is not None:
+            user_ids.add(instance.user_id)
+    _invalidate(subjects, user_ids)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_principals(session: Session) -> None:
+    # Invalidate again once the change is visible: a request may have cached
+    # the pre-commit state between the flush and the commit.
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending is not None:
+        _invalidate(*pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_invalidations(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
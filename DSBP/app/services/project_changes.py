@@ -0,0 +1,135 @@
+"""Per-project changes made by a transaction, handed to in-memory caches on commit.
+
+Caches of per-project state (the dependency graph index, the dependency map
+cache) tag each entry with the ``Project.version`` it reflects. This module
+collects what a transaction did to each project: the versions
+``bump_project_version`` moved it through, plus the task, dependency and
+project rows flushed through the ORM (bulk statements record theirs with
+``record_operations``). Once the transaction commits, the
+listeners registered with ``on_commit`` receive the changes. A listener
+patches an entry in place only when ``ProjectChanges.follows`` confirms the
+entry was current when the transaction started, and drops it otherwise.
+Rolled back transactions are discarded.
+"""
+
+from dataclasses import dataclass, field
+from itertools import chain
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+import app.models as models
+
+# Operations, in flush order:
+#   ("save_task", task_id, title)
+#   ("remove_task", task_id)
+#   ("add_edge", dependency_id, depends_on_task_id, dependent_task_id)
+#   ("remove_edge", dependency_id, depends_on_task_id, dependent_task_id)
+#   ("rename_project", name)
+Operation = Tuple
+
+
+@dataclass
+class ProjectChanges:
+    """What one committed transaction did to one project."""
+
+    first_version: Optional[int] = None
+    last_version: Optional[int] = None
+    operations: List[Operation] = field(default_factory=list)
+    deleted: bool = False
+
+    def follows(self, cached_version: Optional[int]) -> bool:
+        """Whether an entry tagged ``cached_version`` can be patched with these changes."""
+        return (
+            not self.deleted
+            and self.first_version is not None
+            and cached_version is not None
+            and cached_version == self.first_version - 1
+        )
+
+
+# Changes keyed by project id; ``None`` collects changes whose project could
+# not be determined, which listeners must treat as touching every project.
+Changes = Dict[Optional[int], ProjectChanges]
+
+_PENDING_KEY = "dsbp_project_changes"
+_listeners: List[Callable[[Changes], None]] = []
+
+
+def on_commit(listener: Callable[[Changes], None]) -> Callable[[Changes], None]:
+    """Register ``listener`` to receive the changes of every committed transaction."""
+    _listeners.append(listener)
+    return listener
+
+
+def _pending(session: Session, project_id: Optional[int]) -> ProjectChanges:
+    return session.info.setdefault(_PENDING_KEY, {}).setdefault(project_id, ProjectChanges())
+
+
+def record_version(session: Session, project_id: int, version: Optional[int]) -> None:
+    """Note the version a write in ``session``'s transaction bumped the project to."""
+    pending = _pending(session, project_id)
+    if pending.first_version is None:
+        pending.first_version = version
+    pending.last_version = version
+
+
+def record_operations(session: Session, project_id: int, operations: Iterable[Operation]) -> None:
+    """Note changes a bulk statement made, which the flush listener cannot see."""
+    _pending(session, project_id).operations.extend(operations)
+
+
+def _changed(instance, attribute: str) -> bool:
+    return inspect(instance).attrs[attribute].history.has_changes()
+
+
+def _edge_project_id(session: Session, dependency: models.TaskDependency) -> Optional[int]:
+    # Both ends of an edge share a project; use whichever task is loaded.
+    for task_id in (dependency.dependent_task_id, dependency.depends_on_task_id):
+        task = session.identity_map.get(inspect(models.Task).identity_key_from_primary_key((task_id,)))
+        if task is not None:
+            return task.project_id
+    return None
+
+
+def _edge(dependency: models.TaskDependency) -> Tuple[int, int, int]:
+    return dependency.id, dependency.depends_on_task_id, dependency.dependent_task_id
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_project_changes(session: Session, flush_context) -> None:
+    for instance in chain(session.new, session.dirty):
+        if isinstance(instance, models.Task):
+            if instance in session.dirty and _changed(instance, "project_id"):
+                previous = inspect(instance).attrs.project_id.history.deleted
+                for project_id in previous:
+                    _pending(session, project_id).operations.append(("remove_task", instance.id))
+                _pending(session, instance.project_id).operations.append(("save_task", instance.id, instance.title))
+            elif instance in session.new or _changed(instance, "title"):
+                _pending(session, instance.project_id).operations.append(("save_task", instance.id, instance.title))
+        elif isinstance(instance, models.TaskDependency) and instance in session.new:
+            _pending(session, _edge_project_id(session, instance)).operations.append(("add_edge", *_edge(instance)))
+        elif isinstance(instance, models.Project) and instance in session.dirty and _changed(instance, "name"):
+            _pending(session, instance.id).operations.append(("rename_project", instance.name))
+
+    for instance in session.deleted:
+        if isinstance(instance, models.Task):
+            _pending(session, instance.project_id).operations.append(("remove_task", instance.id))
+        elif isinstance(instance, models.TaskDependency):
+            _pending(session, _edge_project_id(session, instance)).operations.append(("remove_edge", *_edge(instance)))
+        elif isinstance(instance, models.Project):
+            _pending(session, instance.id).deleted = True
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_project_changes(session: Session) -> None:
+    changes = session.info.pop(_PENDING_KEY, None)
+    if changes:
+        for listener in _listeners:
+            listener(changes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_project_changes(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
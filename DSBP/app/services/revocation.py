@@ -0,0 +1,150 @@
+"""Per-user cut-offs that take back trust in already issued access tokens.
+
+Access tokens carry the user id (``uid``), whether the user held a license
+when the token was issued (``lic``) and the issue time (``iat``), so most
+requests are authorised from the token alone. Two cut-offs per user limit
+that trust:
+
+* ``revoke_user`` forces a logout: tokens issued up to that moment are
+  rejected with ``401``.
+* ``distrust_license`` keeps the tokens valid but stops trusting their
+  ``lic`` claim, so the license is checked against the database again.
+
+Both are recorded automatically when a ``User`` is deleted or renamed, or a
+``UserLicense`` is deleted, through the ORM. The cut-offs live in process
+memory: changes committed by another worker process, or with raw SQL, must
+be recorded with these calls on every worker (or by rotating the signing
+key) to take effect before the tokens expire.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from itertools import chain
+from typing import Callable, Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+import app.models as models
+from app.core import config
+
+
+class _Cutoffs:
+    """User id -> cut-off time, oldest first, bounded in size.
+
+    Entries older than the token lifetime are dropped since every token they
+    cover has expired. When the list is full the oldest entry is evicted and
+    its cut-off raised to a floor for everyone, which errs on the side of
+    distrusting too many tokens rather than too few.
+    """
+
+    def __init__(self, max_entries: int, retention_seconds: float) -> None:
+        self.max_entries = max_entries
+        self.retention_seconds = retention_seconds
+        self.floor = 0.0
+        self._entries: "OrderedDict[int, float]" = OrderedDict()
+
+    def mark(self, user_id: int, now: float) -> None:
+        self._entries.pop(user_id, None)
+        self._entries[user_id] = now
+        while self._entries and next(iter(self._entries.values())) <= now - self.retention_seconds:
+            self._entries.popitem(last=False)
+        while len(self._entries) > max(self.max_entries, 0):
+            _, cutoff = self._entries.popitem(last=False)
+            self.floor = max(self.floor, cutoff)
+
+    def covers(self, user_id: int, issued_at: Optional[float]) -> bool:
+        cutoff = max(self.floor, self._entries.get(user_id, 0.0))
+        return issued_at is None or issued_at <= cutoff
+
+    def clear(self) -> None:
+        self.floor = 0.0
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class TokenEpochs:
+    """Thread-safe revocation and license cut-offs for access tokens."""
+
+    def __init__(
+        self,
+        max_entries: int = config.TOKEN_EPOCH_MAX_ENTRIES,
+        retention_seconds: float = config.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._revoked = _Cutoffs(max_entries, retention_seconds)
+        self._license = _Cutoffs(max_entries, retention_seconds)
+
+    def now(self) -> float:
+        """Issue time to stamp on new tokens, on the same clock as the cut-offs."""
+        return self._clock()
+
+    def revoke_user(self, user_id: int) -> None:
+        """Reject every token issued to ``user_id`` so far."""
+        with self._lock:
+            self._revoked.mark(user_id, self._clock())
+
+    def revoke_all(self) -> None:
+        """Reject every token issued so far, for all users."""
+        with self._lock:
+            self._revoked.floor = self._clock()
+
+    def distrust_license(self, user_id: int) -> None:
+        """Stop trusting the license claim of tokens issued to ``user_id`` so far."""
+        with self._lock:
+            self._license.mark(user_id, self._clock())
+
+    def is_revoked(self, user_id: int, issued_at: Optional[float]) -> bool:
+        with self._lock:
+            return self._revoked.covers(user_id, issued_at)
+
+    def trusts_license(self, user_id: int, issued_at: Optional[float]) -> bool:
+        with self._lock:
+            return not self._license.covers(user_id, issued_at)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._revoked.clear()
+            self._license.clear()
+
+    def __len__(self) -> int:
+        return len(self._revoked) + len(self._license)
+
+
+token_epochs = TokenEpochs()
+
+_PENDING_KEY = "dsbp_token_cutoffs"
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_token_cutoffs(session: Session, flush_context) -> None:
+    revoked, distrusted = session.info.setdefault(_PENDING_KEY, (set(), set()))
+    for instance in chain(session.dirty, session.deleted):
+        if isinstance(instance, models.User) and instance.id is not None:
+            if instance in session.deleted or inspect(instance).attrs.username.history.has_changes():
+                revoked.add(instance.id)
+        elif isinstance(instance, models.UserLicense) and instance in session.deleted:
+            if instance.user_id is not None:
+                distrusted.add(instance.user_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_token_cutoffs(session: Session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending is None:
+        return
+    revoked, distrusted = pending
+    for user_id in revoked:
+        token_epochs.revoke_user(user_id)
+    for user_id in distrusted:
+        token_epochs.distrust_license(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_token_cutoffs(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
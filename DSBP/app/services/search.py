@@ -0,0 +1,321 @@
+"""Full-text search over task titles, descriptions and comments.
+
+On SQLite the text lives in two external-content FTS5 tables,
+``task_search`` and ``comment_search``, whose rowids are the task and comment
+ids. Triggers on ``tasks`` and ``comments`` keep them in step with every
+write, including bulk statements and writes from other processes, and
+``bm25`` ranks the hits. On PostgreSQL both tables get a generated
+``search_vector`` column with a GIN index instead, ranked with ``ts_rank``.
+
+The index is installed whenever ``Base.metadata.create_all`` runs, so
+existing databases pick it up on the next start; a newly created FTS table is
+filled from the rows already present.
+"""
+
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import (
+    Float,
+    Integer,
+    Select,
+    cast,
+    column,
+    exists,
+    event,
+    func,
+    literal,
+    literal_column,
+    or_,
+    select,
+    table,
+    type_coerce,
+    union_all,
+)
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.expression import ColumnElement
+
+import app.models as models
+from app.api.pagination import Keyset
+from app.core import config
+from app.core.database import Base
+
+# Around matched terms in snippets; the response schema turns them into <mark>.
+SNIPPET_START = "\x02"
+SNIPPET_END = "\x03"
+SNIPPET_TOKENS = 16
+
+# Matches in a title count this many times as much as in a description.
+TITLE_WEIGHT = 4.0
+
+POSTGRES_TEXT_CONFIG = "english"
+
+SQLITE_TABLES = ("task_search", "comment_search")
+
+SQLITE_SCHEMA = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS task_search USING fts5("
+    "title, description, content='tasks', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS comment_search USING fts5("
+    "content, content='comments', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    """CREATE TRIGGER IF NOT EXISTS tasks_search_insert AFTER INSERT ON tasks BEGIN
+        INSERT INTO task_search(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS tasks_search_delete AFTER DELETE ON tasks BEGIN
+        INSERT INTO task_search(task_search, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS tasks_search_update AFTER UPDATE OF title, description ON tasks BEGIN
+        INSERT INTO task_search(task_search, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO task_search(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS comments_search_insert AFTER INSERT ON comments BEGIN
+        INSERT INTO comment_search(rowid, content) VALUES (new.id, new.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS comments_search_delete AFTER DELETE ON comments BEGIN
+        INSERT INTO comment_search(comment_search, rowid, content) VALUES ('delete', old.id, old.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS comments_search_update AFTER UPDATE OF content ON comments BEGIN
+        INSERT INTO comment_search(comment_search, rowid, content) VALUES ('delete', old.id, old.content);
+        INSERT INTO comment_search(rowid, content) VALUES (new.id, new.content);
+    END""",
+]
+
+POSTGRES_SCHEMA = [
+    f"""ALTER TABLE tasks ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('{POSTGRES_TEXT_CONFIG}', coalesce(title, '')), 'A')
+        || setweight(to_tsvector('{POSTGRES_TEXT_CONFIG}', coalesce(description, '')), 'B')
+    ) STORED""",
+    "CREATE INDEX IF NOT EXISTS ix_tasks_search_vector ON tasks USING gin (search_vector)",
+    f"""ALTER TABLE comments ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        to_tsvector('{POSTGRES_TEXT_CONFIG}', coalesce(content, ''))
+    ) STORED""",
+    "CREATE INDEX IF NOT EXISTS ix_comments_search_vector ON comments USING gin (search_vector)",
+]
+
+
+def install(connection) -> None:
+    """Create the search index and its triggers if the database lacks them."""
+    if connection.dialect.name == "postgresql":
+        for statement in POSTGRES_SCHEMA:
+            connection.exec_driver_sql(statement)
+        return
+    if connection.dialect.name != "sqlite":
+        return
+    present = {
+        name
+        for (name,) in connection.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name IN ('task_search', 'comment_search')"
+        )
+    }
+    for statement in SQLITE_SCHEMA:
+        connection.exec_driver_sql(statement)
+    for name in SQLITE_TABLES:
+        if name not in present:
+            connection.exec_driver_sql(f"INSERT INTO {name}({name}) VALUES ('rebuild')")
+
+
+def uninstall(connection) -> None:
+    """Drop the SQLite search tables; the triggers go with ``tasks`` and ``comments``."""
+    if connection.dialect.name == "sqlite":
+        for name in SQLITE_TABLES:
+            connection.exec_driver_sql(f"DROP TABLE IF EXISTS {name}")
+
+
+event.listen(Base.metadata, "after_create", lambda target, connection, **kw: install(connection))
+event.listen(Base.metadata, "before_drop", lambda target, connection, **kw: uninstall(connection))
+
+
+def match_expression(text: str) -> Optional[str]:
+    """FTS5 query matching rows that contain every word in ``text``.
+
+    Only word characters are kept, so user input can never be a malformed
+    FTS5 query. Words are matched whole: a prefix query would have FTS5 merge
+    the postings of every term sharing the prefix, which dominates the cost
+    of common words.
+    """
+    words: List[str] = re.findall(r"\w+", text)
+    if not words:
+        return None
+    return " ".join(f'"{word}"' for word in words)
+
+
+task_search = table("task_search", column("rowid", Integer))
+comment_search = table("comment_search", column("rowid", Integer))
+
+
+def _newest_matches(tasks: Select, comments: Select):
+    """Union of the newest ``SEARCH_RANKED_MATCHES`` task and comment matches.
+
+    Ranking has to score every match before the best can be picked, which
+    takes seconds for a word found in half of a million-row corpus. Walking
+    the matches newest first lets the index stop after the cap, and the
+    ranking function only runs on the rows kept.
+    """
+    limit = config.SEARCH_RANKED_MATCHES
+    parts = [part.limit(limit).subquery() for part in (tasks, comments)]
+    return union_all(*(select(part) for part in parts)).subquery("hits")
+
+
+def _sqlite_matches(text: str, access: ColumnElement) -> Optional[Tuple[Select, Select]]:
+    query = match_expression(text)
+    if query is None:
+        return None
+    # FTS5 takes the table itself as the MATCH operand and auxiliary function argument.
+    task_fts = literal_column("task_search")
+    comment_fts = literal_column("comment_search")
+    tasks = (
+        select(
+            literal("task").label("kind"),
+            models.Task.id.label("id"),
+            models.Task.id.label("task_id"),
+            type_coerce(func.bm25(task_fts, TITLE_WEIGHT, 1.0), Float).label("rank"),
+        )
+        .select_from(task_search)
+        .join(models.Task, models.Task.id == task_search.c.rowid)
+        .join(models.Project, models.Project.id == models.Task.project_id)
+        .where(task_fts.op("MATCH")(query), access)
+        .order_by(task_search.c.rowid.desc())
+    )
+    comments = (
+        select(
+            literal("comment").label("kind"),
+            models.Comment.id.label("id"),
+            models.Comment.task_id.label("task_id"),
+            type_coerce(func.bm25(comment_fts), Float).label("rank"),
+        )
+        .select_from(comment_search)
+        .join(models.Comment, models.Comment.id == comment_search.c.rowid)
+        .join(models.Task, models.Task.id == models.Comment.task_id)
+        .join(models.Project, models.Project.id == models.Task.project_id)
+        .where(comment_fts.op("MATCH")(query), access)
+        .order_by(comment_search.c.rowid.desc())
+    )
+    return tasks, comments
+
+
+def _postgres_matches(text: str, access: ColumnElement) -> Optional[Tuple[Select, Select]]:
+    if not re.search(r"\w", text):
+        return None
+    query = func.websearch_to_tsquery(POSTGRES_TEXT_CONFIG, text)
+    # ts_rank returns a single-precision real. Cast it to double precision so
+    # the rank in a cursor compares equal to the row it was taken from.
+    task_vector = literal_column("tasks.search_vector")
+    comment_vector = literal_column("comments.search_vector")
+    tasks = (
+        select(
+            literal("task").label("kind"),
+            models.Task.id.label("id"),
+            models.Task.id.label("task_id"),
+            (-cast(func.ts_rank(task_vector, query), Float)).label("rank"),
+        )
+        .join(models.Project, models.Project.id == models.Task.project_id)
+        .where(task_vector.op("@@")(query), access)
+        .order_by(models.Task.id.desc())
+    )
+    comments = (
+        select(
+            literal("comment").label("kind"),
+            models.Comment.id.label("id"),
+            models.Comment.task_id.label("task_id"),
+            (-cast(func.ts_rank(comment_vector, query), Float)).label("rank"),
+        )
+        .join(models.Task, models.Task.id == models.Comment.task_id)
+        .join(models.Project, models.Project.id == models.Task.project_id)
+        .where(comment_vector.op("@@")(query), access)
+        .order_by(models.Comment.id.desc())
+    )
+    return tasks, comments
+
+
+def _matches(dialect_name: str, text: str, access: ColumnElement) -> Optional[Tuple[Select, Select]]:
+    """The task and comment matches for ``text``, newest first, or None."""
+    if dialect_name == "postgresql":
+        return _postgres_matches(text, access)
+    return _sqlite_matches(text, access)
+
+
+def search_statement(dialect_name: str, text: str, access: ColumnElement) -> Optional[Tuple[Select, Keyset]]:
+    """Ranked hits for ``text`` among the rows ``access`` lets through, best first.
+
+    Returns the statement (to be paged with the returned ``Keyset``), or
+    ``None`` when ``text`` holds nothing to search for. Each row carries
+    ``kind`` ("task" or "comment"), ``id``, ``task_id``, ``rank``,
+    ``task_title``, ``project_id`` and ``project_name``; ``page_snippets``
+    adds the snippets.
+    """
+    matches = _matches(dialect_name, text, access)
+    if matches is None:
+        return None
+    hits = _newest_matches(*matches)
+    statement = (
+        select(
+            hits.c.kind,
+            hits.c.id,
+            hits.c.task_id,
+            hits.c.rank,
+            models.Task.title.label("task_title"),
+            models.Task.project_id,
+            models.Project.name.label("project_name"),
+        )
+        .select_from(hits)
+        .join(models.Task, models.Task.id == hits.c.task_id)
+        .join(models.Project, models.Project.id == models.Task.project_id)
+    )
+    return statement, Keyset(hits.c.rank, hits.c.kind, hits.c.id, descending=False)
+
+
+def truncated_statement(dialect_name: str, text: str, access: ColumnElement) -> Optional[Select]:
+    """Whether ``search_statement`` leaves matches of ``text`` unranked.
+
+    The statement selects one boolean: true when tasks or comments have more
+    than ``SEARCH_RANKED_MATCHES`` matches, so older ones may be missing from
+    the hits. It walks the same index as the search without ranking anything.
+    Returns ``None`` when ``text`` holds nothing to search for.
+    """
+    matches = _matches(dialect_name, text, access)
+    if matches is None:
+        return None
+    limit = config.SEARCH_RANKED_MATCHES
+    beyond_cap = [
+        exists(part.with_only_columns(literal(1), maintain_column_froms=True).limit(1).offset(limit))
+        for part in matches
+    ]
+    return select(or_(*beyond_cap))
+
+
+def page_snippets(db: Session, text: str, hits: Sequence) -> Dict[Tuple[str, int], str]:
+    """Snippets of the page's hits, keyed by ``(kind, id)``.
+
+    Highlighting is far costlier than ranking, so it runs on the page's rows
+    only, with at most one query per kind.
+    """
+    ids: Dict[str, List[int]] = {"task": [], "comment": []}
+    for hit in hits:
+        ids[hit.kind].append(hit.id)
+    if db.get_bind().dialect.name == "postgresql":
+        options = f"StartSel={SNIPPET_START}, StopSel={SNIPPET_END}, MaxWords=24, MinWords=8"
+        query = func.websearch_to_tsquery(POSTGRES_TEXT_CONFIG, text)
+        task_text = func.coalesce(models.Task.title, "") + " " + func.coalesce(models.Task.description, "")
+        statements = {
+            "task": select(models.Task.id, func.ts_headline(POSTGRES_TEXT_CONFIG, task_text, query, options)).where(
+                models.Task.id.in_(ids["task"])
+            ),
+            "comment": select(
+                models.Comment.id, func.ts_headline(POSTGRES_TEXT_CONFIG, models.Comment.content, query, options)
+            ).where(models.Comment.id.in_(ids["comment"])),
+        }
+    else:
+        query = match_expression(text)
+        statements = {}
+        for kind, fts_table, column_index in (("task", task_search, -1), ("comment", comment_search, 0)):
+            fts = literal_column(fts_table.name)
+            statements[kind] = select(
+                fts_table.c.rowid,
+                func.snippet(fts, column_index, SNIPPET_START, SNIPPET_END, "…", SNIPPET_TOKENS),
+            ).where(fts.op("MATCH")(query), fts_table.c.rowid.in_(ids[kind]))
+    snippets: Dict[Tuple[str, int], str] = {}
+    for kind, statement in statements.items():
+        if ids[kind]:
+            snippets.update(((kind, row_id), snippet) for row_id, snippet in db.execute(statement))
+    return snippets
@@ -0,0 +1,95 @@
+"""Per-project task counts by status, maintained as tasks are written.
+
+The dashboard used to count a project's tasks with ``GROUP BY status`` on
+every render, which grows with the project. ``project_status_counts`` holds
+one row per project and status instead. Every route that creates or deletes
+a task, or changes its status, passes the difference to ``adjust`` inside its
+own transaction, so the counters commit or roll back with the change and the
+dashboard reads a handful of rows by primary key.
+
+Writes made around the API (the database edited by hand, another tool) are
+not seen; ``rebuild`` recomputes the counters from ``tasks`` and runs by
+itself when the table is first created. ``rebuild_status_counts.py`` is its
+command-line front end.
+"""
+
+from typing import Dict, Iterable, Mapping, Optional, Tuple
+
+from sqlalchemy import delete, event, func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+import app.models as models
+
+# Status under which tasks without one are counted, as the dashboard reports them.
+UNKNOWN_STATUS = "unknown"
+
+# (project_id, status) -> change in the number of tasks.
+Deltas = Mapping[Tuple[int, Optional[str]], int]
+
+
+def adjust(db, changes: Deltas) -> None:
+    """Apply counter changes in the caller's transaction, with one statement.
+
+    The increment is an upsert computed in SQL, so concurrent writers cannot
+    lose an update.
+    """
+    rows = [
+        {"project_id": project_id, "status": status or UNKNOWN_STATUS, "count": delta}
+        for (project_id, status), delta in changes.items()
+        if delta
+    ]
+    if not rows:
+        return
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    statement = dialect.insert(models.ProjectStatusCount)
+    db.execute(
+        statement.on_conflict_do_update(
+            index_elements=[models.ProjectStatusCount.project_id, models.ProjectStatusCount.status],
+            set_={"count": models.ProjectStatusCount.count + statement.excluded.count},
+        ),
+        rows,
+    )
+
+
+def project_counts(db, project_id: int) -> Dict[str, int]:
+    """Tasks per status in the project, leaving out statuses with none."""
+    rows = db.execute(
+        select(models.ProjectStatusCount.status, models.ProjectStatusCount.count).where(
+            models.ProjectStatusCount.project_id == project_id,
+            models.ProjectStatusCount.count != 0,
+        )
+    )
+    return {status: count for status, count in rows}
+
+
+def rebuild(db, project_ids: Optional[Iterable[int]] = None) -> int:
+    """Recompute the counters from ``tasks``, for every project or just ``project_ids``.
+
+    ``db`` may be a session or a connection; the caller commits. Returns the
+    number of counter rows written.
+    """
+    status = func.coalesce(models.Task.status, UNKNOWN_STATUS)
+    counts = select(models.Task.project_id, status, func.count(models.Task.id)).group_by(
+        models.Task.project_id, status
+    )
+    clear = delete(models.ProjectStatusCount)
+    if project_ids is not None:
+        project_ids = list(project_ids)
+        counts = counts.where(models.Task.project_id.in_(project_ids))
+        clear = clear.where(models.ProjectStatusCount.project_id.in_(project_ids))
+    db.execute(clear)
+    result = db.execute(
+        insert(models.ProjectStatusCount).from_select(
+            [models.ProjectStatusCount.project_id, models.ProjectStatusCount.status, models.ProjectStatusCount.count],
+            counts,
+        )
+    )
+    return result.rowcount
+
+
+# A database created before the table existed gets counters for its tasks.
+event.listen(
+    models.ProjectStatusCount.__table__,
+    "after_create",
+    lambda target, connection, **kw: rebuild(connection),
+)
@@ -0,0 +1,145 @@
+"""Benchmark dependency cycle checks on large synthetic projects.
+
+Compares the original per-node DFS (one SELECT per visited task) with the
+recursive-CTE query and the in-memory graph index, on a throwaway SQLite
+database so the real one is never touched.
+
+    python benchmark_cycle_checks.py --edges 10000 100000
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List, Set, Tuple
+
+# Add project root directory to path
+ROOT = Path(__file__).resolve().parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session, sessionmaker
+
+import app.models as models
+from app.core.database import Base
+from app.services import dependency_graph
+from app.services.dependency_graph import DependencyGraphIndex
+
+# Average out-degree of the synthetic graphs.
+EDGES_PER_TASK = 5
+
+
+def per_node_dfs(db: Session, depends_on_task_id: int, dependent_task_id: int) -> bool:
+    """The cycle check these strategies replace: one query per visited task."""
+    stack = [dependent_task_id]
+    visited: Set[int] = set()
+    while stack:
+        current = stack.pop()
+        if current == depends_on_task_id:
+            return True
+        if current in visited:
+            continue
+        visited.add(current)
+        next_tasks = (
+            db.query(models.TaskDependency.dependent_task_id)
+            .filter(models.TaskDependency.depends_on_task_id == current)
+            .all()
+        )
+        stack.extend(dep_id for (dep_id,) in next_tasks)
+    return False
+
+
+def build_project(db: Session, edge_count: int, seed: int) -> Tuple[int, List[int]]:
+    """Create a project whose tasks form a random DAG with ``edge_count`` edges."""
+    rng = random.Random(seed)
+    user = models.User(username=f"bench{edge_count}", email=f"bench{edge_count}@example.com", hashed_password="-")
+    db.add(user)
+    db.flush()
+    project = models.Project(name=f"Benchmark {edge_count}", owner_id=user.id)
+    db.add(project)
+    db.flush()
+
+    task_count = max(edge_count // EDGES_PER_TASK, 2)
+    db.execute(
+        insert(models.Task),
+        [{"title": f"Task {index}", "project_id": project.id} for index in range(task_count)],
+    )
+    task_ids = [task_id for (task_id,) in db.query(models.Task.id).filter_by(project_id=project.id).order_by(models.Task.id)]
+
+    # Edges always point from a lower to a higher index, so the graph is acyclic.
+    edges = set()
+    while len(edges) < edge_count:
+        upstream, downstream = sorted(rng.sample(range(task_count), 2))
+        edges.add((task_ids[upstream], task_ids[downstream]))
+    db.execute(
+        insert(models.TaskDependency),
+        [{"depends_on_task_id": upstream, "dependent_task_id": downstream} for upstream, downstream in edges],
+    )
+    db.commit()
+    return project.id, task_ids
+
+
+def time_checks(label: str, checks: List[Tuple[int, int]], check: Callable[[int, int], bool]) -> List[bool]:
+    started = time.perf_counter()
+    results = [check(depends_on, dependent) for depends_on, dependent in checks]
+    elapsed = time.perf_counter() - started
+    print(f"  {label:<28} {elapsed * 1000 / len(checks):10.2f} ms/check")
+    return results
+
+
+def run(edge_count: int, check_count: int, seed: int) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{directory}/benchmark.db")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        project_id, task_ids = build_project(db, edge_count, seed)
+
+        # Closing edges from a late task back to an early one: the walk from the
+        # early task covers most of the graph before it finds (or misses) the target.
+        rng = random.Random(seed + 1)
+        quarter = max(len(task_ids) // 4, 1)
+        checks = [(rng.choice(task_ids[-quarter:]), rng.choice(task_ids[:quarter])) for _ in range(check_count)]
+
+        print(f"{edge_count} edges, {len(task_ids)} tasks, {check_count} checks")
+        expected = time_checks("per-node DFS", checks, lambda upstream, downstream: per_node_dfs(db, upstream, downstream))
+        results = {
+            "recursive CTE": time_checks(
+                "recursive CTE",
+                checks,
+                lambda upstream, downstream: dependency_graph.creates_cycle(
+                    db, project_id, upstream, downstream, strategy="sql"
+                ),
+            ),
+        }
+        index = DependencyGraphIndex()
+        started = time.perf_counter()
+        index.creates_cycle(db, project_id, *checks[0])
+        print(f"  {'in-memory index (load)':<28} {(time.perf_counter() - started) * 1000:10.2f} ms")
+        results["in-memory index"] = time_checks(
+            "in-memory index (warm)",
+            checks,
+            lambda upstream, downstream: index.creates_cycle(db, project_id, upstream, downstream),
+        )
+        for label, outcome in results.items():
+            if outcome != expected:
+                raise SystemExit(f"{label} disagrees with the per-node DFS")
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark dependency cycle checks")
+    parser.add_argument(
+        "--edges",
+        type=int,
+        nargs="+",
+        default=[10_000, 100_000],
+        help="Edge counts of the synthetic projects (default: 10000 100000)",
+    )
+    parser.add_argument("--checks", type=int, default=20, help="Cycle checks per strategy (default: 20)")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed (default: 1)")
+    args = parser.parse_args()
+    for edges in args.edges:
+        run(edges, args.checks, args.seed)
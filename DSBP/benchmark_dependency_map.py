@@ -0,0 +1,121 @@
+"""Benchmark the memory and time of the dependency map's graph core.
+
+Compares the per-task dicts of Python lists the map used to be built from
+with ``CompactGraph``, on a synthetic graph of long chains joined by random
+cross edges, and checks that both find the same chains and convergences.
+
+    python benchmark_dependency_map.py --nodes 200000
+"""
+import argparse
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+# Add project root directory to path
+ROOT = Path(__file__).resolve().parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app.services.dependency_maps import CompactGraph
+
+# Mean length of the synthetic chains, and cross edges per node.
+CHAIN_LENGTH = 20
+CROSS_EDGES_PER_NODE = 0.5
+
+
+def dict_graph(node_count: int, pairs: List[Tuple[int, int]]):
+    """The structure ``CompactGraph`` replaces, with its chain and convergence scans."""
+    indegree: Dict[int, int] = {node: 0 for node in range(node_count)}
+    outdegree: Dict[int, int] = {node: 0 for node in range(node_count)}
+    adjacency: Dict[int, List[int]] = {node: [] for node in range(node_count)}
+    reverse_adj: Dict[int, List[int]] = {node: [] for node in range(node_count)}
+    for head, tail in pairs:
+        if tail not in adjacency[head]:
+            adjacency[head].append(tail)
+            reverse_adj[tail].append(head)
+            outdegree[head] += 1
+            indegree[tail] += 1
+
+    chains = []
+    visited = set()
+    for node in range(node_count):
+        if node in visited:
+            continue
+        is_middle_link = indegree[node] == 1 and outdegree[reverse_adj[node][0]] == 1
+        if not is_middle_link and outdegree[node] == 1:
+            chain = [node]
+            visited.add(node)
+            current = node
+            while outdegree[current] == 1:
+                following = adjacency[current][0]
+                if indegree[following] != 1 or following in chain:
+                    break
+                chain.append(following)
+                visited.add(following)
+                current = following
+            if len(chain) > 1:
+                chains.append(chain)
+    convergences = [(node, sources) for node, sources in reverse_adj.items() if len(sources) > 1]
+    return (indegree, outdegree, adjacency, reverse_adj), chains, convergences
+
+
+def compact_graph(node_count: int, pairs: List[Tuple[int, int]]):
+    graph = CompactGraph(node_count, pairs)
+    convergences = [(node, list(graph.predecessors(node))) for node in graph.convergences()]
+    return graph, graph.chains(), convergences
+
+
+def synthetic_pairs(node_count: int, seed: int) -> List[Tuple[int, int]]:
+    """Chains of consecutive nodes, plus forward cross edges between random nodes."""
+    rng = random.Random(seed)
+    pairs = []
+    node = 0
+    while node < node_count - 1:
+        length = rng.randint(2, CHAIN_LENGTH * 2)
+        end = min(node + length, node_count - 1)
+        pairs.extend((link, link + 1) for link in range(node, end))
+        node = end + 1
+    for _ in range(int(node_count * CROSS_EDGES_PER_NODE)):
+        head, tail = sorted(rng.sample(range(node_count), 2))
+        pairs.append((head, tail))
+    return pairs
+
+
+def measure(label: str, build: Callable, node_count: int, pairs: List[Tuple[int, int]]):
+    # Timed without tracemalloc, which slows allocation-heavy code severalfold.
+    started = time.perf_counter()
+    build(node_count, pairs)
+    elapsed = time.perf_counter() - started
+    tracemalloc.start()
+    structure, chains, convergences = build(node_count, pairs)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {label:<16} {peak / 2**20:8.1f} MiB peak {elapsed * 1000:10.1f} ms")
+    del structure
+    return chains, convergences
+
+
+def run(node_count: int, seed: int) -> None:
+    pairs = synthetic_pairs(node_count, seed)
+    print(f"{node_count} nodes, {len(pairs)} edges")
+    expected = measure("dicts of lists", dict_graph, node_count, pairs)
+    if measure("CompactGraph", compact_graph, node_count, pairs) != expected:
+        raise SystemExit("CompactGraph disagrees with the dict-based graph")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the dependency map graph core")
+    parser.add_argument(
+        "--nodes",
+        type=int,
+        nargs="+",
+        default=[200_000],
+        help="Node counts of the synthetic graphs (default: 200000)",
+    )
+    parser.add_argument("--seed", type=int, default=1, help="Random seed (default: 1)")
+    args = parser.parse_args()
+    for nodes in args.nodes:
+        run(nodes, args.seed)
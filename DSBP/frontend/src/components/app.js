@@ -1538,7 +1538,7 @@ const modalAddTask = document.getElementById("modal-add-task");
 const taskDetailPanel = document.getElementById("task-detail-panel");
 
 // API Request Helper
-async function apiRequest(path, options = {}) {
+async function apiFetch(path, options = {}) {
   const headers = options.headers || {};
   if (token) {
     headers["Authorization"] = `Bearer ${token}`;
@@ -1565,13 +1565,31 @@ async function apiRequest(path, options = {}) {
     throw new Error(message || "Request failed");
   }
 
+  return response;
+}
+
+async function apiRequest(path, options = {}) {
+  const response = await apiFetch(path, options);
   if (response.status === 204) {
     return null;
   }
-
   return response.json();
 }
 
+// List endpoints are paginated; follow X-Next-Cursor until the last page.
+async function apiRequestAll(path) {
+  const items = [];
+  let cursor = null;
+  do {
+    const separator = path.includes("?") ? "&" : "?";
+    const pagePath = cursor ? `${path}${separator}cursor=${encodeURIComponent(cursor)}` : path;
+    const response = await apiFetch(pagePath);
+    items.push(...(await response.json()));
+    cursor = response.headers.get("X-Next-Cursor");
+  } while (cursor);
+  return items;
+}
+
 // Authentication
 function redirectToLogin() {
   window.location.href = "/login";
@@ -1604,7 +1622,7 @@ async function initializeApp() {
 
   try {
     currentUser = await apiRequest("/users/me");
-    allUsers = await apiRequest("/users");
+    allUsers = await apiRequestAll("/users");
 
     if (currentUsernameEl) {
       currentUsernameEl.textContent = currentUser.username;
@@ -1646,7 +1664,7 @@ async function initializeApp() {
 // Load Projects
 async function loadProjects() {
   try {
-    allProjects = await apiRequest("/projects");
+    allProjects = await apiRequestAll("/projects");
     renderProjects();
     renderDashboardProjectInfo();
     populateProjectSettingsForm();
@@ -2011,10 +2029,16 @@ async function loadHistoryForMonth(projectId) {
       start_date: formatDateKey(start),
       end_date: formatDateKey(end),
     });
-    const response = await apiRequest(`/projects/${projectId}/task-history?${params.toString()}`);
+    let response = await apiRequest(`/projects/${projectId}/task-history?${params.toString()}`);
     historyDailyCounts = response.daily_counts || {};
+    const activities = [...(response.activities || [])];
+    while (response.next_cursor) {
+      params.set("cursor", response.next_cursor);
+      response = await apiRequest(`/projects/${projectId}/task-history?${params.toString()}`);
+      activities.push(...(response.activities || []));
+    }
     historyActivitiesByDay = {};
-    (response.activities || []).forEach((activity) => {
+    activities.forEach((activity) => {
       const key = formatDateKey(new Date(activity.created_at));
       if (!historyActivitiesByDay[key]) {
         historyActivitiesByDay[key] = [];
@@ -2073,7 +2097,7 @@ async function selectProject(projectId) {
 // Load Tasks
 async function loadTasks(projectId) {
   try {
-    allTasks = await apiRequest(`/projects/${projectId}/tasks`);
+    allTasks = await apiRequestAll(`/projects/${projectId}/tasks`);
     renderTaskBoard();
   } catch (error) {
     console.error("Failed to load tasks:", error);
@@ -2203,7 +2227,7 @@ async function openTaskDetail(taskId) {
 
   // Load comments
   try {
-    const comments = await apiRequest(`/tasks/${taskId}/comments`);
+    const comments = await apiRequestAll(`/tasks/${taskId}/comments`);
     currentTask.comments = comments;
   } catch (error) {
     console.error("Failed to load comments:", error);
@@ -2462,7 +2486,7 @@ async function addComment(content) {
     });
 
     // Reload comments
-    const comments = await apiRequest(`/tasks/${currentTask.id}/comments`);
+    const comments = await apiRequestAll(`/tasks/${currentTask.id}/comments`);
     currentTask.comments = comments;
     renderTaskDetail();
 
@@ -3221,7 +3245,8 @@ async function loadDependencyData(force = false) {
     return;
   }
   try {
-    dependencyMapData = await apiRequest("/dependency-map");
+    // Positions are computed (and cached) by the server, so the graph only has to be drawn.
+    dependencyMapData = await apiRequest("/dependency-map?layout=true");
     dependencyDataLoaded = true;
     renderDependencyView();
   } catch (error) {
@@ -3471,13 +3496,18 @@ function renderVisGraph(data) {
     return;
   }
 
+  // Server-side layout: layer is the column, order the row within it
+  const positions = new Map((data.positions || []).map(position => [position.task_id, position]));
+
   // 1. Create nodes with project-based colors
   const nodes = new vis.DataSet(
     data.tasks.map(task => {
       const projectColor = getProjectColor(task.project_id);
+      const position = positions.get(task.id);
       return {
         id: task.id,
         label: task.title,
+        ...(position ? { x: position.layer * 200, y: position.order * 100 } : {}),
         group: task.project_id, // Group nodes by project
         color: {
           background: projectColor.background,
@@ -3515,7 +3545,7 @@ function renderVisGraph(data) {
 
   // 4. Define options
   const options = {
-    layout: {
+    layout: positions.size > 0 ? { hierarchical: false } : {
       hierarchical: {
         direction: "LR", // Left-to-Right
         sortMethod: "directed",
@@ -3639,7 +3669,7 @@ async function showTaskDetailPopup(task, event) {
   let fullTask = task;
   try {
     // Try to get task from project tasks endpoint
-    const projectTasks = await apiRequest(`/projects/${task.project_id}/tasks`);
+    const projectTasks = await apiRequestAll(`/projects/${task.project_id}/tasks`);
     const foundTask = projectTasks.find(t => t.id === task.id);
     if (foundTask) {
       fullTask = foundTask;
@@ -3836,7 +3866,7 @@ async function loadNotifications(force = false) {
     return;
   }
   try {
-    notifications = await apiRequest("/notifications");
+    notifications = await apiRequestAll("/notifications");
     notificationsLoaded = true;
     renderNotifications();
     updateNotificationBadge();
@@ -0,0 +1,40 @@
+"""Rebuild the dashboard's per-project status counters from the tasks table.
+
+The counters are kept current by the API; run this after changing tasks
+around it (a manual fix, an import) or to check them:
+
+    python rebuild_status_counts.py              # every project
+    python rebuild_status_counts.py --project 3  # only project 3
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# Add project root directory to path
+ROOT = Path(__file__).resolve().parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app.core.database import Base, SessionLocal, engine
+from app.services import status_counts
+
+
+def run(project_ids) -> None:
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        rows = status_counts.rebuild(db, project_ids)
+        db.commit()
+    finally:
+        db.close()
+    scope = "every project" if project_ids is None else f"project(s) {', '.join(map(str, project_ids))}"
+    print(f"Rebuilt {rows} status counter(s) for {scope}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild per-project task status counters")
+    parser.add_argument(
+        "--project", type=int, action="append", dest="project_ids", help="Project id to rebuild (repeatable)"
+    )
+    args = parser.parse_args()
+    run(args.project_ids)
@@ -0,0 +1,29 @@
+"""Roll finished days of task activity up into the daily counts table.
+
+The app rolls up at startup; schedule this (e.g. daily, shortly after
+midnight UTC) for servers that run for days, so task history keeps reading
+closed days from the roll-up:
+
+    python rollup_task_activity.py
+"""
+import sys
+from pathlib import Path
+
+# Add project root directory to path
+ROOT = Path(__file__).resolve().parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app.core.database import Base, engine
+from app.services import activity_rollup
+
+
+def run() -> None:
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        rows = activity_rollup.roll_up(connection)
+    print(f"Rolled up {rows} daily activity count(s)")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,119 @@
+"""Stateless access tokens with user id / license claims and revocation cut-offs."""
+
+from typing import Dict
+
+from jose import jwt
+
+import app.models as models
+from app.core import instrumentation
+from app.services import auth
+from app.services.principals import principal_cache
+from app.services.revocation import TokenEpochs, token_epochs
+from tests.factories import create_user, login_user
+
+
+def auth_headers(db_session, username: str, password: str = "secret123") -> Dict[str, str]:
+    token = login_user(db_session, username, password)
+    return {"Authorization": f"Bearer {token}"}
+
+
+def query_count(response) -> int:
+    return int(response.headers[instrumentation.QUERY_COUNT_HEADER])
+
+
+def test_token_carries_user_id_and_license_claims(db_session):
+    user = create_user(db_session, "claims", "claims@example.com")
+    payload = jwt.decode(login_user(db_session, user.username), auth.SECRET_KEY, algorithms=[auth.ALGORITHM])
+    assert payload["sub"] == "claims"
+    assert payload["uid"] == user.id
+    assert payload["lic"] is True
+    assert payload["iat"] < payload["exp"]
+
+
+def test_licensed_token_skips_the_auth_queries(instrumented_client, db_session):
+    user = create_user(db_session, "stateless", "stateless@example.com")
+    claimed = auth_headers(db_session, user.username)
+    legacy = {"Authorization": f"Bearer {auth.create_access_token(data={'sub': user.username})}"}
+
+    counts = {}
+    for name, headers in (("claimed", claimed), ("legacy", legacy)):
+        principal_cache.clear()
+        db_session.expire_all()
+        response = instrumented_client.get("/notifications", headers=headers)
+        assert response.status_code == 200
+        counts[name] = query_count(response)
+    # The legacy token needs the user and license lookups.
+    assert counts["claimed"] == counts["legacy"] - 2
+
+
+def test_logout_everywhere_revokes_issued_tokens(api_client, db_session):
+    user = create_user(db_session, "logout", "logout@example.com")
+    first = auth_headers(db_session, user.username)
+    second = auth_headers(db_session, user.username)
+
+    assert api_client.post("/auth/logout-all", headers=first).status_code == 204
+    for headers in (first, second):
+        assert api_client.get("/projects", headers=headers).status_code == 401
+
+    fresh = auth_headers(db_session, user.username)
+    assert api_client.get("/projects", headers=fresh).status_code == 200
+
+
+def test_license_removal_withdraws_the_claim(api_client, db_session):
+    user = create_user(db_session, "claim_revoked", "claim_revoked@example.com")
+    headers = auth_headers(db_session, user.username)
+    assert api_client.get("/projects", headers=headers).status_code == 200
+
+    db_session.delete(db_session.query(models.UserLicense).filter_by(user_id=user.id).one())
+    db_session.commit()
+    assert api_client.get("/projects", headers=headers).status_code == 403
+
+
+def test_raw_sql_license_removal_needs_an_explicit_cutoff(api_client, db_session):
+    user = create_user(db_session, "claim_raw", "claim_raw@example.com")
+    headers = auth_headers(db_session, user.username)
+    connection = db_session.connection()
+    connection.exec_driver_sql("DELETE FROM user_licenses WHERE user_id = ?", (user.id,))
+    db_session.commit()
+
+    # The signed claim is trusted until the change is recorded.
+    assert api_client.get("/projects", headers=headers).status_code == 200
+    token_epochs.distrust_license(user.id)
+    assert api_client.get("/projects", headers=headers).status_code == 403
+
+
+def test_deleted_user_is_rejected(api_client, db_session):
+    user = create_user(db_session, "deleted_claims", "deleted_claims@example.com")
+    headers = auth_headers(db_session, user.username)
+    assert api_client.get("/users/me", headers=headers).status_code == 200
+
+    db_session.delete(user)
+    db_session.commit()
+    assert api_client.get("/users/me", headers=headers).status_code == 401
+
+
+def test_epochs_expire_and_stay_bounded():
+    now = [1000.0]
+    epochs = TokenEpochs(max_entries=2, retention_seconds=100, clock=lambda: now[0])
+    epochs.revoke_user(1)
+    assert epochs.is_revoked(1, 999.0)
+    assert not epochs.is_revoked(1, 1001.0)
+    assert not epochs.is_revoked(2, 999.0)
+
+    now[0] = 1010.0
+    epochs.revoke_user(2)
+    now[0] = 1020.0
+    epochs.revoke_user(3)
+    # User 1 was evicted; its cut-off now applies to everyone instead.
+    assert len(epochs) == 2
+    assert epochs.is_revoked(1, 999.0) and epochs.is_revoked(4, 999.0)
+    assert not epochs.is_revoked(4, 1001.0)
+
+    now[0] = 1200.0
+    epochs.distrust_license(5)
+    assert len(epochs) == 3
+    # Cut-offs older than the token lifetime cover only expired tokens.
+    epochs.revoke_user(6)
+    assert len(epochs) == 2
+    assert not epochs.trusts_license(5, 1100.0)
+    assert epochs.trusts_license(6, 1100.0)
@@ -0,0 +1,138 @@
+"""Daily task activity counts from the roll-up table and the live tail."""
+
+from datetime import date, datetime, timedelta
+from typing import Dict
+
+from sqlalchemy import func
+
+import app.models as models
+from app.core import config
+from app.services import activity_rollup
+from tests.factories import create_project, create_user, login_user
+
+
+def auth_headers(db_session, username: str, password: str = "secret123") -> Dict[str, str]:
+    token = login_user(db_session, username, password)
+    return {"Authorization": f"Bearer {token}"}
+
+
+def add_activities(db_session, user, project, *days_ago: int) -> None:
+    now = datetime.utcnow()
+    for index, days in enumerate(days_ago):
+        db_session.add(
+            models.TaskActivity(
+                user_id=user.id,
+                project_id=project.id,
+                action="created",
+                task_title=f"Task {index}",
+                created_at=now - timedelta(days=days, seconds=index),
+            )
+        )
+    db_session.commit()
+
+
+def raw_counts(db_session, project_id: int, user_id: int) -> Dict[str, int]:
+    day = func.date(models.TaskActivity.created_at)
+    rows = (
+        db_session.query(day, func.count(models.TaskActivity.id))
+        .filter(models.TaskActivity.project_id == project_id, models.TaskActivity.user_id == user_id)
+        .group_by(day)
+    )
+    return {str(key): count for key, count in rows}
+
+
+def test_closed_days_come_from_the_roll_up(db_session):
+    owner = create_user(db_session, "rollup_owner", "rollup_owner@example.com")
+    other = create_user(db_session, "rollup_other", "rollup_other@example.com")
+    project = create_project(db_session, owner, name="Rolled")
+    add_activities(db_session, owner, project, 0, 0, 3, 3, 3, 12)
+    add_activities(db_session, other, project, 3, 5)
+    start, end = datetime.utcnow() - timedelta(days=30), datetime.utcnow() + timedelta(days=1)
+
+    assert activity_rollup.roll_up(db_session) == 4
+    db_session.commit()
+    assert activity_rollup.roll_up(db_session) == 0
+    rolled = db_session.query(models.TaskActivityDaily).filter_by(user_id=owner.id).all()
+    assert sorted(row.count for row in rolled) == [1, 3]
+    assert all(row.day < datetime.utcnow().date() for row in rolled)
+
+    expected = raw_counts(db_session, project.id, owner.id)
+    assert activity_rollup.daily_counts(db_session, project.id, owner.id, start, end) == expected
+    assert sum(expected.values()) == 6
+
+    # Today's activities are still counted from the raw rows.
+    add_activities(db_session, owner, project, 0)
+    counts = activity_rollup.daily_counts(db_session, project.id, owner.id, start, end)
+    assert counts == raw_counts(db_session, project.id, owner.id)
+    assert counts[str(datetime.utcnow().date())] == 3
+
+    # A range inside the rolled-up days reads only those.
+    narrow_start = datetime.combine(datetime.utcnow().date() - timedelta(days=4), datetime.min.time())
+    narrow_end = datetime.combine(datetime.utcnow().date() - timedelta(days=2), datetime.max.time())
+    assert activity_rollup.daily_counts(db_session, project.id, owner.id, narrow_start, narrow_end) == {
+        str(datetime.utcnow().date() - timedelta(days=3)): 3
+    }
+
+
+def test_late_committed_activity_is_counted_with_its_day(db_session):
+    owner = create_user(db_session, "rollup_late", "rollup_late@example.com")
+    project = create_project(db_session, owner, name="Late")
+    add_activities(db_session, owner, project, 1, 2)
+    yesterday = datetime.utcnow().date() - timedelta(days=1)
+    start, end = datetime.utcnow() - timedelta(days=7), datetime.utcnow()
+    assert activity_rollup.roll_up(db_session, through=yesterday) == 2
+    db_session.commit()
+
+    # Stamped before midnight, but its transaction committed after the roll-up.
+    db_session.add(
+        models.TaskActivity(
+            user_id=owner.id,
+            project_id=project.id,
+            action="created",
+            created_at=datetime.combine(yesterday, datetime.max.time()).replace(microsecond=0),
+        )
+    )
+    db_session.commit()
+    assert activity_rollup.roll_up(db_session, through=yesterday) == 1
+    db_session.commit()
+    assert activity_rollup.roll_up(db_session, through=yesterday) == 0
+
+    counts = activity_rollup.daily_counts(db_session, project.id, owner.id, start, end)
+    assert counts == raw_counts(db_session, project.id, owner.id)
+    assert counts[str(yesterday)] == 2
+
+
+def test_days_are_rolled_up_after_the_grace_period(db_session, monkeypatch):
+    owner = create_user(db_session, "rollup_grace", "rollup_grace@example.com")
+    project = create_project(db_session, owner, name="Grace")
+    add_activities(db_session, owner, project, 1, 2)
+    seconds_since_midnight = (datetime.utcnow() - datetime.combine(datetime.utcnow().date(), datetime.min.time())).seconds
+
+    # Yesterday ended less than the grace period ago, so it stays open.
+    monkeypatch.setattr(config, "ACTIVITY_ROLLUP_GRACE_SECONDS", seconds_since_midnight + 60)
+    assert activity_rollup.roll_up(db_session) == 1
+    rolled = db_session.query(models.TaskActivityDaily).one()
+    assert rolled.day == datetime.utcnow().date() - timedelta(days=2)
+
+    monkeypatch.setattr(config, "ACTIVITY_ROLLUP_GRACE_SECONDS", 0)
+    assert activity_rollup.roll_up(db_session) == 1
+    assert db_session.query(models.TaskActivityDaily).count() == 2
+
+
+def test_task_history_reports_rolled_up_days(api_client, db_session):
+    owner = create_user(db_session, "rollup_history", "rollup_history@example.com")
+    project = create_project(db_session, owner, name="History")
+    add_activities(db_session, owner, project, 1, 1, 2)
+    activity_rollup.roll_up(db_session)
+    db_session.commit()
+    add_activities(db_session, owner, project, 0)
+
+    response = api_client.get(
+        f"/projects/{project.id}/task-history",
+        params={"start_date": str(datetime.utcnow().date() - timedelta(days=7)), "end_date": str(datetime.utcnow().date()), "limit": 2},
+        headers=auth_headers(db_session, owner.username),
+    )
+    body = response.json()
+    assert body["daily_counts"] == raw_counts(db_session, project.id, owner.id)
+    assert sum(body["daily_counts"].values()) == 4
+    assert len(body["activities"]) == 2 and body["next_cursor"]
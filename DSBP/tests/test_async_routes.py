@@ -0,0 +1,121 @@
+"""Integration tests for the async read endpoints."""
+
+import asyncio
+from typing import Dict
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core import instrumentation
+from app.core.app import create_app
+from app.core.database import Base, get_async_db, get_db, get_read_db
+from tests.factories import (
+    create_dependency,
+    create_project,
+    create_task,
+    create_user,
+    login_user,
+)
+
+
+@pytest.fixture()
+def async_setup(tmp_path):
+    """Wire an app in async mode to a file database shared by both engines."""
+    db_path = tmp_path / "async.db"
+    sync_engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=sync_engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=sync_engine)()
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+    async_session_factory = async_sessionmaker(
+        bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+    )
+
+    app = create_app(async_db=True, instrument_sql=True)
+
+    def _get_test_db():
+        yield session
+
+    async def _get_test_async_db():
+        async with async_session_factory() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = _get_test_db
+    app.dependency_overrides[get_read_db] = _get_test_db
+    app.dependency_overrides[get_async_db] = _get_test_async_db
+    client = TestClient(app)
+    try:
+        yield client, session
+    finally:
+        client.close()
+        session.close()
+        sync_engine.dispose()
+        asyncio.run(async_engine.dispose())
+
+
+def auth_headers(db_session, username: str, password: str = "secret123") -> Dict[str, str]:
+    token = login_user(db_session, username, password)
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_async_routes_take_precedence(async_setup):
+    client, _ = async_setup
+    endpoints = {
+        route.path: route.endpoint.__name__
+        for route in reversed(client.app.routes)
+        if getattr(route, "methods", None) and "GET" in route.methods
+    }
+    assert endpoints["/tasks"] == "list_all_accessible_tasks_async"
+    assert endpoints["/projects"] == "list_projects_async"
+    assert endpoints["/notifications"] == "list_notifications_async"
+    assert endpoints["/dependency-map"] == "dependency_map_async"
+
+
+def test_async_list_endpoints_return_serialized_relationships(async_setup):
+    client, session = async_setup
+    owner = create_user(session, "async_owner", "async_owner@example.com")
+    guest = create_user(session, "async_guest", "async_guest@example.com")
+    project = create_project(session, owner, name="Async Project", visibility="selected", shared_usernames=[guest.username])
+    task_a = create_task(session, owner, project, title="Async A")
+    task_b = create_task(session, owner, project, title="Async B")
+    create_dependency(session, owner, depends_on=task_a, dependent=task_b)
+    headers = auth_headers(session, owner.username)
+
+    response = client.post(
+        "/comments",
+        json={"task_id": task_a.id, "content": f"@{guest.username} please review"},
+        headers=headers,
+    )
+    assert response.status_code == 201
+
+    projects = client.get("/projects", headers=headers)
+    assert projects.status_code == 200
+    assert [user["username"] for user in projects.json()[0]["shared_users"]] == [guest.username]
+
+    tasks = client.get("/tasks", headers=headers)
+    assert tasks.status_code == 200
+    # Statements awaited on the AsyncSession are counted like sync ones.
+    assert int(tasks.headers[instrumentation.QUERY_COUNT_HEADER]) >= 2
+    assert {task["title"] for task in tasks.json()} == {"Async A", "Async B"}
+    filtered = client.get("/tasks", params={"status": "completed"}, headers=headers)
+    assert filtered.status_code == 200 and filtered.json() == []
+
+    dependency_map = client.get("/dependency-map", headers=headers)
+    assert dependency_map.status_code == 200
+    edge = dependency_map.json()["edges"][0]
+    assert edge["depends_on"]["project_name"] == "Async Project"
+
+    notifications = client.get("/notifications", headers=auth_headers(session, guest.username))
+    assert notifications.status_code == 200
+    notification = notifications.json()[0]
+    assert notification["task_title"] == "Async A"
+    assert notification["project_name"] == "Async Project"
+
+
+def test_async_routes_require_authentication(async_setup):
+    client, _ = async_setup
+    assert client.get("/tasks").status_code == 401
+    response = client.get("/tasks", headers={"Authorization": "Bearer not-a-token"})
+    assert response.status_code == 401
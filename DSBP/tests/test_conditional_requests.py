@@ -0,0 +1,170 @@
+"""ETag / If-None-Match revalidation driven by per-project version counters."""
+
+from typing import Callable, Dict
+
+import pytest
+
+import app.models as models
+from app.core import instrumentation
+from tests.factories import (
+    create_dependency,
+    create_project,
+    create_task,
+    create_user,
+    login_user,
+)
+
+
+def auth_headers(db_session, username: str, password: str = "secret123") -> Dict[str, str]:
+    token = login_user(db_session, username, password)
+    return {"Authorization": f"Bearer {token}"}
+
+
+def revalidate(client, path: str, headers: Dict[str, str], etag: str):
+    return client.get(path, headers={**headers, "If-None-Match": etag})
+
+
+@pytest.mark.parametrize("resource", ["tasks", "dashboard"])
+def test_unchanged_project_resources_return_304(instrumented_client, db_session, resource):
+    owner = create_user(db_session, f"etag_{resource}", f"etag_{resource}@example.com")
+    project = create_project(db_session, owner, name="Cached")
+    for index in range(3):
+        create_task(db_session, owner, project, title=f"Task {index}")
+    headers = auth_headers(db_session, owner.username)
+    path = f"/projects/{project.id}/{resource}"
+
+    full = instrumented_client.get(path, headers=headers)
+    assert full.status_code == 200
+    etag = full.headers["ETag"]
+    assert etag.startswith('"') and not etag.startswith("W/")
+    assert full.headers["Cache-Control"] == "private, no-cache"
+
+    cached = revalidate(instrumented_client, path, headers, etag)
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["ETag"] == etag
+    # The list/aggregate query is skipped entirely.
+    assert int(cached.headers[instrumentation.QUERY_COUNT_HEADER]) < int(
+        full.headers[instrumentation.QUERY_COUNT_HEADER]
+    )
+
+    assert revalidate(instrumented_client, path, headers, f'W/{etag}').status_code == 304
+    assert revalidate(instrumented_client, path, headers, f'"stale", {etag}').status_code == 304
+    assert revalidate(instrumented_client, path, headers, '"stale"').status_code == 200
+    # A repeated full response is byte-identical, as a strong ETag promises.
+    assert instrumented_client.get(path, headers=headers).content == full.content
+
+
+def test_task_list_pages_and_filters_have_their_own_etags(api_client, db_session):
+    owner = create_user(db_session, "etag_views", "etag_views@example.com")
+    project = create_project(db_session, owner, name="Views")
+    for index in range(3):
+        create_task(db_session, owner, project, title=f"Task {index}", status="scheduled" if index else "new_task")
+    headers = auth_headers(db_session, owner.username)
+    path = f"/projects/{project.id}/tasks"
+    cursor = api_client.get(path, params={"limit": 1}, headers=headers).headers["X-Next-Cursor"]
+    queries = [
+        {},
+        {"limit": 1},
+        {"limit": 3},
+        {"limit": 1, "cursor": cursor},
+        {"status": "scheduled"},
+        {"status": ["scheduled", "new_task"]},
+        {"assignee_id": owner.id},
+        {"due_before": "2030-01-01"},
+        {"due_after": "2030-01-01"},
+        {"created_after": "2030-01-01"},
+        {"sort": "created_at"},
+        {"sort": "due_date"},
+    ]
+
+    etags = [api_client.get(path, params=params, headers=headers).headers["ETag"] for params in queries]
+    assert len(set(etags)) == len(queries)
+    for params, etag in zip(queries, etags):
+        response = api_client.get(path, params=params, headers={**headers, "If-None-Match": etag})
+        assert response.status_code == 304, params
+    response = api_client.get(path, params={"limit": 3}, headers={**headers, "If-None-Match": etags[1]})
+    assert response.status_code == 200 and len(response.json()) == 3
+    # The order statuses are listed in does not change the view.
+    reordered = api_client.get(path, params={"status": ["new_task", "scheduled"]}, headers=headers)
+    assert reordered.headers["ETag"] == etags[5]
+
+
+def test_every_mutation_changes_the_project_etag(api_client, db_session):
+    owner = create_user(db_session, "etag_owner", "etag_owner@example.com")
+    guest = create_user(db_session, "etag_guest", "etag_guest@example.com")
+    project = create_project(db_session, owner, name="Versioned")
+    first = create_task(db_session, owner, project, title="First")
+    second = create_task(db_session, owner, project, title="Second")
+    headers = auth_headers(db_session, owner.username)
+    path = f"/projects/{project.id}/tasks"
+    state: Dict[str, int] = {}
+
+    def add_dependency():
+        response = api_client.post(
+            "/task-dependencies",
+            json={"depends_on_task_id": first.id, "dependent_task_id": second.id},
+            headers=headers,
+        )
+        state["dependency"] = response.json()["id"]
+        return response
+
+    def add_comment():
+        response = api_client.post("/comments", json={"task_id": first.id, "content": "note"}, headers=headers)
+        state["comment"] = response.json()["id"]
+        return response
+
+    mutations: Dict[str, Callable] = {
+        "create task": lambda: api_client.post(
+            "/tasks", json={"title": "Third", "project_id": project.id}, headers=headers
+        ),
+        "update task": lambda: api_client.patch(f"/tasks/{first.id}", json={"status": "in_progress"}, headers=headers),
+        "add dependency": add_dependency,
+        "remove dependency": lambda: api_client.delete(f"/task-dependencies/{state['dependency']}", headers=headers),
+        "comment": add_comment,
+        "solve comment": lambda: api_client.post(f"/comments/{state['comment']}/solve", headers=headers),
+        "visibility": lambda: api_client.patch(
+            f"/projects/{project.id}",
+            json={"visibility": "selected", "shared_usernames": [guest.username]},
+            headers=headers,
+        ),
+        "delete task": lambda: api_client.delete(f"/tasks/{second.id}", headers=headers),
+    }
+
+    etag = api_client.get(path, headers=headers).headers["ETag"]
+    for name, mutate in mutations.items():
+        assert mutate().status_code < 300, name
+        assert revalidate(api_client, path, headers, etag).status_code == 200, name
+        refreshed = api_client.get(path, headers=headers).headers["ETag"]
+        assert refreshed != etag, name
+        etag = refreshed
+
+    db_session.expire_all()
+    assert db_session.get(models.Project, project.id).version == 1 + len(mutations) + 2
+
+
+def test_dependency_map_etag_tracks_accessible_projects(api_client, db_session):
+    owner = create_user(db_session, "map_etag", "map_etag@example.com")
+    other = create_user(db_session, "map_other", "map_other@example.com")
+    project = create_project(db_session, owner, name="Mapped")
+    upstream = create_task(db_session, owner, project, title="Upstream")
+    downstream = create_task(db_session, owner, project, title="Downstream")
+    create_dependency(db_session, owner, depends_on=upstream, dependent=downstream)
+    headers = auth_headers(db_session, owner.username)
+
+    etag = api_client.get("/dependency-map", headers=headers).headers["ETag"]
+    assert revalidate(api_client, "/dependency-map", headers, etag).status_code == 304
+
+    # A project the user cannot see does not affect their map.
+    create_project(db_session, other, name="Private", visibility="private")
+    assert revalidate(api_client, "/dependency-map", headers, etag).status_code == 304
+
+    # A newly visible project does.
+    create_project(db_session, other, name="Shared", visibility="all")
+    assert revalidate(api_client, "/dependency-map", headers, etag).status_code == 200
+    etag = api_client.get("/dependency-map", headers=headers).headers["ETag"]
+
+    api_client.patch(f"/tasks/{upstream.id}", json={"title": "Renamed"}, headers=headers)
+    response = revalidate(api_client, "/dependency-map", headers, etag)
+    assert response.status_code == 200
+    assert "Renamed" in response.text
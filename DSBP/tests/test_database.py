@@ -0,0 +1,215 @@
+"""Tests for database backend configuration and backend-neutral queries."""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
+
+import pytest
+from sqlalchemy import create_engine, func, inspect, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+import app.models as models
+from app.core import config
+from app.core.database import (
+    Base,
+    TimedQueuePool,
+    async_database_url,
+    build_engine,
+    create_missing_columns,
+    engine_options,
+    normalize_database_url,
+    read_only_url,
+    sqlite_file_path,
+)
+from tests.factories import create_dependency, create_project, create_task, create_user, login_user
+
+
+def auth_headers(db_session, username: str, password: str = "secret123") -> Dict[str, str]:
+    token = login_user(db_session, username, password)
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_postgres_profile_engine_options():
+    url = normalize_database_url("postgres://dsbp:secret@db:5432/dsbp")
+    assert url.drivername == "postgresql"
+
+    options = engine_options(url)
+    assert options["pool_pre_ping"] is True
+    assert options["pool_size"] == config.DB_POOL_SIZE
+    assert options["max_overflow"] == config.DB_MAX_OVERFLOW
+    assert options["pool_recycle"] == config.DB_POOL_RECYCLE_SECONDS
+    assert options["connect_args"] == {"options": f"-c statement_timeout={config.DB_STATEMENT_TIMEOUT_MS}"}
+
+    async_url = async_database_url(url)
+    assert async_url.drivername == "postgresql+asyncpg"
+    async_options = engine_options(async_url, is_async=True)
+    assert async_options["connect_args"] == {
+        "server_settings": {"statement_timeout": str(config.DB_STATEMENT_TIMEOUT_MS)}
+    }
+
+
+def test_sqlite_profile_engine_options():
+    url = normalize_database_url("sqlite:///./data/dsbp.db")
+    assert engine_options(url) == {
+        "connect_args": {"check_same_thread": False},
+        "poolclass": TimedQueuePool,
+        "pool_logging_name": "primary",
+        "pool_size": 1,
+        "max_overflow": 0,
+        "pool_timeout": config.DB_POOL_TIMEOUT_SECONDS,
+    }
+    assert engine_options(read_only_url(url), read_only=True)["pool_size"] == config.SQLITE_READ_POOL_SIZE
+    assert str(read_only_url(url)) == "sqlite:///file:./data/dsbp.db?mode=ro&uri=true"
+    assert async_database_url(url).drivername == "sqlite+aiosqlite"
+    assert sqlite_file_path(normalize_database_url("sqlite://")) is None
+
+
+def test_sqlite_production_profile(tmp_path):
+    url = normalize_database_url(f"sqlite:///{tmp_path / 'profile.db'}")
+    writer = build_engine(url)
+    reader = build_engine(url, read_only=True)
+    try:
+        Base.metadata.create_all(bind=writer)
+        with writer.connect() as connection:
+            assert connection.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+            assert connection.exec_driver_sql("PRAGMA synchronous").scalar() == 1  # NORMAL
+            assert connection.exec_driver_sql("PRAGMA busy_timeout").scalar() == config.SQLITE_BUSY_TIMEOUT_MS
+            assert connection.exec_driver_sql("PRAGMA mmap_size").scalar() == config.SQLITE_MMAP_SIZE
+            assert connection.exec_driver_sql("PRAGMA cache_size").scalar() == -config.SQLITE_CACHE_SIZE_KIB
+
+        with reader.connect() as connection:
+            assert connection.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+            with pytest.raises(OperationalError, match="readonly"):
+                connection.exec_driver_sql("INSERT INTO licenses (license_key) VALUES ('RO00-RO00-RO00-RO00')")
+    finally:
+        reader.dispose()
+        writer.dispose()
+
+
+def test_sqlite_single_writer_serializes_concurrent_writes(tmp_path):
+    """Bursts of writers queue on the single writer connection instead of hitting "database is locked"."""
+    url = normalize_database_url(f"sqlite:///{tmp_path / 'writers.db'}")
+    writer = build_engine(url)
+    Base.metadata.create_all(bind=writer)
+    WriterSession = sessionmaker(autocommit=False, autoflush=False, bind=writer)
+
+    def insert_batch(batch: int) -> None:
+        for index in range(20):
+            session = WriterSession()
+            try:
+                session.add(models.License(license_key=f"W{batch:03d}-{index:04d}-AAAA-BBBB"))
+                session.commit()
+            finally:
+                session.close()
+
+    try:
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(insert_batch, range(8)))
+        with writer.connect() as connection:
+            assert connection.exec_driver_sql("SELECT COUNT(*) FROM licenses").scalar() == 160
+    finally:
+        writer.dispose()
+
+
+def test_file_database_reads_do_not_wait_for_an_open_write(file_database):
+    writer = file_database.SessionLocal()
+    reader = file_database.ReadSessionLocal()
+    count = select(func.count(models.License.id))
+    try:
+        writer.add(models.License(license_key="OPEN-WRIT-E000-0001"))
+        writer.flush()  # Holds the write lock until the commit.
+        started = time.perf_counter()
+        assert reader.execute(count).scalar() == 0
+        assert time.perf_counter() - started < config.SQLITE_BUSY_TIMEOUT_MS / 1000 / 2
+        reader.rollback()
+
+        writer.commit()
+        # The writer connection goes back to the pool with the transaction.
+        assert file_database.engine.pool.checkedout() == 0
+        assert reader.execute(count).scalar() == 1
+    finally:
+        reader.close()
+        writer.close()
+
+
+def test_file_database_rejects_writes_through_the_read_session(file_database):
+    reader = file_database.ReadSessionLocal()
+    try:
+        reader.add(models.License(license_key="READ-ONLY-0000-0001"))
+        with pytest.raises(OperationalError, match="readonly"):
+            reader.commit()
+    finally:
+        reader.close()
+
+
+def test_api_on_file_database_with_separate_pools(file_client):
+    """Every handler works with its real session dependency: reads on the read-only pool."""
+    credentials = {"username": "file_user", "password": "secret123"}
+    response = file_client.post("/auth/register", json={**credentials, "email": "file_user@example.com"})
+    assert response.status_code == 201, response.text
+    token = file_client.post("/auth/login", json=credentials).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    project = file_client.post("/projects", json={"name": "On disk"}, headers=headers).json()
+    response = file_client.post("/tasks", json={"project_id": project["id"], "title": "Persisted"}, headers=headers)
+    assert response.status_code == 201, response.text
+    task = response.json()
+    assert file_client.patch(f"/tasks/{task['id']}", json={"status": "completed"}, headers=headers).status_code == 200
+
+    listed = file_client.get(f"/projects/{project['id']}/tasks", headers=headers).json()
+    assert [(item["id"], item["status"]) for item in listed] == [(task["id"], "completed")]
+    hits = file_client.get("/search", params={"q": "persisted"}, headers=headers).json()
+    assert [hit["id"] for hit in hits] == [task["id"]]
+
+
+def test_shared_project_tasks_are_not_duplicated(api_client, db_session):
+    """Listing tasks of a project shared with several users returns each task once."""
+    owner = create_user(db_session, "dup_owner", "dup_owner@example.com")
+    viewer = create_user(db_session, "dup_viewer", "dup_viewer@example.com")
+    other = create_user(db_session, "dup_other", "dup_other@example.com")
+    project = create_project(
+        db_session,
+        owner,
+        name="Shared Twice",
+        visibility="selected",
+        shared_usernames=[viewer.username, other.username],
+    )
+    task_a = create_task(db_session, owner, project, title="Only once A")
+    task_b = create_task(db_session, owner, project, title="Only once B")
+    create_dependency(db_session, owner, depends_on=task_a, dependent=task_b)
+
+    headers = auth_headers(db_session, viewer.username)
+    tasks = api_client.get("/tasks", headers=headers).json()
+    assert sorted(task["id"] for task in tasks) == sorted([task_a.id, task_b.id])
+
+    projects = api_client.get("/projects", headers=headers).json()
+    assert [project_out["id"] for project_out in projects] == [project.id]
+
+    dependency_map = api_client.get("/dependency-map", headers=headers).json()
+    assert len(dependency_map["tasks"]) == 2
+    assert len(dependency_map["edges"]) == 1
+
+
+def test_create_missing_columns_upgrades_existing_tables(tmp_path):
+    legacy_engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    try:
+        with legacy_engine.begin() as connection:
+            connection.exec_driver_sql(
+                "CREATE TABLE projects (id INTEGER PRIMARY KEY, name VARCHAR(100) NOT NULL, "
+                "description TEXT, owner_id INTEGER NOT NULL, created_at DATETIME, "
+                "visibility VARCHAR(20) NOT NULL)"
+            )
+            connection.exec_driver_sql(
+                "INSERT INTO projects (name, owner_id, visibility) VALUES ('Legacy', 1, 'all')"
+            )
+
+        create_missing_columns(legacy_engine)
+        create_missing_columns(legacy_engine)
+
+        columns = {column["name"] for column in inspect(legacy_engine).get_columns("projects")}
+        assert {"version", "updated_at"} <= columns
+        with legacy_engine.connect() as connection:
+            assert connection.exec_driver_sql("SELECT version FROM projects").scalar_one() == 1
+    finally:
+        legacy_engine.dispose()
@@ -0,0 +1,244 @@
+"""Dependency cycle checks: the in-memory graph index and the recursive query."""
+
+import random
+from typing import Dict, List
+
+import app.models as models
+from app.core import config, instrumentation
+from app.services import dependency_graph, project_changes
+from app.services.dependency_graph import ProjectGraph, dependency_graphs
+from tests.factories import create_dependency, create_project, create_task, create_user, login_user
+
+
+def auth_headers(db_session, username: str, password: str = "secret123") -> Dict[str, str]:
+    token = login_user(db_session, username, password)
+    return {"Authorization": f"Bearer {token}"}
+
+
+def build_chain(db_session, owner, project, length: int) -> List[models.Task]:
+    tasks = [create_task(db_session, owner, project, title=f"Step {index}") for index in range(length)]
+    for upstream, downstream in zip(tasks, tasks[1:]):
+        create_dependency(db_session, owner, depends_on=upstream, dependent=downstream)
+    return tasks
+
+
+def project_version(db_session, project_id: int) -> int:
+    db_session.expire_all()
+    return db_session.get(models.Project, project_id).version
+
+
+def test_cycle_check_cost_does_not_grow_with_depth(instrumented_client, db_session):
+    owner = create_user(db_session, "deep_graph", "deep_graph@example.com")
+    headers = auth_headers(db_session, owner.username)
+    counts = []
+    for length in (3, 40):
+        project = create_project(db_session, owner, name=f"Chain {length}")
+        chain = build_chain(db_session, owner, project, length)
+        response = instrumented_client.post(
+            "/task-dependencies",
+            json={"depends_on_task_id": chain[-1].id, "dependent_task_id": chain[0].id},
+            headers=headers,
+        )
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Dependency would create a cycle"
+        counts.append(int(response.headers[instrumentation.QUERY_COUNT_HEADER]))
+    assert counts[0] == counts[1]
+
+
+def test_committed_changes_update_the_cached_graph(api_client, db_session):
+    owner = create_user(db_session, "graph_owner", "graph_owner@example.com")
+    project = create_project(db_session, owner, name="Incremental")
+    first, second, third = build_chain(db_session, owner, project, 3)
+    headers = auth_headers(db_session, owner.username)
+
+    graph = dependency_graphs.get(project.id)
+    assert graph is not None
+    assert graph.version == project_version(db_session, project.id)
+    assert graph.reaches(first.id, third.id)
+
+    # Unrelated writes move the version along without a reload.
+    api_client.post("/comments", json={"task_id": first.id, "content": "note"}, headers=headers)
+    assert dependency_graphs.get(project.id) is graph
+    assert graph.version == project_version(db_session, project.id)
+
+    edge = db_session.query(models.TaskDependency).filter_by(depends_on_task_id=second.id).one()
+    assert api_client.delete(f"/task-dependencies/{edge.id}", headers=headers).status_code == 204
+    assert not graph.reaches(first.id, third.id)
+    response = api_client.post(
+        "/task-dependencies",
+        json={"depends_on_task_id": third.id, "dependent_task_id": first.id},
+        headers=headers,
+    )
+    assert response.status_code == 201
+    assert graph.reaches(third.id, second.id)
+
+    assert api_client.delete(f"/tasks/{first.id}", headers=headers).status_code == 204
+    assert not graph.reaches(third.id, second.id)
+    assert first.id not in graph.downstream and first.id not in graph.upstream
+    assert graph.version == project_version(db_session, project.id)
+
+
+def test_changes_from_elsewhere_trigger_a_reload(api_client, db_session):
+    owner = create_user(db_session, "graph_remote", "graph_remote@example.com")
+    project = create_project(db_session, owner, name="Remote")
+    first, second = build_chain(db_session, owner, project, 2)
+    third = create_task(db_session, owner, project, title="Third")
+    stale = dependency_graphs.get(project.id)
+
+    # Another worker adds second -> third and bumps the version.
+    connection = db_session.connection()
+    connection.exec_driver_sql(
+        "INSERT INTO task_dependencies (dependent_task_id, depends_on_task_id) VALUES (?, ?)",
+        (third.id, second.id),
+    )
+    connection.exec_driver_sql("UPDATE projects SET version = version + 1 WHERE id = ?", (project.id,))
+    db_session.commit()
+
+    response = api_client.post(
+        "/task-dependencies",
+        json={"depends_on_task_id": third.id, "dependent_task_id": first.id},
+        headers=auth_headers(db_session, owner.username),
+    )
+    assert response.status_code == 400
+    assert dependency_graphs.get(project.id) is not stale
+
+
+def test_rolled_back_changes_are_not_applied(db_session):
+    owner = create_user(db_session, "graph_rollback", "graph_rollback@example.com")
+    project = create_project(db_session, owner, name="Rollback")
+    first, second = build_chain(db_session, owner, project, 2)
+    graph = dependency_graphs.get(project.id)
+    version = graph.version
+
+    project_changes.record_version(db_session, project.id, version + 1)
+    db_session.add(models.TaskDependency(depends_on_task_id=second.id, dependent_task_id=first.id))
+    db_session.flush()
+    db_session.rollback()
+    db_session.commit()
+    assert graph.version == version
+    assert not graph.reaches(second.id, first.id)
+
+
+def test_project_graph_reachability():
+    graph = ProjectGraph(1, [(1, 2), (2, 3), (1, 4)])
+    assert graph.reaches(1, 3) and graph.reaches(4, 4)
+    assert not graph.reaches(3, 1)
+    graph.remove_edge(2, 3)
+    assert not graph.reaches(1, 3)
+    graph.add_edge(4, 3)
+    graph.remove_task(4)
+    assert not graph.reaches(1, 3)
+    assert graph.upstream[3] == set()
+
+
+def test_sql_strategy_answers_in_one_query(instrumented_client, db_session, monkeypatch):
+    monkeypatch.setattr(config, "DEPENDENCY_CYCLE_CHECK", "sql")
+    owner = create_user(db_session, "sql_graph", "sql_graph@example.com")
+    headers = auth_headers(db_session, owner.username)
+    counts = []
+    for length in (3, 40):
+        project = create_project(db_session, owner, name=f"SQL chain {length}")
+        chain = build_chain(db_session, owner, project, length)
+        response = instrumented_client.post(
+            "/task-dependencies",
+            json={"depends_on_task_id": chain[-1].id, "dependent_task_id": chain[0].id},
+            headers=headers,
+        )
+        assert response.status_code == 400
+        counts.append(int(response.headers[instrumentation.QUERY_COUNT_HEADER]))
+    assert counts[0] == counts[1]
+    assert len(dependency_graphs) == 0
+
+
+def test_strategies_agree(db_session):
+    owner = create_user(db_session, "agree_graph", "agree_graph@example.com")
+    project = create_project(db_session, owner, name="Agree")
+    other = create_project(db_session, owner, name="Other")
+    tasks = [create_task(db_session, owner, project, title=f"Node {index}") for index in range(8)]
+    outside = create_task(db_session, owner, other, title="Outside")
+    random_source = random.Random(7)
+    for upstream in range(8):
+        for downstream in range(upstream + 1, 8):
+            if random_source.random() < 0.3:
+                create_dependency(db_session, owner, depends_on=tasks[upstream], dependent=tasks[downstream])
+
+    for upstream in tasks + [outside]:
+        for downstream in tasks:
+            expected = dependency_graph.creates_cycle(db_session, project.id, upstream.id, downstream.id, strategy="memory")
+            assert dependency_graph.creates_cycle(
+                db_session, project.id, upstream.id, downstream.id, strategy="sql"
+            ) == expected, (upstream.id, downstream.id)
+
+
+def test_cyclic_additions_match_one_by_one_creation():
+    assert dependency_graph.cyclic_additions([(1, 2)], [(2, 3), (3, 4)]) == set()
+    # 3 -> 1 closes 1 -> 2 -> 3; the later 3 -> 2 would too, once 2 -> 3 exists.
+    assert dependency_graph.cyclic_additions([(1, 2)], [(2, 3), (3, 1), (5, 6), (3, 2)]) == {1, 3}
+    # Two new edges forming a cycle between themselves: only the second is rejected.
+    assert dependency_graph.cyclic_additions([], [(7, 8), (8, 7)]) == {1}
+
+
+def test_batch_creates_valid_edges_and_reports_the_rest(instrumented_client, db_session):
+    owner = create_user(db_session, "batch_graph", "batch_graph@example.com")
+    stranger = create_user(db_session, "batch_stranger", "batch_stranger@example.com")
+    project = create_project(db_session, owner, name="Batch")
+    other = create_project(db_session, owner, name="Batch Other")
+    hidden = create_project(db_session, stranger, name="Hidden", visibility="private")
+    first, second, third = build_chain(db_session, owner, project, 3)
+    fourth = create_task(db_session, owner, project, title="Fourth")
+    elsewhere = create_task(db_session, owner, other, title="Elsewhere")
+    secret = create_task(db_session, stranger, hidden, title="Secret")
+    headers = auth_headers(db_session, owner.username)
+    graph_before = dependency_graphs.get(project.id)
+
+    edges = [
+        (third, fourth),
+        (fourth, first),
+        (first, second),
+        (first, elsewhere),
+        (secret, first),
+        (first, first),
+        (third, fourth),
+    ]
+    response = instrumented_client.post(
+        "/task-dependencies/batch",
+        json={"dependencies": [{"depends_on_task_id": up.id, "dependent_task_id": down.id} for up, down in edges]},
+        headers=headers,
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["created"] == 1
+    assert [result["error"] for result in body["results"]] == [
+        None,
+        "Dependency would create a cycle",
+        "Dependency already exists",
+        "Tasks must belong to the same project",
+        "Not allowed to access this task",
+        "Task cannot depend on itself",
+        "Dependency already exists",
+    ]
+    created = db_session.get(models.TaskDependency, body["results"][0]["id"])
+    assert (created.depends_on_task_id, created.dependent_task_id) == (third.id, fourth.id)
+    assert project_version(db_session, project.id) == graph_before.version
+    assert graph_before.reaches(first.id, fourth.id)
+
+
+def test_batch_query_count_does_not_grow_with_size(instrumented_client, db_session):
+    owner = create_user(db_session, "batch_size", "batch_size@example.com")
+    headers = auth_headers(db_session, owner.username)
+    counts = []
+    for length in (3, 40):
+        project = create_project(db_session, owner, name=f"Batch size {length}")
+        tasks = [create_task(db_session, owner, project, title=f"Step {index}") for index in range(length)]
+        response = instrumented_client.post(
+            "/task-dependencies/batch",
+            json={
+                "dependencies": [
+                    {"depends_on_task_id": up.id, "dependent_task_id": down.id} for up, down in zip(tasks, tasks[1:])
+                ]
+            },
+            headers=headers,
+        )
+        assert response.json()["created"] == length - 1
+        counts.append(int(response.headers[instrumentation.QUERY_COUNT_HEADER]))
+    assert counts[0] == counts[1]
@@ -2,6 +2,10 @@
 
 from typing import Dict
 
+import app.schemas as schemas
+from app.core import instrumentation
+from app.services import graph_layout
+from app.services.dependency_maps import CompactGraph, build_dependency_map, dependency_maps, merge_dependency_maps
 from tests.factories import (
     create_dependency,
     create_project,
@@ -194,3 +198,226 @@ def test_dependency_map_shared_project_includes_dependencies(api_client, db_sess
     assert task1.id in task_ids
     assert task2.id in task_ids
     assert len(dependency_map["edges"]) == 1
+
+
+def test_cached_project_maps_are_patched_in_place(instrumented_client, db_session):
+    """Committed changes update the cached per-project maps without reloading them."""
+    owner = create_user(db_session, "cached_map", "cached_map@example.com")
+    project = create_project(db_session, owner, name="Cached Map")
+    first = create_task(db_session, owner, project, title="First")
+    second = create_task(db_session, owner, project, title="Second")
+    create_dependency(db_session, owner, depends_on=first, dependent=second)
+    headers = auth_headers(db_session, owner.username)
+
+    def fetch():
+        db_session.expire_all()
+        response = instrumented_client.get("/dependency-map", headers=headers)
+        assert response.status_code == 200
+        return response.json(), int(response.headers[instrumentation.QUERY_COUNT_HEADER])
+
+    cold, cold_queries = fetch()
+    assert [chain["tasks"][1]["title"] for chain in cold["chains"]] == ["Second"]
+
+    third = instrumented_client.post("/tasks", json={"title": "Third", "project_id": project.id}, headers=headers).json()
+    instrumented_client.post(
+        "/task-dependencies",
+        json={"depends_on_task_id": second.id, "dependent_task_id": third["id"]},
+        headers=headers,
+    )
+    instrumented_client.patch(f"/tasks/{first.id}", json={"title": "Renamed"}, headers=headers)
+    instrumented_client.patch(f"/projects/{project.id}", json={"name": "Moved On"}, headers=headers)
+
+    patched, patched_queries = fetch()
+    assert patched_queries < cold_queries
+    assert [task["title"] for task in patched["chains"][0]["tasks"]] == ["Renamed", "Second", "Third"]
+    assert {task["project_name"] for task in patched["tasks"]} == {"Moved On"}
+
+    instrumented_client.delete(f"/tasks/{second.id}", headers=headers)
+    after_delete, _ = fetch()
+    assert [task["id"] for task in after_delete["tasks"]] == [first.id, third["id"]]
+    assert after_delete["edges"] == [] and after_delete["chains"] == []
+
+    # The patched map matches one built from scratch.
+    dependency_maps.clear()
+    assert fetch()[0] == after_delete
+
+
+def test_stale_project_maps_are_reloaded(api_client, db_session):
+    """Changes made outside this process are picked up through the project version."""
+    owner = create_user(db_session, "stale_map", "stale_map@example.com")
+    project = create_project(db_session, owner, name="Stale Map")
+    task = create_task(db_session, owner, project, title="Before")
+    headers = auth_headers(db_session, owner.username)
+    assert api_client.get("/dependency-map", headers=headers).json()["tasks"][0]["title"] == "Before"
+
+    connection = db_session.connection()
+    connection.exec_driver_sql("UPDATE tasks SET title = 'After' WHERE id = ?", (task.id,))
+    connection.exec_driver_sql("UPDATE projects SET version = version + 1 WHERE id = ?", (project.id,))
+    db_session.commit()
+    assert api_client.get("/dependency-map", headers=headers).json()["tasks"][0]["title"] == "After"
+
+
+def test_merged_maps_are_ordered_like_a_single_build():
+    """Per-project pieces merge into id order across projects."""
+    def summary(task_id: int, project_id: int) -> schemas.TaskSummary:
+        return schemas.TaskSummary(id=task_id, title=f"T{task_id}", project_id=project_id, project_name=f"P{project_id}")
+
+    left = build_dependency_map([summary(1, 1), summary(4, 1), summary(5, 1)], [(2, 1, 4), (6, 4, 5)])
+    right = build_dependency_map([summary(2, 2), summary(3, 2), summary(6, 2)], [(1, 2, 6), (3, 3, 6)])
+    merged = merge_dependency_maps([left, right])
+    assert [task.id for task in merged.tasks] == [1, 2, 3, 4, 5, 6]
+    assert [edge.id for edge in merged.edges] == [1, 2, 3, 6]
+    assert [[task.id for task in chain.tasks] for chain in merged.chains] == [[1, 4, 5]]
+    assert [convergence.target.id for convergence in merged.convergences] == [6]
+
+
+def test_compact_graph_finds_chains_and_convergences():
+    """Repeated edges count once; chains stop at forks and merges."""
+    # 0 -> 1 -> 2 -> 3 is a chain; 3 and 4 both feed 5, and 5 forks to 6 and 7.
+    pairs = [(0, 1), (1, 2), (1, 2), (2, 3), (3, 5), (4, 5), (5, 6), (5, 7), (7, 8)]
+    graph = CompactGraph(9, pairs)
+    assert list(graph.successors(1)) == [2] and graph.indegree[2] == 1
+    assert list(graph.predecessors(5)) == [3, 4]
+    assert graph.chains() == [[0, 1, 2, 3], [7, 8]]
+    assert graph.convergences() == [5]
+
+    long_chain = CompactGraph(50_000, [(node, node + 1) for node in range(49_999)])
+    assert [len(chain) for chain in long_chain.chains()] == [50_000]
+
+
+def test_layered_layout_uses_longest_paths_and_removes_crossings():
+    # 0 -> 3 and 1 -> 2 cross when layer 1 is left in id order; 0 -> 4 and 3 -> 4 put 4 after 3.
+    layers, orders = graph_layout.layered_layout(CompactGraph(5, [(0, 3), (1, 2), (0, 4), (3, 4)]))
+    assert layers == [0, 0, 1, 1, 2]
+    assert orders[3] < orders[2]
+    # A cycle written around the API still gets a layout.
+    assert graph_layout.longest_path_layers(CompactGraph(3, [(0, 1), (1, 2), (2, 1)])) == [0, 1, 2]
+
+
+def test_task_dependency_graph_walks_a_bounded_neighbourhood(instrumented_client, db_session):
+    """The per-task graph follows the requested direction up to ``depth`` edges."""
+    owner = create_user(db_session, "task_graph", "task_graph@example.com")
+    project = create_project(db_session, owner, name="Task Graph")
+    tasks = [create_task(db_session, owner, project, title=f"T{index}") for index in range(5)]
+    for upstream, downstream in zip(tasks, tasks[1:]):
+        create_dependency(db_session, owner, depends_on=upstream, dependent=downstream)
+    unrelated = create_task(db_session, owner, project, title="Unrelated")
+    headers = auth_headers(db_session, owner.username)
+    middle = tasks[2].id
+
+    def graph(**params):
+        response = instrumented_client.get(f"/tasks/{middle}/dependency-graph", params=params, headers=headers)
+        assert response.status_code == 200
+        return response
+
+    both = graph(depth=1).json()
+    assert [task["id"] for task in both["tasks"]] == [tasks[1].id, middle, tasks[3].id]
+    assert [task["id"] for task in both["chains"][0]["tasks"]] == [tasks[1].id, middle, tasks[3].id]
+
+    down = graph(direction="down", depth=5).json()
+    assert [task["id"] for task in down["tasks"]] == [middle, tasks[3].id, tasks[4].id]
+    assert unrelated.id not in {task["id"] for task in graph(depth=5).json()["tasks"]}
+
+    # One query per level: a deeper request costs more only while the walk finds tasks.
+    shallow = int(graph(direction="up", depth=2).headers[instrumentation.QUERY_COUNT_HEADER])
+    deep = int(graph(direction="up", depth=10).headers[instrumentation.QUERY_COUNT_HEADER])
+    assert deep == shallow + 1
+
+    etag = graph(depth=1).headers["ETag"]
+    cached = instrumented_client.get(
+        f"/tasks/{middle}/dependency-graph", params={"depth": 1}, headers={**headers, "If-None-Match": etag}
+    )
+    assert cached.status_code == 304
+    assert instrumented_client.get(
+        f"/tasks/{middle}/dependency-graph", params={"depth": 0}, headers=headers
+    ).status_code == 422
+
+
+def test_task_dependency_graph_requires_access(api_client, db_session):
+    owner = create_user(db_session, "graph_private", "graph_private@example.com")
+    outsider = create_user(db_session, "graph_outsider", "graph_outsider@example.com")
+    project = create_project(db_session, owner, name="Private Graph", visibility="private")
+    task = create_task(db_session, owner, project, title="Hidden")
+    response = api_client.get(f"/tasks/{task.id}/dependency-graph", headers=auth_headers(db_session, outsider.username))
+    assert response.status_code == 403
+
+
+def test_compact_format_references_tasks_by_index(api_client, db_session):
+    """``?format=compact`` carries the same map with each task and project listed once."""
+    owner = create_user(db_session, "compact_map", "compact_map@example.com")
+    project = create_project(db_session, owner, name="Compact")
+    other = create_project(db_session, owner, name="Compact Other")
+    first, second, third = (create_task(db_session, owner, project, title=f"C{index}") for index in range(3))
+    lone = create_task(db_session, owner, other, title="Lone")
+    create_dependency(db_session, owner, depends_on=first, dependent=third)
+    create_dependency(db_session, owner, depends_on=second, dependent=third)
+    headers = auth_headers(db_session, owner.username)
+
+    full_response = api_client.get("/dependency-map", headers=headers)
+    compact_response = api_client.get("/dependency-map", params={"format": "compact"}, headers=headers)
+    assert compact_response.status_code == 200
+    assert compact_response.headers["ETag"] != full_response.headers["ETag"]
+    full, compact = full_response.json(), compact_response.json()
+
+    assert compact["format"] == "compact"
+    projects = compact["projects"]
+    tasks = compact["tasks"]
+    expanded = [
+        {
+            "id": task["id"],
+            "title": task["title"],
+            "project_id": projects[task["project"]]["id"],
+            "project_name": projects[task["project"]]["name"],
+        }
+        for task in tasks
+    ]
+    assert expanded == full["tasks"]
+    assert [(edge_id, tasks[up]["id"], tasks[down]["id"]) for edge_id, up, down in compact["edges"]] == [
+        (edge["id"], edge["depends_on"]["id"], edge["dependent"]["id"]) for edge in full["edges"]
+    ]
+    convergences = [
+        (tasks[target]["id"], [tasks[source]["id"] for source in sources]) for target, sources in compact["convergences"]
+    ]
+    assert convergences == [(third.id, [first.id, second.id])]
+    assert {project["name"] for project in projects} == {"Compact", "Compact Other"}
+    assert lone.id in {task["id"] for task in tasks}
+
+    graph = api_client.get(f"/tasks/{third.id}/dependency-graph", params={"format": "compact"}, headers=headers).json()
+    assert len(graph["tasks"]) == 3 and len(graph["projects"]) == 1
+
+
+def test_layout_positions_are_cached_per_project_version(api_client, db_session):
+    """``?layout=true`` adds positions, reused until the project's graph changes."""
+    owner = create_user(db_session, "layout_map", "layout_map@example.com")
+    project = create_project(db_session, owner, name="Layout")
+    other = create_project(db_session, owner, name="Layout Other")
+    first, second, third = (create_task(db_session, owner, project, title=f"L{index}") for index in range(3))
+    lone = create_task(db_session, owner, other, title="Lone")
+    create_dependency(db_session, owner, depends_on=first, dependent=second)
+    headers = auth_headers(db_session, owner.username)
+
+    def positions():
+        response = api_client.get("/dependency-map", params={"layout": "true"}, headers=headers)
+        assert response.status_code == 200
+        return {position["task_id"]: (position["layer"], position["order"]) for position in response.json()["positions"]}
+
+    assert "positions" not in api_client.get("/dependency-map", headers=headers).json()
+    placed = positions()
+    assert placed[first.id][0] == 0 and placed[second.id][0] == 1 and placed[third.id][0] == 0
+    # The second project is stacked below the first one.
+    assert placed[lone.id] == (0, 2)
+    layout = dependency_maps.get(project.id).layout()
+    assert positions() == placed and dependency_maps.get(project.id).layout() is layout
+
+    api_client.patch(f"/projects/{project.id}", json={"name": "Renamed"}, headers=headers)
+    positions()
+    assert dependency_maps.get(project.id).layout() is layout
+    api_client.post(
+        "/task-dependencies", json={"depends_on_task_id": second.id, "dependent_task_id": third.id}, headers=headers
+    )
+    assert positions()[third.id][0] == 2
+
+    compact = api_client.get(
+        f"/tasks/{third.id}/dependency-graph", params={"layout": "true", "format": "compact"}, headers=headers
+    ).json()
+    assert sorted(layer for layer, _ in compact["positions"]) == [0, 1, 2]
@@ -0,0 +1,157 @@
+"""List endpoints must run a constant number of queries whatever the result size."""
+
+from typing import Callable, Dict
+
+import app.models as models
+from app.core import instrumentation
+from app.services.dependency_maps import dependency_maps
+from tests.factories import (
+    create_dependency,
+    create_project,
+    create_task,
+    create_user,
+    login_user,
+)
+
+
+def auth_headers(db_session, username: str, password: str = "secret123") -> Dict[str, str]:
+    token = login_user(db_session, username, password)
+    return {"Authorization": f"Bearer {token}"}
+
+
+def count_queries(client, db_session, path: str, headers: Dict[str, str]) -> int:
+    # The tests share one session with the app; drop its identity map state so
+    # every request has to load relationships the way a fresh session would.
+    db_session.expire_all()
+    response = client.get(path, headers=headers)
+    assert response.status_code == 200, response.text
+    return int(response.headers[instrumentation.QUERY_COUNT_HEADER])
+
+
+def assert_constant(
+    client,
+    db_session,
+    path: str,
+    headers: Dict[str, str],
+    grow: Callable[[], None],
+    reset: Callable[[], None] = lambda: None,
+) -> None:
+    # Warm the principal cache so both measurements skip authentication alike.
+    count_queries(client, db_session, path, headers)
+    reset()
+    before = count_queries(client, db_session, path, headers)
+    grow()
+    reset()
+    after = count_queries(client, db_session, path, headers)
+    assert after == before, f"{path}: {before} queries before growing, {after} after"
+
+
+def test_task_lists_are_constant(instrumented_client, db_session):
+    owner = create_user(db_session, "eager_tasks", "eager_tasks@example.com")
+    helpers = [create_user(db_session, f"eager_helper{i}", f"eager_helper{i}@example.com") for i in range(3)]
+    project = create_project(db_session, owner, name="Eager Tasks")
+    headers = auth_headers(db_session, owner.username)
+
+    def add_assigned_tasks(count: int) -> None:
+        for index in range(count):
+            task = create_task(db_session, owner, project, title=f"Task {index}")
+            task.assignees = helpers
+        db_session.commit()
+
+    add_assigned_tasks(2)
+    for path in (f"/projects/{project.id}/tasks", "/tasks"):
+        assert_constant(instrumented_client, db_session, path, headers, lambda: add_assigned_tasks(6))
+
+
+def test_project_list_is_constant(instrumented_client, db_session):
+    owner = create_user(db_session, "eager_projects", "eager_projects@example.com")
+    guest = create_user(db_session, "eager_guest", "eager_guest@example.com")
+    headers = auth_headers(db_session, owner.username)
+    created = iter(range(100))
+
+    def add_shared_projects(count: int) -> None:
+        for _ in range(count):
+            create_project(
+                db_session,
+                owner,
+                name=f"Shared {next(created)}",
+                visibility="selected",
+                shared_usernames=[guest.username],
+            )
+
+    add_shared_projects(2)
+    assert_constant(instrumented_client, db_session, "/projects", headers, lambda: add_shared_projects(6))
+
+
+def test_comment_threads_are_constant(instrumented_client, db_session):
+    owner = create_user(db_session, "eager_comments", "eager_comments@example.com")
+    project = create_project(db_session, owner, name="Eager Comments")
+    task = create_task(db_session, owner, project, title="Discussed")
+    headers = auth_headers(db_session, owner.username)
+
+    def add_thread(depth: int) -> None:
+        parent_id = None
+        for level in range(depth):
+            comment = models.Comment(content=f"level {level}", task_id=task.id, author_id=owner.id, parent_id=parent_id)
+            db_session.add(comment)
+            db_session.flush()
+            parent_id = comment.id
+        db_session.commit()
+
+    add_thread(2)
+    path = f"/tasks/{task.id}/comments"
+    assert_constant(instrumented_client, db_session, path, headers, lambda: add_thread(5))
+
+    threads = instrumented_client.get(path, headers=headers).json()
+    assert len(threads) == 2
+    deepest = threads[1]
+    for level in range(5):
+        assert deepest["content"] == f"level {level}"
+        assert deepest["author"]["username"] == owner.username
+        deepest = deepest["replies"][0] if level < 4 else deepest
+    assert deepest["replies"] == []
+
+
+def test_notification_list_is_constant(instrumented_client, db_session):
+    owner = create_user(db_session, "eager_author", "eager_author@example.com")
+    reader = create_user(db_session, "eager_reader", "eager_reader@example.com")
+    author_headers = auth_headers(db_session, owner.username)
+    reader_headers = auth_headers(db_session, reader.username)
+    created = iter(range(100))
+
+    def mention_in_new_projects(count: int) -> None:
+        for _ in range(count):
+            project = create_project(db_session, owner, name=f"Mentions {next(created)}")
+            task = create_task(db_session, owner, project, title="Mention target")
+            response = instrumented_client.post(
+                "/comments",
+                json={"task_id": task.id, "content": f"@{reader.username} ping"},
+                headers=author_headers,
+            )
+            assert response.status_code == 201
+
+    mention_in_new_projects(2)
+    assert_constant(
+        instrumented_client, db_session, "/notifications", reader_headers, lambda: mention_in_new_projects(5)
+    )
+    notifications = instrumented_client.get("/notifications", headers=reader_headers).json()
+    assert all(item["project_name"].startswith("Mentions") for item in notifications)
+
+
+def test_dependency_map_is_constant(instrumented_client, db_session):
+    owner = create_user(db_session, "eager_map", "eager_map@example.com")
+    headers = auth_headers(db_session, owner.username)
+    created = iter(range(100))
+
+    def add_chains(count: int) -> None:
+        for _ in range(count):
+            project = create_project(db_session, owner, name=f"Map {next(created)}")
+            first = create_task(db_session, owner, project, title="first")
+            second = create_task(db_session, owner, project, title="second")
+            create_dependency(db_session, owner, depends_on=first, dependent=second)
+
+    add_chains(1)
+    # Measure cold loads; the per-project map cache is covered separately.
+    assert_constant(
+        instrumented_client, db_session, "/dependency-map", headers, lambda: add_chains(4), reset=dependency_maps.clear
+    )
@@ -0,0 +1,71 @@
+"""Tests for the opt-in per-request SQL statement instrumentation."""
+
+from typing import Dict
+
+from app.core import instrumentation
+from tests.factories import create_project, create_task, create_user, login_user
+
+
+def auth_headers(db_session, username: str, password: str = "secret123") -> Dict[str, str]:
+    token = login_user(db_session, username, password)
+    return {"Authorization": f"Bearer {token}"}
+
+
+def query_count(response) -> int:
+    return int(response.headers[instrumentation.QUERY_COUNT_HEADER])
+
+
+def test_headers_report_statement_count_and_timing(instrumented_client, db_session):
+    owner = create_user(db_session, "sql_owner", "sql_owner@example.com")
+    project = create_project(db_session, owner, name="Counted")
+    create_task(db_session, owner, project, title="Counted task")
+    headers = auth_headers(db_session, owner.username)
+
+    response = instrumented_client.get(f"/projects/{project.id}/tasks", headers=headers)
+    assert response.status_code == 200
+    assert query_count(response) > 0
+    assert float(response.headers[instrumentation.QUERY_TIME_HEADER]) >= 0
+    assert float(response.headers[instrumentation.SLOWEST_QUERY_HEADER]) <= float(
+        response.headers[instrumentation.QUERY_TIME_HEADER]
+    )
+
+
+def test_statements_outside_requests_are_not_counted(instrumented_client, db_session):
+    owner = create_user(db_session, "sql_quiet", "sql_quiet@example.com")
+    headers = auth_headers(db_session, owner.username)
+
+    # The factories above ran queries outside any request; none may leak in.
+    response = instrumented_client.get("/debug/sql-report")
+    assert response.status_code == 200
+    assert response.json() == {}
+
+    me = instrumented_client.get("/users/me", headers=headers)
+    report = instrumented_client.get("/debug/sql-report").json()
+    assert report["GET /users/me"]["statements"] == query_count(me)
+
+
+def test_report_aggregates_per_route_template(instrumented_client, db_session):
+    owner = create_user(db_session, "sql_report", "sql_report@example.com")
+    project_a = create_project(db_session, owner, name="Report A")
+    project_b = create_project(db_session, owner, name="Report B")
+    headers = auth_headers(db_session, owner.username)
+
+    counts = [
+        query_count(instrumented_client.get(f"/projects/{project.id}/tasks", headers=headers))
+        for project in (project_a, project_b)
+    ]
+
+    report = instrumented_client.get("/debug/sql-report").json()
+    route = report["GET /projects/{project_id}/tasks"]
+    assert route["requests"] == 2
+    assert route["statements"] == sum(counts)
+    assert route["max_statements"] == max(counts)
+    assert route["slowest_statement"].lstrip().upper().startswith("SELECT")
+
+
+def test_instrumentation_is_opt_in(api_client, db_session):
+    owner = create_user(db_session, "sql_off", "sql_off@example.com")
+    response = api_client.get("/users/me", headers=auth_headers(db_session, owner.username))
+    assert response.status_code == 200
+    assert instrumentation.QUERY_COUNT_HEADER not in response.headers
+    assert api_client.get("/debug/sql-report").status_code == 404
@@ -0,0 +1,153 @@
+"""Tests for the Prometheus metrics registry and the /metrics endpoint."""
+
+import re
+from typing import Dict
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from app.core import metrics
+from app.core.app import create_app
+from app.core.database import TimedQueuePool
+from tests.factories import create_project, create_user, login_user
+
+SAMPLE = re.compile(r"^(?P<name>[a-z_]+)(?P<labels>\{.*\})? (?P<value>\S+)$")
+
+
+def auth_headers(db_session, username: str, password: str = "secret123") -> Dict[str, str]:
+    token = login_user(db_session, username, password)
+    return {"Authorization": f"Bearer {token}"}
+
+
+def parse_samples(text: str) -> Dict[str, float]:
+    samples = {}
+    for line in text.splitlines():
+        if line.startswith("#") or not line:
+            continue
+        match = SAMPLE.match(line)
+        assert match, line
+        samples[match.group("name") + (match.group("labels") or "")] = float(match.group("value"))
+    return samples
+
+
+def scrape(client) -> Dict[str, float]:
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    return parse_samples(response.text)
+
+
+def test_latency_is_recorded_per_route_template(api_client, db_session):
+    owner = create_user(db_session, "metrics_owner", "metrics_owner@example.com")
+    projects = [create_project(db_session, owner, name=f"Metrics {index}") for index in range(2)]
+    headers = auth_headers(db_session, owner.username)
+    count_key = 'dsbp_http_request_duration_seconds_count{method="GET",route="/projects/{project_id}/tasks"}'
+    inf_key = 'dsbp_http_request_duration_seconds_bucket{method="GET",route="/projects/{project_id}/tasks",le="+Inf"}'
+
+    before = scrape(api_client)
+    for project in projects:
+        assert api_client.get(f"/projects/{project.id}/tasks", headers=headers).status_code == 200
+    after = scrape(api_client)
+
+    assert after[count_key] - before.get(count_key, 0) == 2
+    assert after[inf_key] == after[count_key]
+    assert not any(f"/projects/{projects[0].id}/tasks" in key for key in after)
+    # Only the scrape itself is in flight.
+    assert after["dsbp_http_requests_in_progress"] == 1
+
+
+def test_server_errors_are_counted(db_session):
+    app = create_app()
+
+    @app.get("/boom")
+    def boom():
+        raise RuntimeError("boom")
+
+    key = 'dsbp_http_request_errors_total{method="GET",route="/boom",status="500"}'
+    with TestClient(app, raise_server_exceptions=False) as client:
+        before = scrape(client).get(key, 0)
+        assert client.get("/boom").status_code == 500
+        assert scrape(client)[key] - before == 1
+
+
+def test_pool_gauges_and_checkout_histogram(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", pool_size=3)
+    try:
+        metrics.watch_pool("test", engine)
+        with engine.connect():
+            samples = parse_samples(metrics.registry.render())
+            assert samples['dsbp_db_pool_size{pool="test"}'] == 3
+            assert samples['dsbp_db_pool_checked_out{pool="test"}'] == 1
+        samples = parse_samples(metrics.registry.render())
+        assert samples['dsbp_db_pool_checked_out{pool="test"}'] == 0
+    finally:
+        metrics.registry._collectors.pop("pool:test", None)
+        engine.dispose()
+
+    key = 'dsbp_db_pool_checkout_seconds_count{pool="test"}'
+    before = parse_samples(metrics.registry.render()).get(key, 0)
+    metrics.observe_checkout("test", 0.0)
+    assert parse_samples(metrics.registry.render())[key] - before == 1
+
+
+def test_checkouts_are_timed_when_a_session_first_uses_the_pool(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'timed.db'}", poolclass=TimedQueuePool, pool_logging_name="timed", pool_size=1
+    )
+    key = 'dsbp_db_pool_checkout_seconds_count{pool="timed"}'
+    try:
+        before = parse_samples(metrics.registry.render()).get(key, 0)
+        with Session(engine) as session:
+            assert engine.pool.checkedout() == 0
+            session.execute(text("SELECT 1"))
+            session.execute(text("SELECT 2"))
+            assert engine.pool.checkedout() == 1
+        assert parse_samples(metrics.registry.render())[key] - before == 1
+    finally:
+        engine.dispose()
+
+
+def _worker_registry(directory, pid: int):
+    registry = metrics.MetricsRegistry(str(directory), pid=pid)
+    jobs = registry.counter("jobs_total", "Jobs.", ("kind",))
+    busy = registry.gauge("busy", "Busy workers.")
+    latency = registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+    return registry, jobs, busy, latency
+
+
+def test_multiprocess_snapshots_are_merged(tmp_path):
+    first, *first_metrics = _worker_registry(tmp_path, pid=101)
+    second, *second_metrics = _worker_registry(tmp_path, pid=102)
+    for (jobs, busy, latency), observed in ((first_metrics, 0.05), (second_metrics, 0.5)):
+        jobs.inc(kind="sync")
+        busy.inc()
+        latency.observe(observed)
+    second_metrics[0].inc(kind="sync")
+    second.write_snapshot()
+
+    samples = parse_samples(first.render())
+    assert samples['jobs_total{kind="sync"}'] == 3
+    assert samples["busy"] == 2
+    assert samples['latency_seconds_bucket{le="0.1"}'] == 1
+    assert samples['latency_seconds_bucket{le="1.0"}'] == 2
+    assert samples["latency_seconds_count"] == 2
+
+    # A worker that has shut down keeps contributing counters but not gauges.
+    second.write_snapshot(live=False)
+    samples = parse_samples(first.render())
+    assert samples['jobs_total{kind="sync"}'] == 3
+    assert samples["busy"] == 1
+
+
+def test_forked_workers_write_their_own_snapshots(tmp_path, monkeypatch):
+    """A registry created before the server forks names each snapshot after the writing worker."""
+    monkeypatch.setattr(metrics.os, "getpid", lambda: 300)
+    registry = metrics.MetricsRegistry(str(tmp_path))
+    jobs = registry.counter("jobs_total", "Jobs.", ("kind",))
+    for pid in (301, 302):
+        monkeypatch.setattr(metrics.os, "getpid", lambda pid=pid: pid)
+        jobs.inc(kind="sync")
+        registry.write_snapshot()
+
+    assert sorted(path.name for path in tmp_path.glob("metrics_*.json")) == ["metrics_301.json", "metrics_302.json"]
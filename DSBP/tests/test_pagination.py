@@ -0,0 +1,157 @@
+"""Keyset pagination of the list endpoints."""
+
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+import app.models as models
+from app.api.pagination import NEXT_CURSOR_HEADER
+from app.core import instrumentation
+from tests.factories import create_project, create_task, create_user, login_user
+
+
+def auth_headers(db_session, username: str, password: str = "secret123") -> Dict[str, str]:
+    token = login_user(db_session, username, password)
+    return {"Authorization": f"Bearer {token}"}
+
+
+def walk_pages(client, path: str, headers: Dict[str, str], limit: int) -> Tuple[List[dict], int]:
+    """Follow X-Next-Cursor from the first page to the last one."""
+    items: List[dict] = []
+    pages = 0
+    params = {"limit": limit}
+    while True:
+        response = client.get(path, params=params, headers=headers)
+        assert response.status_code == 200, response.text
+        page = response.json()
+        assert len(page) <= limit
+        items.extend(page)
+        pages += 1
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            return items, pages
+        params = {"limit": limit, "cursor": cursor}
+
+
+def test_task_pages_cover_every_task_once(api_client, db_session):
+    owner = create_user(db_session, "pager", "pager@example.com")
+    project = create_project(db_session, owner, name="Paged")
+    tasks = [create_task(db_session, owner, project, title=f"Task {index}") for index in range(7)]
+    # Rows sharing a timestamp must still page deterministically.
+    tied = datetime(2030, 1, 1, 12, 0, 0)
+    for task in tasks[2:5]:
+        task.created_at = tied
+    db_session.commit()
+    headers = auth_headers(db_session, owner.username)
+
+    unpaged = api_client.get(f"/projects/{project.id}/tasks", headers=headers).json()
+    for path in (f"/projects/{project.id}/tasks", "/tasks"):
+        items, pages = walk_pages(api_client, path, headers, limit=3)
+        assert pages == 3
+        assert [item["id"] for item in items] == [item["id"] for item in unpaged]
+        assert sorted(item["id"] for item in items) == sorted(task.id for task in tasks)
+
+
+def test_projects_users_and_notifications_paginate(api_client, db_session):
+    owner = create_user(db_session, "pages_owner", "pages_owner@example.com")
+    reader = create_user(db_session, "pages_reader", "pages_reader@example.com")
+    for index in range(5):
+        create_user(db_session, f"pages_extra{index}", f"pages_extra{index}@example.com")
+    projects = [create_project(db_session, owner, name=f"Project {index}") for index in range(5)]
+    for project in projects:
+        task = create_task(db_session, owner, project, title="Mention")
+        response = api_client.post(
+            "/comments",
+            json={"task_id": task.id, "content": f"@{reader.username} ping"},
+            headers=auth_headers(db_session, owner.username),
+        )
+        assert response.status_code == 201
+
+    projects_out, _ = walk_pages(api_client, "/projects", auth_headers(db_session, owner.username), limit=2)
+    assert [project["name"] for project in projects_out] == [f"Project {index}" for index in reversed(range(5))]
+
+    users_out, _ = walk_pages(api_client, "/users", auth_headers(db_session, owner.username), limit=2)
+    usernames = [user["username"] for user in users_out]
+    assert usernames == sorted(usernames)
+    assert len(usernames) == 7
+
+    notifications, pages = walk_pages(api_client, "/notifications", auth_headers(db_session, reader.username), limit=2)
+    assert pages == 3
+    assert len({notification["id"] for notification in notifications}) == 5
+
+
+def test_comment_pages_keep_whole_threads(api_client, db_session):
+    owner = create_user(db_session, "thread_pager", "thread_pager@example.com")
+    project = create_project(db_session, owner, name="Threads")
+    task = create_task(db_session, owner, project, title="Discussed")
+    for index in range(4):
+        root = models.Comment(content=f"root {index}", task_id=task.id, author_id=owner.id)
+        db_session.add(root)
+        db_session.flush()
+        reply = models.Comment(content=f"reply {index}", task_id=task.id, author_id=owner.id, parent_id=root.id)
+        db_session.add(reply)
+        db_session.flush()
+        db_session.add(models.Comment(content=f"nested {index}", task_id=task.id, author_id=owner.id, parent_id=reply.id))
+    db_session.commit()
+
+    threads, pages = walk_pages(api_client, f"/tasks/{task.id}/comments", auth_headers(db_session, owner.username), limit=3)
+    assert pages == 2
+    assert [thread["content"] for thread in threads] == [f"root {index}" for index in range(4)]
+    for index, thread in enumerate(threads):
+        assert thread["replies"][0]["content"] == f"reply {index}"
+        assert thread["replies"][0]["replies"][0]["content"] == f"nested {index}"
+
+
+def test_task_history_pages_activities_but_counts_whole_range(api_client, db_session):
+    owner = create_user(db_session, "history_pager", "history_pager@example.com")
+    project = create_project(db_session, owner, name="History Pages")
+    for index in range(5):
+        create_task(db_session, owner, project, title=f"Task {index}")
+    headers = auth_headers(db_session, owner.username)
+
+    first = api_client.get(f"/projects/{project.id}/task-history", params={"limit": 2}, headers=headers).json()
+    assert len(first["activities"]) == 2
+    assert sum(first["daily_counts"].values()) == 5
+    assert first["next_cursor"]
+
+    seen = [activity["id"] for activity in first["activities"]]
+    cursor = first["next_cursor"]
+    while cursor:
+        page = api_client.get(
+            f"/projects/{project.id}/task-history",
+            params={"limit": 2, "cursor": cursor},
+            headers=headers,
+        ).json()
+        seen.extend(activity["id"] for activity in page["activities"])
+        cursor = page["next_cursor"]
+    assert len(seen) == len(set(seen)) == 5
+
+
+def test_deep_pages_cost_the_same_as_the_first(instrumented_client, db_session):
+    owner = create_user(db_session, "deep_pager", "deep_pager@example.com")
+    project = create_project(db_session, owner, name="Deep")
+    for index in range(9):
+        create_task(db_session, owner, project, title=f"Task {index}")
+    headers = auth_headers(db_session, owner.username)
+
+    instrumented_client.get("/users/me", headers=headers)  # warm the principal cache
+    counts = []
+    params = {"limit": 3}
+    for _ in range(3):
+        db_session.expire_all()
+        response = instrumented_client.get(f"/projects/{project.id}/tasks", params=params, headers=headers)
+        counts.append(int(response.headers[instrumentation.QUERY_COUNT_HEADER]))
+        params = {"limit": 3, "cursor": response.headers.get(NEXT_CURSOR_HEADER)}
+    assert len(set(counts)) == 1
+
+
+def test_rejects_bad_cursors_and_oversized_pages(api_client, db_session):
+    owner = create_user(db_session, "bad_cursor", "bad_cursor@example.com")
+    headers = auth_headers(db_session, owner.username)
+
+    for cursor in ("not-a-cursor", "WzFd", "eyJhIjoxfQ"):
+        response = api_client.get("/projects", params={"cursor": cursor}, headers=headers)
+        assert response.status_code == 400, cursor
+        assert response.json()["detail"] == "Invalid cursor"
+
+    assert api_client.get("/projects", params={"limit": 0}, headers=headers).status_code == 422
+    assert api_client.get("/projects", params={"limit": 10_000}, headers=headers).status_code == 422
@@ -0,0 +1,142 @@
+"""Tests for the bounded password-hashing executor."""
+
+import threading
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+import app.api.routes as routes
+import app.models as models
+import app.schemas as schemas
+from app.services import auth
+from app.services.hashing import HashingExecutor
+from tests.factories import create_user
+
+
+def _block(release: threading.Event, started: threading.Event, rounds: int) -> None:
+    started.set()
+    release.wait(5)
+
+
+def _saturate(executor: HashingExecutor):
+    """Occupy the executor's only slot until the returned event is set."""
+    release, started = threading.Event(), threading.Event()
+    holder = threading.Thread(target=executor.run, args=(_block, release, started))
+    holder.start()
+    assert started.wait(5)
+    return release, holder
+
+
+def test_saturated_executor_rejects_with_503():
+    executor = HashingExecutor(workers=1, max_pending=1, rounds=4)
+    release, holder = _saturate(executor)
+    try:
+        with pytest.raises(HTTPException) as excinfo:
+            executor.hash("secret123")
+        assert excinfo.value.status_code == 503
+        assert excinfo.value.headers["Retry-After"] == "1"
+    finally:
+        release.set()
+        holder.join()
+    assert executor.verify_and_update("secret123", executor.hash("secret123")) == (True, None)
+    executor.shutdown()
+
+
+def test_login_returns_503_while_hashing_is_saturated(api_client, db_session, monkeypatch):
+    create_user(db_session, "burst", "burst@example.com")
+    executor = HashingExecutor(workers=1, max_pending=1, rounds=4)
+    monkeypatch.setattr(auth, "hashing_executor", executor)
+    release, holder = _saturate(executor)
+    try:
+        response = api_client.post("/auth/login", json={"username": "burst", "password": "secret123"})
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+    finally:
+        release.set()
+        holder.join()
+        executor.shutdown()
+
+
+def test_login_rehashes_when_the_work_factor_changes(api_client, db_session, monkeypatch):
+    user = create_user(db_session, "rehash", "rehash@example.com")
+    original = user.hashed_password
+    assert ",r=4$" in original
+
+    executor = HashingExecutor(workers=1, max_pending=4, rounds=5)
+    monkeypatch.setattr(auth, "hashing_executor", executor)
+    credentials = {"username": "rehash", "password": "secret123"}
+    try:
+        assert api_client.post("/auth/login", json=credentials).status_code == 200
+        db_session.expire_all()
+        upgraded = db_session.get(models.User, user.id).hashed_password
+        assert ",r=5$" in upgraded
+
+        assert api_client.post("/auth/login", json=credentials).status_code == 200
+        db_session.expire_all()
+        assert db_session.get(models.User, user.id).hashed_password == upgraded
+
+        wrong = {"username": "rehash", "password": "wrong-password"}
+        assert api_client.post("/auth/login", json=wrong).status_code == 401
+    finally:
+        executor.shutdown()
+
+
+def test_auth_hashes_without_holding_a_connection(file_client, file_database, monkeypatch):
+    """Register and login release their connection before the password is hashed."""
+    connections_in_use = []
+    get_password_hash, verify_and_update_password = auth.get_password_hash, auth.verify_and_update_password
+
+    def checked_out(hash_function):
+        def wrapper(*args):
+            connections_in_use.append(
+                file_database.engine.pool.checkedout() + file_database.read_engine.pool.checkedout()
+            )
+            return hash_function(*args)
+
+        return wrapper
+
+    monkeypatch.setattr(auth, "get_password_hash", checked_out(get_password_hash))
+    monkeypatch.setattr(auth, "verify_and_update_password", checked_out(verify_and_update_password))
+    executor = HashingExecutor(workers=1, max_pending=4, rounds=4)
+    monkeypatch.setattr(auth, "hashing_executor", executor)
+    credentials = {"username": "pool_free", "password": "secret123"}
+    try:
+        response = file_client.post("/auth/register", json={**credentials, "email": "pool_free@example.com"})
+        assert response.status_code == 201
+        executor.rounds = 5  # The next login rehashes and stores the new hash.
+        assert file_client.post("/auth/login", json=credentials).status_code == 200
+    finally:
+        executor.shutdown()
+
+    assert connections_in_use == [0, 0]
+    with file_database.ReadSessionLocal() as session:
+        stored = session.query(models.User).filter(models.User.username == "pool_free").one()
+        assert ",r=5$" in stored.hashed_password
+
+
+def test_register_reports_a_name_taken_while_hashing(db_session, monkeypatch):
+    get_password_hash = auth.get_password_hash
+
+    def register_concurrently(password):
+        with Session(db_session.get_bind()) as other:
+            other.add(models.User(username="racer", email="racer@example.com", hashed_password="x"))
+            other.commit()
+        return get_password_hash(password)
+
+    monkeypatch.setattr(auth, "get_password_hash", register_concurrently)
+    user_in = schemas.UserCreate(username="racer", email="racer2@example.com", password="secret123")
+    with pytest.raises(HTTPException) as excinfo:
+        routes.register(user_in, db_session)
+    assert excinfo.value.status_code == 400
+    assert excinfo.value.detail == "Username or email already registered"
+
+
+def test_process_pool_hashes_and_verifies():
+    executor = HashingExecutor(workers=1, max_pending=2, use_processes=True, rounds=4)
+    try:
+        hashed = executor.hash("secret123")
+        assert executor.verify_and_update("secret123", hashed) == (True, None)
+        assert executor.verify_and_update("nope", hashed)[0] is False
+    finally:
+        executor.shutdown()
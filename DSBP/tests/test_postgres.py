@@ -0,0 +1,169 @@
+"""The API against a real PostgreSQL server, covering its backend-specific SQL.
+
+Skipped unless ``TEST_POSTGRES_URL`` is set; see the ``postgres_session``
+fixture. Besides the hot list queries these cover the statements that only
+PostgreSQL runs: the ``tsvector`` search, the ``ON CONFLICT`` counter upsert
+and ``UPDATE ... RETURNING`` version bumps.
+"""
+
+import threading
+from datetime import datetime, timedelta
+from typing import Dict
+
+import app.api.routes as routes
+import app.models as models
+from app.services import activity_rollup, status_counts
+from app.services.dependency_maps import project_map_statements
+from tests.factories import create_dependency, create_project, create_task, create_user, login_user
+
+
+def auth_headers(session, username: str, password: str = "secret123") -> Dict[str, str]:
+    token = login_user(session, username, password)
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_hot_list_queries(postgres_session):
+    session = postgres_session
+    owner = create_user(session, "pg_owner", "pg_owner@example.com")
+    viewer = create_user(session, "pg_viewer", "pg_viewer@example.com")
+    project = create_project(session, owner, name="PG Project", visibility="selected", shared_usernames=[viewer.username])
+    task_a = create_task(session, owner, project, title="PG A")
+    task_b = create_task(session, owner, project, title="PG B")
+    create_dependency(session, owner, depends_on=task_a, dependent=task_b)
+
+    tasks = session.execute(routes.accessible_tasks_statement(viewer)).scalars().all()
+    assert sorted(task.id for task in tasks) == sorted([task_a.id, task_b.id])
+    projects = session.execute(routes.accessible_projects_statement(viewer)).scalars().all()
+    assert [p.id for p in projects] == [project.id]
+    tasks_stmt, dependencies_stmt = project_map_statements([project.id])
+    assert len(session.execute(tasks_stmt).all()) == 2
+    assert len(session.execute(dependencies_stmt).all()) == 1
+
+
+def test_version_bumps_and_status_counters(postgres_client, postgres_session):
+    session = postgres_session
+    owner = create_user(session, "pg_writer", "pg_writer@example.com")
+    project = create_project(session, owner, name="PG Writes")
+    version = project.version
+    task = create_task(session, owner, project, title="Counted", status="new_task")
+    headers = auth_headers(session, owner.username)
+
+    response = postgres_client.patch(f"/tasks/{task.id}", json={"status": "completed"}, headers=headers)
+    assert response.status_code == 200
+    response = postgres_client.post(
+        "/tasks/batch",
+        json={"operations": [{"op": "create", "project_id": project.id, "title": "More", "status": "completed"}]},
+        headers=headers,
+    )
+    assert response.status_code == 200
+    session.expire_all()
+    assert session.get(models.Project, project.id).version == version + 3
+    assert status_counts.project_counts(session, project.id) == {"completed": 2}
+    dashboard = postgres_client.get(f"/projects/{project.id}/dashboard", headers=headers).json()
+    assert dashboard["status_counts"] == {"completed": 2}
+
+    status_counts.rebuild(session)
+    session.commit()
+    assert status_counts.project_counts(session, project.id) == {"completed": 2}
+
+
+def test_full_text_search(postgres_client, postgres_session):
+    session = postgres_session
+    owner = create_user(session, "pg_search", "pg_search@example.com")
+    project = create_project(session, owner, name="PG Search")
+    titled = create_task(session, owner, project, title="Rocket engines", description="Static fire")
+    described = create_task(session, owner, project, title="Paperwork", description="Permit for the rocket range")
+    headers = auth_headers(session, owner.username)
+    postgres_client.post("/comments", json={"task_id": described.id, "content": "Rockets <b>fuel</b>"}, headers=headers)
+
+    hits = postgres_client.get("/search", params={"q": "rocket"}, headers=headers).json()
+    assert [(hit["kind"], hit["task_id"]) for hit in hits][0] == ("task", titled.id)
+    assert {hit["kind"] for hit in hits} == {"task", "comment"} and len(hits) == 3
+    comment_hit = next(hit for hit in hits if hit["kind"] == "comment")
+    assert "<mark>Rockets</mark>" in comment_hit["snippet"] and "<b>" not in comment_hit["snippet"]
+
+    pages = []
+    params = {"q": "rocket", "limit": 1}
+    while True:
+        response = postgres_client.get("/search", params=params, headers=headers)
+        pages.extend((hit["kind"], hit["id"]) for hit in response.json())
+        if "X-Next-Cursor" not in response.headers:
+            break
+        params["cursor"] = response.headers["X-Next-Cursor"]
+    assert pages == [(hit["kind"], hit["id"]) for hit in hits]
+
+
+def test_task_filters_and_history_counts(postgres_client, postgres_session):
+    session = postgres_session
+    owner = create_user(session, "pg_filters", "pg_filters@example.com")
+    project = create_project(session, owner, name="PG Filters")
+    dated = create_task(session, owner, project, title="Dated")
+    undated = create_task(session, owner, project, title="Undated")
+    dated.due_date = datetime(2030, 1, 1)
+    session.add(
+        models.TaskActivity(
+            user_id=owner.id,
+            project_id=project.id,
+            action="created",
+            created_at=datetime.utcnow() - timedelta(days=2),
+        )
+    )
+    session.commit()
+    headers = auth_headers(session, owner.username)
+
+    for sort, expected in (("due_date", [dated.id, undated.id]), ("-due_date", [dated.id, undated.id])):
+        ids = []
+        params = {"sort": sort, "limit": 1}
+        while True:
+            response = postgres_client.get(f"/projects/{project.id}/tasks", params=params, headers=headers)
+            ids.extend(task["id"] for task in response.json())
+            if "X-Next-Cursor" not in response.headers:
+                break
+            params["cursor"] = response.headers["X-Next-Cursor"]
+        assert ids == expected
+
+    assert activity_rollup.roll_up(session) == 1
+    session.commit()
+    history = postgres_client.get(
+        f"/projects/{project.id}/task-history",
+        params={"start_date": str((datetime.utcnow() - timedelta(days=7)).date())},
+        headers=headers,
+    ).json()
+    assert sum(history["daily_counts"].values()) == 3
+
+
+def test_concurrent_roll_ups_skip_rows_already_written(postgres_session):
+    session = postgres_session
+    owner = create_user(session, "pg_rollup", "pg_rollup@example.com")
+    project = create_project(session, owner, name="PG Rollup")
+    for days_ago in (3, 2, 2):
+        session.add(
+            models.TaskActivity(
+                user_id=owner.id,
+                project_id=project.id,
+                action="created",
+                created_at=datetime.utcnow() - timedelta(days=days_ago),
+            )
+        )
+    session.commit()
+    engine = session.get_bind()
+    second_worker = []
+
+    def roll_up_in_second_worker():
+        with engine.begin() as connection:
+            second_worker.append(activity_rollup.roll_up(connection))
+
+    with engine.begin() as connection:
+        assert activity_rollup.roll_up(connection) == 2
+        # Started before the first worker commits, so the second worker sees no
+        # roll-up rows yet and writes the same keys; its insert waits on ours.
+        thread = threading.Thread(target=roll_up_in_second_worker)
+        thread.start()
+        thread.join(timeout=0.5)
+    thread.join()
+
+    assert second_worker == [0]
+    counts = activity_rollup.daily_counts(
+        session, project.id, owner.id, datetime.utcnow() - timedelta(days=7), datetime.utcnow()
+    )
+    assert sorted(counts.values()) == [1, 2]
@@ -0,0 +1,102 @@
+"""Tests for the authenticated principal cache."""
+
+from typing import Dict
+
+import app.models as models
+from app.core import instrumentation
+from app.services import auth
+from app.services.principals import Principal, PrincipalCache, principal_cache
+from tests.factories import create_user, login_user
+
+
+def auth_headers(db_session, username: str, password: str = "secret123") -> Dict[str, str]:
+    # Tokens carrying a license claim skip the cache; a subject-only token
+    # exercises the lookup path the cache sits in front of.
+    login_user(db_session, username, password)
+    token = auth.create_access_token(data={"sub": username})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def query_count(response) -> int:
+    return int(response.headers[instrumentation.QUERY_COUNT_HEADER])
+
+
+def principal(user_id: int, username: str, has_license: bool = True) -> Principal:
+    return Principal(id=user_id, username=username, email=f"{username}@example.com", created_at=None, has_license=has_license)
+
+
+def test_cached_principal_authenticates_without_queries(instrumented_client, db_session):
+    user = create_user(db_session, "cached", "cached@example.com")
+    headers = auth_headers(db_session, user.username)
+
+    first = instrumented_client.get("/users/me", headers=headers)
+    assert first.status_code == 200
+    assert query_count(first) > 0
+
+    db_session.expire_all()
+    second = instrumented_client.get("/users/me", headers=headers)
+    assert second.status_code == 200
+    assert second.json() == first.json()
+    assert query_count(second) == 0
+
+
+def test_license_changes_invalidate_the_cache(api_client, db_session):
+    user = create_user(db_session, "revoked", "revoked@example.com")
+    headers = auth_headers(db_session, user.username)
+    assert api_client.get("/projects", headers=headers).status_code == 200
+    assert principal_cache.get(user.username) is not None
+
+    db_session.delete(db_session.query(models.UserLicense).filter_by(user_id=user.id).one())
+    db_session.commit()
+    assert principal_cache.get(user.username) is None
+    assert api_client.get("/projects", headers=headers).status_code == 403
+
+
+def test_deleted_user_is_rejected(api_client, db_session):
+    user = create_user(db_session, "deleted", "deleted@example.com")
+    headers = auth_headers(db_session, user.username)
+    assert api_client.get("/users/me", headers=headers).status_code == 200
+
+    db_session.delete(user)
+    db_session.commit()
+    assert api_client.get("/users/me", headers=headers).status_code == 401
+
+
+def test_unlicensed_principals_are_not_cached(api_client, db_session):
+    user = create_user(db_session, "unlicensed", "unlicensed@example.com")
+    headers = auth_headers(db_session, user.username)
+    license_id = db_session.query(models.UserLicense.license_id).filter_by(user_id=user.id).scalar()
+    # Raw SQL bypasses the ORM events, like a change made by another worker.
+    connection = db_session.connection()
+    connection.exec_driver_sql("DELETE FROM user_licenses WHERE user_id = ?", (user.id,))
+    db_session.commit()
+    principal_cache.clear()
+
+    assert api_client.get("/projects", headers=headers).status_code == 403
+    assert principal_cache.get(user.username) is None
+
+    connection = db_session.connection()
+    connection.exec_driver_sql(
+        "INSERT INTO user_licenses (user_id, license_id) VALUES (?, ?)", (user.id, license_id)
+    )
+    db_session.commit()
+    assert api_client.get("/projects", headers=headers).status_code == 200
+
+
+def test_cache_is_bounded_lru_with_ttl():
+    now = [0.0]
+    cache = PrincipalCache(max_entries=2, ttl_seconds=10, clock=lambda: now[0])
+    cache.put("a", principal(1, "a"))
+    cache.put("b", principal(2, "b"))
+    assert cache.get("a") is not None
+    cache.put("c", principal(3, "c"))
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert len(cache) == 2
+
+    cache.invalidate_user(3)
+    assert cache.get("c") is None
+
+    now[0] = 10.0
+    assert cache.get("a") is None
+    assert len(cache) == 0
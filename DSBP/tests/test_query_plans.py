@@ -0,0 +1,195 @@
+"""Query-plan regression tests for the routes' queries.
+
+Each test calls an endpoint, records the SELECT statements it ran and fails
+if ``EXPLAIN QUERY PLAN`` shows SQLite scanning one of the tables the route
+filters on, or sorting a list the index should already return in order.
+"""
+
+import logging
+import re
+from contextlib import contextmanager
+from types import SimpleNamespace
+from typing import Any, Iterator, List, Tuple
+
+import pytest
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.exc import IntegrityError
+
+import app.models as models
+from app.api.pagination import NEXT_CURSOR_HEADER
+from app.core.database import Base, create_missing_indexes
+from tests.factories import create_dependency, create_project, create_task, create_user, login_user
+
+FULL_SCAN = re.compile(r"^SCAN (?P<table>\w+)(?! USING (COVERING )?INDEX)")
+
+
+@contextmanager
+def recorded_selects(engine) -> Iterator[List[Tuple[str, Any]]]:
+    """Collect the SELECT statements, with their parameters, run on ``engine``."""
+    statements: List[Tuple[str, Any]] = []
+
+    def record(connection, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def route_plans(client, engine, path: str, headers) -> List[List[str]]:
+    """Return the query plan of every SELECT the route at ``path`` runs."""
+    with recorded_selects(engine) as statements:
+        response = client.get(path, headers=headers)
+    assert response.status_code == 200, response.text
+    with engine.connect() as connection:
+        return [
+            [row[3] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()]
+            for statement, parameters in statements
+        ]
+
+
+def assert_uses_indexes(plans: List[List[str]], tables: List[str], ordered: bool) -> None:
+    lines = [line for plan in plans for line in plan]
+    for table in tables:
+        assert any(re.search(rf"\b{table}\b", line) for line in lines), f"{table} not queried: {plans}"
+        scans = [line for line in lines if (match := FULL_SCAN.match(line)) and match.group("table") == table]
+        assert not scans, f"full scan of {table}: {plans}"
+        # SQLite builds a throwaway index when no declared one fits.
+        built = [line for line in lines if line.startswith(f"SEARCH {table} USING AUTOMATIC")]
+        assert not built, f"no index on {table} fits: {plans}"
+    if ordered:
+        assert not any("TEMP B-TREE FOR ORDER BY" in line for line in lines), plans
+
+
+@pytest.fixture()
+def workspace(db_session, api_client):
+    owner = create_user(db_session, "plan_owner", "plan_owner@example.com")
+    project = create_project(db_session, owner, name="Plans")
+    upstream = create_task(db_session, owner, project, title="Launch rocket")
+    downstream = create_task(db_session, owner, project, title="Land rocket")
+    create_dependency(db_session, owner, depends_on=upstream, dependent=downstream)
+    headers = {"Authorization": f"Bearer {login_user(db_session, 'plan_owner')}"}
+    root = api_client.post("/comments", json={"task_id": upstream.id, "content": "rocket fuel"}, headers=headers)
+    api_client.post(
+        "/comments",
+        json={"task_id": upstream.id, "content": "refuelled", "parent_id": root.json()["id"]},
+        headers=headers,
+    )
+    return SimpleNamespace(
+        engine=db_session.get_bind(),
+        headers=headers,
+        owner=owner.id,
+        project=project.id,
+        upstream=upstream.id,
+        downstream=downstream.id,
+    )
+
+
+@pytest.mark.parametrize(
+    "path, tables, ordered",
+    [
+        ("/projects/{project}/tasks", ["tasks"], True),
+        ("/projects/{project}/tasks?status=scheduled", ["tasks"], True),
+        ("/projects/{project}/tasks?assignee_id={owner}", ["tasks", "task_assignees"], True),
+        ("/projects/{project}/tasks?due_before=2030-01-01T00:00:00&sort=due_date", ["tasks"], True),
+        ("/projects/{project}/tasks?created_after=2020-01-01T00:00:00&sort=created_at", ["tasks"], True),
+        ("/tasks", ["tasks", "projects", "project_shared_users"], True),
+        ("/tasks?status=scheduled", ["tasks", "projects"], True),
+        ("/search?q=rocket", ["tasks", "comments", "projects"], False),
+        ("/tasks/{downstream}/dependency-graph", ["task_dependencies", "tasks"], False),
+        ("/projects/{project}/dashboard", ["project_status_counts"], False),
+        ("/projects/{project}/task-history", ["task_activities"], True),
+        ("/notifications", ["notifications"], True),
+        ("/tasks/{upstream}/comments", ["comments"], False),
+    ],
+    ids=[
+        "project-tasks",
+        "project-tasks-status",
+        "project-tasks-assignee",
+        "project-tasks-due-date",
+        "project-tasks-created-after",
+        "tasks",
+        "tasks-status",
+        "search",
+        "dependency-graph",
+        "dashboard",
+        "task-history",
+        "notifications",
+        "comments",
+    ],
+)
+def test_route_queries_use_indexes(api_client, workspace, path, tables, ordered):
+    plans = route_plans(api_client, workspace.engine, path.format(**vars(workspace)), workspace.headers)
+    assert_uses_indexes(plans, tables, ordered)
+
+
+@pytest.mark.parametrize("path", ["/projects/{project}/tasks", "/tasks"])
+def test_cursor_pages_seek_the_index(api_client, workspace, path):
+    """A cursor page resumes from the index instead of scanning and sorting."""
+    path = path.format(**vars(workspace))
+    cursor = api_client.get(f"{path}?limit=1", headers=workspace.headers).headers[NEXT_CURSOR_HEADER]
+    plans = route_plans(api_client, workspace.engine, f"{path}?limit=1&cursor={cursor}", workspace.headers)
+    assert_uses_indexes(plans, ["tasks"], ordered=True)
+
+
+def test_duplicate_dependency_edges_are_rejected(db_session):
+    owner = create_user(db_session, "uq_owner", "uq_owner@example.com")
+    project = create_project(db_session, owner, name="Unique Edges")
+    task_a = create_task(db_session, owner, project, title="A")
+    task_b = create_task(db_session, owner, project, title="B")
+
+    db_session.add(models.TaskDependency(dependent_task_id=task_b.id, depends_on_task_id=task_a.id))
+    db_session.commit()
+    db_session.add(models.TaskDependency(dependent_task_id=task_b.id, depends_on_task_id=task_a.id))
+    with pytest.raises(IntegrityError):
+        db_session.commit()
+    db_session.rollback()
+
+
+def test_create_missing_indexes_upgrades_existing_database(tmp_path):
+    legacy_engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    try:
+        Base.metadata.create_all(bind=legacy_engine)
+        with legacy_engine.begin() as connection:
+            connection.exec_driver_sql("DROP INDEX ix_tasks_project_id_created_at")
+            connection.exec_driver_sql("DROP INDEX uq_task_dependencies_edge")
+
+        create_missing_indexes(legacy_engine)
+
+        index_names = {index["name"] for index in inspect(legacy_engine).get_indexes("tasks")}
+        assert "ix_tasks_project_id_created_at" in index_names
+        dependency_indexes = {index["name"]: index for index in inspect(legacy_engine).get_indexes("task_dependencies")}
+        assert dependency_indexes["uq_task_dependencies_edge"]["unique"]
+    finally:
+        legacy_engine.dispose()
+
+
+def test_create_missing_indexes_drops_duplicate_dependency_edges(tmp_path, caplog):
+    legacy_engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    try:
+        Base.metadata.create_all(bind=legacy_engine)
+        with legacy_engine.begin() as connection:
+            connection.exec_driver_sql("DROP INDEX uq_task_dependencies_edge")
+            connection.exec_driver_sql(
+                "INSERT INTO task_dependencies (id, dependent_task_id, depends_on_task_id) "
+                "VALUES (5, 2, 1), (3, 2, 1), (9, 2, 1), (4, 3, 1), (7, 3, 2), (8, 3, 2)"
+            )
+
+        with caplog.at_level(logging.WARNING, logger="app.core.database"):
+            create_missing_indexes(legacy_engine)
+
+        assert [record.getMessage() for record in caplog.records] == [
+            "Deleted 3 duplicate rows from task_dependencies before creating unique index uq_task_dependencies_edge"
+        ]
+        with legacy_engine.connect() as connection:
+            rows = connection.exec_driver_sql(
+                "SELECT id, dependent_task_id, depends_on_task_id FROM task_dependencies ORDER BY id"
+            ).all()
+        assert [tuple(row) for row in rows] == [(3, 2, 1), (4, 3, 1), (7, 3, 2)]
+        dependency_indexes = {index["name"]: index for index in inspect(legacy_engine).get_indexes("task_dependencies")}
+        assert dependency_indexes["uq_task_dependencies_edge"]["unique"]
+    finally:
+        legacy_engine.dispose()
@@ -0,0 +1,100 @@
+"""Full-text search over tasks and comments."""
+
+from typing import Dict
+
+import app.models as models
+from app.core import config
+from app.services.search import match_expression
+from tests.factories import create_project, create_task, create_user, login_user
+
+
+def auth_headers(db_session, username: str, password: str = "secret123") -> Dict[str, str]:
+    token = login_user(db_session, username, password)
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_search_ranks_tasks_and_comments_within_accessible_projects(api_client, db_session):
+    owner = create_user(db_session, "searcher", "searcher@example.com")
+    stranger = create_user(db_session, "search_stranger", "search_stranger@example.com")
+    project = create_project(db_session, owner, name="Launch")
+    hidden = create_project(db_session, stranger, name="Hidden", visibility="private")
+    titled = create_task(db_session, owner, project, title="Rocket engine test", description="Static fire")
+    described = create_task(db_session, owner, project, title="Paperwork", description="Permit for the rocket range")
+    create_task(db_session, stranger, hidden, title="Secret rocket")
+    headers = auth_headers(db_session, owner.username)
+    comment = api_client.post(
+        "/comments", json={"task_id": described.id, "content": "Rocket <b>fuel</b> arrives Monday"}, headers=headers
+    ).json()
+
+    response = api_client.get("/search", params={"q": "rocket"}, headers=headers)
+    assert response.status_code == 200
+    hits = response.json()
+    assert [(hit["kind"], hit["id"]) for hit in hits][0] == ("task", titled.id)
+    assert {(hit["kind"], hit["id"]) for hit in hits} == {
+        ("task", titled.id),
+        ("task", described.id),
+        ("comment", comment["id"]),
+    }
+    comment_hit = next(hit for hit in hits if hit["kind"] == "comment")
+    assert comment_hit["task_id"] == described.id and comment_hit["project_name"] == "Launch"
+    assert comment_hit["snippet"].startswith("<mark>Rocket</mark> &lt;b&gt;fuel")
+
+    # Whole words only, and no syntax errors from stray operators.
+    assert api_client.get("/search", params={"q": "rock"}, headers=headers).json() == []
+    assert api_client.get("/search", params={"q": '"(*'}, headers=headers).json() == []
+
+
+def test_search_index_follows_writes(api_client, db_session):
+    owner = create_user(db_session, "search_writer", "search_writer@example.com")
+    project = create_project(db_session, owner, name="Writes")
+    task = create_task(db_session, owner, project, title="Alpha")
+    headers = auth_headers(db_session, owner.username)
+
+    def found(text: str):
+        return [hit["id"] for hit in api_client.get("/search", params={"q": text}, headers=headers).json()]
+
+    assert found("alpha") == [task.id]
+    api_client.patch(f"/tasks/{task.id}", json={"title": "Bravo"}, headers=headers)
+    assert found("alpha") == [] and found("bravo") == [task.id]
+    api_client.delete(f"/tasks/{task.id}", headers=headers)
+    assert found("bravo") == []
+
+
+def test_search_pages_with_a_cursor(api_client, db_session):
+    owner = create_user(db_session, "search_pager", "search_pager@example.com")
+    project = create_project(db_session, owner, name="Pages")
+    tasks = [create_task(db_session, owner, project, title=f"Widget {index}") for index in range(5)]
+    headers = auth_headers(db_session, owner.username)
+
+    seen = []
+    params = {"q": "widget", "limit": 2}
+    while True:
+        response = api_client.get("/search", params=params, headers=headers)
+        seen.extend(hit["id"] for hit in response.json())
+        if "X-Next-Cursor" not in response.headers:
+            break
+        params["cursor"] = response.headers["X-Next-Cursor"]
+    assert sorted(seen) == sorted(task.id for task in tasks) and len(seen) == 5
+
+
+def test_search_flags_matches_left_unranked(api_client, db_session, monkeypatch):
+    owner = create_user(db_session, "search_capped", "search_capped@example.com")
+    project = create_project(db_session, owner, name="Capped")
+    tasks = [create_task(db_session, owner, project, title=f"Gadget {index}") for index in range(3)]
+    create_task(db_session, owner, project, title="Sprocket")
+    headers = auth_headers(db_session, owner.username)
+    monkeypatch.setattr(config, "SEARCH_RANKED_MATCHES", 2)
+
+    response = api_client.get("/search", params={"q": "gadget"}, headers=headers)
+    assert sorted(hit["id"] for hit in response.json()) == [tasks[1].id, tasks[2].id]
+    assert response.headers["X-Search-Truncated"] == "true"
+
+    response = api_client.get("/search", params={"q": "sprocket"}, headers=headers)
+    assert len(response.json()) == 1
+    assert "X-Search-Truncated" not in response.headers
+
+
+def test_match_expression_quotes_every_word():
+    assert match_expression('rocket "AND fuel*') == '"rocket" "AND" "fuel"'
+    assert match_expression("  -- ") is None
+
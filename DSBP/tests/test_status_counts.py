@@ -0,0 +1,118 @@
+"""Per-project status counters behind the dashboard."""
+
+from typing import Dict
+
+from sqlalchemy import create_engine, func
+
+import app.models as models
+from app.core import instrumentation
+from app.core.database import Base
+from app.services import status_counts
+from tests.factories import create_project, create_task, create_user, login_user
+
+
+def auth_headers(db_session, username: str, password: str = "secret123") -> Dict[str, str]:
+    token = login_user(db_session, username, password)
+    return {"Authorization": f"Bearer {token}"}
+
+
+def counted(db_session, project_id: int) -> Dict[str, int]:
+    """Status counts computed from ``tasks``, for comparison with the counters."""
+    rows = (
+        db_session.query(models.Task.status, func.count(models.Task.id))
+        .filter(models.Task.project_id == project_id)
+        .group_by(models.Task.status)
+    )
+    return dict(rows.all())
+
+
+def test_counters_follow_every_task_write(api_client, db_session):
+    owner = create_user(db_session, "counter_owner", "counter_owner@example.com")
+    project = create_project(db_session, owner, name="Counted")
+    first, second, third = (
+        create_task(db_session, owner, project, title=f"Task {index}", status=status)
+        for index, status in enumerate(["new_task", "new_task", "scheduled"])
+    )
+    headers = auth_headers(db_session, owner.username)
+
+    assert api_client.patch(f"/tasks/{first.id}", json={"status": "completed"}, headers=headers).status_code == 200
+    assert api_client.patch(f"/tasks/{second.id}", json={"title": "Renamed"}, headers=headers).status_code == 200
+    assert api_client.delete(f"/tasks/{third.id}", headers=headers).status_code == 204
+    response = api_client.post(
+        "/tasks/batch",
+        json={
+            "operations": [
+                {"op": "create", "project_id": project.id, "title": "Batched", "status": "in_progress"},
+                {"op": "update", "task_id": second.id, "status": "in_progress"},
+                {"op": "delete", "task_id": first.id},
+                {"op": "delete", "task_id": 10**6},
+            ]
+        },
+        headers=headers,
+    )
+    assert response.status_code == 200
+
+    db_session.expire_all()
+    assert status_counts.project_counts(db_session, project.id) == counted(db_session, project.id) == {"in_progress": 2}
+    dashboard = api_client.get(f"/projects/{project.id}/dashboard", headers=headers).json()
+    assert dashboard["status_counts"] == {"in_progress": 2} and dashboard["total_tasks"] == 2
+
+
+def test_dashboard_cost_does_not_grow_with_the_project(instrumented_client, db_session):
+    owner = create_user(db_session, "counter_size", "counter_size@example.com")
+    headers = auth_headers(db_session, owner.username)
+    counts = []
+    for size in (2, 30):
+        project = create_project(db_session, owner, name=f"Size {size}")
+        for index in range(size):
+            create_task(db_session, owner, project, title=f"Task {index}", status=["new_task", "scheduled"][index % 2])
+        response = instrumented_client.get(f"/projects/{project.id}/dashboard", headers=headers)
+        assert response.json()["total_tasks"] == size
+        counts.append(int(response.headers[instrumentation.QUERY_COUNT_HEADER]))
+    assert counts[0] == counts[1]
+
+
+def test_rebuild_repairs_counters_and_project_deletion_drops_them(api_client, db_session):
+    owner = create_user(db_session, "counter_rebuild", "counter_rebuild@example.com")
+    project = create_project(db_session, owner, name="Drifted")
+    other = create_project(db_session, owner, name="Untouched")
+    create_task(db_session, owner, project, title="Kept", status="scheduled")
+    create_task(db_session, owner, other, title="Other", status="new_task")
+
+    # A write made around the API leaves the counters behind.
+    db_session.connection().exec_driver_sql(
+        "INSERT INTO tasks (title, status, project_id) VALUES ('Imported', NULL, ?)", (project.id,)
+    )
+    db_session.commit()
+    assert status_counts.project_counts(db_session, project.id) == {"scheduled": 1}
+
+    assert status_counts.rebuild(db_session, [project.id]) == 2
+    db_session.commit()
+    assert status_counts.project_counts(db_session, project.id) == {"scheduled": 1, "unknown": 1}
+    assert status_counts.project_counts(db_session, other.id) == {"new_task": 1}
+
+    headers = auth_headers(db_session, owner.username)
+    assert api_client.delete(f"/projects/{project.id}", headers=headers).status_code == 204
+    db_session.expire_all()
+    assert db_session.query(models.ProjectStatusCount).filter_by(project_id=project.id).count() == 0
+
+
+def test_new_counter_table_is_filled_from_existing_tasks(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    try:
+        Base.metadata.create_all(bind=engine)
+        with engine.begin() as connection:
+            connection.exec_driver_sql("DROP TABLE project_status_counts")
+            connection.exec_driver_sql(
+                "INSERT INTO users (username, email, hashed_password) VALUES ('legacy', 'legacy@example.com', '-')"
+            )
+            connection.exec_driver_sql("INSERT INTO projects (name, owner_id, visibility) VALUES ('Legacy', 1, 'all')")
+            connection.exec_driver_sql(
+                "INSERT INTO tasks (title, status, project_id) VALUES ('A', 'scheduled', 1), ('B', 'scheduled', 1)"
+            )
+
+        Base.metadata.create_all(bind=engine)
+        with engine.connect() as connection:
+            assert status_counts.project_counts(connection, 1) == {"scheduled": 2}
+    finally:
+        engine.dispose()
@@ -0,0 +1,103 @@
+"""Batch task mutations through POST /tasks/batch."""
+
+from typing import Dict
+
+import app.models as models
+from app.core import instrumentation
+from app.services.dependency_maps import dependency_maps
+from tests.factories import (
+    create_dependency,
+    create_project,
+    create_task,
+    create_user,
+    login_user,
+)
+
+
+def auth_headers(db_session, username: str, password: str = "secret123") -> Dict[str, str]:
+    token = login_user(db_session, username, password)
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_batch_applies_mixed_operations_in_order(api_client, db_session):
+    owner = create_user(db_session, "batch_owner", "batch_owner@example.com")
+    helper = create_user(db_session, "batch_helper", "batch_helper@example.com")
+    stranger = create_user(db_session, "batch_stranger", "batch_stranger@example.com")
+    project = create_project(db_session, owner, name="Batch Board")
+    hidden = create_project(db_session, stranger, name="Hidden Board", visibility="private")
+    moving = create_task(db_session, owner, project, title="Moving")
+    doomed = create_task(db_session, owner, project, title="Doomed")
+    secret = create_task(db_session, stranger, hidden, title="Secret")
+    create_dependency(db_session, owner, depends_on=moving, dependent=doomed)
+    headers = auth_headers(db_session, owner.username)
+    api_client.post("/comments", json={"task_id": doomed.id, "content": "About to go"}, headers=headers)
+    api_client.get("/dependency-map", headers=headers)
+
+    response = api_client.post(
+        "/tasks/batch",
+        json={
+            "operations": [
+                {"op": "create", "project_id": project.id, "title": "Fresh", "assignee_ids": [helper.id, 999]},
+                {"op": "update", "task_id": moving.id, "status": "in_progress", "assignee_ids": [helper.id]},
+                {"op": "delete", "task_id": doomed.id},
+                {"op": "update", "task_id": doomed.id, "title": "Too late"},
+                {"op": "update", "task_id": secret.id, "title": "Mine now"},
+                {"op": "create", "project_id": hidden.id, "title": "Intruder"},
+                {"op": "create", "project_id": 999, "title": "Nowhere"},
+            ]
+        },
+        headers=headers,
+    )
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [result["index"] for result in results] == list(range(7))
+    assert [result["error"] for result in results] == [
+        None,
+        None,
+        None,
+        "Task not found",
+        "Not allowed to access this task",
+        "Not allowed to access this project",
+        "Project not found",
+    ]
+    created = results[0]["task"]
+    assert created["title"] == "Fresh" and [user["id"] for user in created["assignees"]] == [helper.id]
+    assert results[1]["task"]["status"] == "in_progress"
+    assert results[2]["task_id"] == doomed.id and results[2]["task"] is None
+
+    db_session.expire_all()
+    assert db_session.get(models.Task, doomed.id) is None
+    assert db_session.get(models.Task, secret.id).title == "Secret"
+    actions = [
+        (activity.task_id, activity.action)
+        for activity in db_session.query(models.TaskActivity).order_by(models.TaskActivity.id)
+    ]
+    assert actions[-3:] == [(created["id"], "created"), (moving.id, "status_changed"), (doomed.id, "deleted")]
+
+    # The cached dependency map follows the batch without a reload.
+    cached = dependency_maps.get(project.id)
+    assert cached is not None and cached.version == db_session.get(models.Project, project.id).version
+    assert sorted(cached.titles) == sorted([moving.id, created["id"]]) and cached.edges == {}
+
+
+def test_batch_query_count_does_not_grow_with_size(instrumented_client, db_session):
+    owner = create_user(db_session, "batch_counter", "batch_counter@example.com")
+    helper = create_user(db_session, "batch_counted", "batch_counted@example.com")
+    headers = auth_headers(db_session, owner.username)
+    counts = []
+    for size in (2, 20):
+        project = create_project(db_session, owner, name=f"Batch {size}")
+        tasks = [create_task(db_session, owner, project, title=f"Task {index}") for index in range(size)]
+        response = instrumented_client.post(
+            "/tasks/batch",
+            json={
+                "operations": [
+                    {"op": "update", "task_id": task.id, "status": "completed", "assignee_ids": [helper.id]}
+                    for task in tasks
+                ]
+            },
+            headers=headers,
+        )
+        assert all(result["error"] is None for result in response.json()["results"])
+        counts.append(int(response.headers[instrumentation.QUERY_COUNT_HEADER]))
+    assert counts[0] == counts[1]
@@ -0,0 +1,92 @@
+"""Server-side filtering and sorting of the task lists."""
+
+from datetime import datetime
+from typing import Dict, List
+
+from app.api.pagination import NEXT_CURSOR_HEADER
+from tests.factories import create_project, create_task, create_user, login_user
+
+
+def auth_headers(db_session, username: str, password: str = "secret123") -> Dict[str, str]:
+    token = login_user(db_session, username, password)
+    return {"Authorization": f"Bearer {token}"}
+
+
+def task_ids(client, path: str, headers: Dict[str, str], **params) -> List[int]:
+    """Ids of every matching task, following cursors page by page."""
+    ids: List[int] = []
+    while True:
+        response = client.get(path, params=params, headers=headers)
+        assert response.status_code == 200, response.text
+        ids.extend(task["id"] for task in response.json())
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            return ids
+        params["cursor"] = cursor
+
+
+def test_filters_narrow_both_task_lists(api_client, db_session):
+    owner = create_user(db_session, "filter_owner", "filter_owner@example.com")
+    helper = create_user(db_session, "filter_helper", "filter_helper@example.com")
+    project = create_project(db_session, owner, name="Filtered")
+    first, second, third, fourth = (
+        create_task(db_session, owner, project, title=f"Task {index}", status=status)
+        for index, status in enumerate(["new_task", "scheduled", "in_progress", "scheduled"])
+    )
+    first.created_at, second.created_at = datetime(2030, 1, 1), datetime(2030, 1, 2)
+    third.created_at, fourth.created_at = datetime(2030, 1, 3), datetime(2030, 1, 4)
+    second.due_date, third.due_date = datetime(2030, 2, 1), datetime(2030, 3, 1)
+    second.assignees.append(helper)
+    fourth.assignees.append(helper)
+    db_session.commit()
+    headers = auth_headers(db_session, owner.username)
+
+    for path in (f"/projects/{project.id}/tasks", "/tasks"):
+        assert task_ids(api_client, path, headers, status="scheduled") == [fourth.id, second.id]
+        assert task_ids(api_client, path, headers, status=["new_task", "in_progress"]) == [third.id, first.id]
+        assert task_ids(api_client, path, headers, assignee_id=helper.id) == [fourth.id, second.id]
+        assert task_ids(api_client, path, headers, due_before="2030-02-15") == [second.id]
+        assert task_ids(api_client, path, headers, due_after="2030-02-01T00:00:00") == [third.id, second.id]
+        assert task_ids(api_client, path, headers, created_after="2030-01-03", sort="created_at") == [
+            third.id,
+            fourth.id,
+        ]
+        assert task_ids(api_client, path, headers, status="scheduled", assignee_id=owner.id) == []
+
+    response = api_client.get(f"/projects/{project.id}/tasks", params={"status": "archived"}, headers=headers)
+    assert response.status_code == 422
+
+
+def test_time_filters_with_an_offset_compare_in_utc(api_client, db_session):
+    owner = create_user(db_session, "offset_owner", "offset_owner@example.com")
+    project = create_project(db_session, owner, name="Offsets")
+    early, late = (create_task(db_session, owner, project, title=title) for title in ("Early", "Late"))
+    early.created_at, early.due_date = datetime(2030, 1, 1, 8), datetime(2030, 2, 1, 8)
+    late.created_at, late.due_date = datetime(2030, 1, 1, 10), datetime(2030, 2, 1, 10)
+    db_session.commit()
+    headers = auth_headers(db_session, owner.username)
+    path = f"/projects/{project.id}/tasks"
+
+    # 11:00 at +02:00 is 09:00 UTC, between the two tasks.
+    assert task_ids(api_client, path, headers, due_before="2030-02-01T11:00:00+02:00") == [early.id]
+    assert task_ids(api_client, path, headers, due_after="2030-02-01T11:00:00+02:00") == [late.id]
+    assert task_ids(api_client, path, headers, created_after="2030-01-01T04:00:00-05:00") == [late.id]
+    assert task_ids(api_client, path, headers, due_before="2030-02-01T09:00:00Z") == [early.id]
+
+
+def test_due_date_sort_pages_with_undated_tasks_last(api_client, db_session):
+    owner = create_user(db_session, "due_sorter", "due_sorter@example.com")
+    project = create_project(db_session, owner, name="Due dates")
+    tasks = [create_task(db_session, owner, project, title=f"Task {index}") for index in range(6)]
+    due_dates = [datetime(2030, 5, 1), None, datetime(2030, 4, 1), datetime(2030, 5, 1), None, datetime(2030, 6, 1)]
+    for task, due_date in zip(tasks, due_dates):
+        task.due_date = due_date
+    db_session.commit()
+    headers = auth_headers(db_session, owner.username)
+    path = f"/projects/{project.id}/tasks"
+
+    ascending = [tasks[2].id, tasks[0].id, tasks[3].id, tasks[5].id, tasks[1].id, tasks[4].id]
+    descending = [tasks[5].id, tasks[3].id, tasks[0].id, tasks[2].id, tasks[4].id, tasks[1].id]
+    for limit in (1, 2, 4):
+        assert task_ids(api_client, path, headers, sort="due_date", limit=limit) == ascending
+        assert task_ids(api_client, path, headers, sort="-due_date", limit=limit) == descending